@@ -0,0 +1,131 @@
+import copy
+import numpy as np
+import pandas as pd
+from search_index import merge_groups
+
+# How a track's streams are credited to its artists:
+# full gives every listed artist the whole value, split divides it by artist_count,
+# primary credits only the first listed artist.
+WEIGHTINGS = ['full', 'split', 'primary']
+
+
+class ArtistIndex:
+    # Exploded track -> artist table built once from the comma-joined artist(s)_name column.
+    # Artist names are interned as integer ids; both directions are stored as CSR offset arrays:
+    # track t owns artist_ids[track_offsets[t]:track_offsets[t + 1]],
+    # artist a owns artist_tracks[artist_offsets[a]:artist_offsets[a + 1]].
+    def __init__(self, artist_names, artist_count=None):
+        # Split each distinct artist(s)_name string once; tracks then just reference their combination
+        combo_codes, combos = pd.factorize(pd.Series(artist_names).astype(object).to_numpy())
+        parts = pd.Series(np.asarray(combos, dtype=object)).str.split(',').explode().str.strip()
+        parts = parts[parts != '']
+        part_codes, artists = pd.factorize(parts.to_numpy())
+        combo_lengths = np.bincount(parts.index.to_numpy(), minlength=len(combos))
+        combo_offsets = np.concatenate(([0], np.cumsum(combo_lengths)))
+
+        # Missing names have code -1 and no artists
+        lengths = np.where(combo_codes >= 0, combo_lengths[combo_codes], 0)
+        self.n_tracks = len(combo_codes)
+        self.track_offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.entry_tracks = np.repeat(np.arange(self.n_tracks), lengths)
+        within = np.arange(self.track_offsets[-1]) - self.track_offsets[:-1][self.entry_tracks]
+        entry_parts = combo_offsets[combo_codes[self.entry_tracks]] + within
+
+        self.artist_ids = part_codes[entry_parts].astype(np.int32)
+        self.artists = np.asarray(artists, dtype=object)
+        # Artist -> id, and lowercase name -> ids; the id tuples are replaced, never changed, when extending
+        self.ids = {artist: artist_id for artist_id, artist in enumerate(self.artists.tolist())}
+        self.lookup = {}
+        for artist_id, artist in enumerate(self.artists.tolist()):
+            self.lookup[artist.lower()] = self.lookup.get(artist.lower(), ()) + (artist_id,)
+
+        self.is_primary = np.zeros(len(self.artist_ids), dtype=bool)
+        self.is_primary[self.track_offsets[:-1][np.diff(self.track_offsets) > 0]] = True
+
+        self.build_artist_tracks()
+        self.artist_count = self.clean_artist_count(artist_count, self.track_offsets)
+
+    def build_artist_tracks(self):
+        order = np.argsort(self.artist_ids, kind='stable')
+        self.artist_tracks = self.entry_tracks[order]
+        self.artist_offsets = np.concatenate(([0], np.cumsum(np.bincount(self.artist_ids,
+                                                                          minlength=len(self.artists)))))
+
+    @staticmethod
+    def clean_artist_count(artist_count, track_offsets):
+        if artist_count is None:
+            artist_count = np.diff(track_offsets)
+        artist_count = pd.Series(artist_count).astype('Float64').fillna(1).to_numpy(dtype=np.float64)
+        return np.maximum(artist_count, 1)
+
+    def extended(self, artist_names, artist_count=None):
+        # A new index that also covers tracks appended after the existing ones (positions n_tracks onward).
+        # Only the new names are split and only their postings are added; this index is left untouched for
+        # readers on other threads.
+        added = ArtistIndex(artist_names, artist_count)
+        index = copy.copy(self)
+        index.ids = dict(self.ids)
+        index.lookup = dict(self.lookup)
+
+        # Map the new block's artist ids onto this index's ids, giving unseen artists the next free ids
+        mapping = np.empty(len(added.artists), dtype=np.int32)
+        new_artists = []
+        for added_id, artist in enumerate(added.artists.tolist()):
+            artist_id = index.ids.get(artist)
+            if artist_id is None:
+                artist_id = len(self.artists) + len(new_artists)
+                new_artists.append(artist)
+                index.ids[artist] = artist_id
+                index.lookup[artist.lower()] = index.lookup.get(artist.lower(), ()) + (artist_id,)
+            mapping[added_id] = artist_id
+
+        index.artists = np.concatenate([self.artists, np.asarray(new_artists, dtype=object)])
+        index.n_tracks = self.n_tracks + added.n_tracks
+        index.track_offsets = np.concatenate([self.track_offsets, added.track_offsets[1:] + self.track_offsets[-1]])
+        index.entry_tracks = np.concatenate([self.entry_tracks, added.entry_tracks + self.n_tracks])
+        added_ids = mapping[added.artist_ids]
+        index.artist_ids = np.concatenate([self.artist_ids, added_ids])
+        index.is_primary = np.concatenate([self.is_primary, added.is_primary])
+        index.artist_count = np.concatenate([self.artist_count, added.artist_count])
+        # The appended tracks come after every existing one, so each artist's new tracks go at the end of its list
+        order = np.argsort(added_ids, kind='stable')
+        index.artist_tracks, index.artist_offsets = merge_groups(
+            self.artist_offsets, self.artist_tracks, added.entry_tracks[order] + self.n_tracks,
+            np.bincount(added_ids, minlength=len(index.artists)))
+        return index
+
+    def __len__(self):
+        return len(self.artists)
+
+    def entry_weights(self, weighting='full'):
+        if weighting == 'full':
+            return np.ones(len(self.artist_ids))
+        if weighting == 'split':
+            return 1.0 / self.artist_count[self.entry_tracks]
+        if weighting == 'primary':
+            return self.is_primary.astype(np.float64)
+        raise ValueError(f"Unknown weighting {weighting!r}, expected one of {WEIGHTINGS}")
+
+    def totals(self, values, weighting='full'):
+        # Per-artist sum of a per-track measure such as streams; missing values count as zero
+        values = pd.Series(values).astype('Float64').fillna(0).to_numpy(dtype=np.float64)
+        weights = values[self.entry_tracks] * self.entry_weights(weighting)
+        return pd.Series(np.bincount(self.artist_ids, weights=weights, minlength=len(self.artists)),
+                         index=pd.Index(self.artists, name='artist'))
+
+    def top(self, values, n=10, weighting='full'):
+        return self.totals(values, weighting).nlargest(n)
+
+    def artist_ids_for(self, name):
+        return self.lookup.get(name.strip().lower(), ())
+
+    def tracks(self, name):
+        # Row positions of every track crediting the artist (exact, case-insensitive match)
+        ids = self.artist_ids_for(name)
+        if not ids:
+            return np.empty(0, dtype=np.intp)
+        rows = np.concatenate([self.artist_tracks[self.artist_offsets[i]:self.artist_offsets[i + 1]] for i in ids])
+        return np.unique(rows)
+
+    def artists_of(self, track):
+        return self.artists[self.artist_ids[self.track_offsets[track]:self.track_offsets[track + 1]]].tolist()
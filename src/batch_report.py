@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from aggregate_cube import AggregateCube
+from artist_index import ArtistIndex
+from charts import CHARTS, CHARTS_BY_NAME, chart_args, chart_slug
+from data_loader import load_spotify_songs
+from visualization import Visualization
+
+# Set in each worker process: the clean dataset plus the precomputed chart inputs
+DATASET = None
+
+
+def prepare_dataset(file_path):
+    spotify_songs, loader = load_spotify_songs(file_path)
+    inputs = {
+        'cube': AggregateCube(spotify_songs),
+        'artist_index': ArtistIndex(spotify_songs['artist(s)_name'], spotify_songs['artist_count']),
+    }
+    return spotify_songs, inputs, loader
+
+
+def init_worker(dataset):
+    global DATASET
+    DATASET = dataset
+
+
+def render_chart(name, out_dir, formats):
+    start = time.perf_counter()
+    chart = CHARTS_BY_NAME[name]
+    spotify_songs, inputs = DATASET
+    visualization = Visualization(None)
+    draw = getattr(visualization, chart.draw)
+    figure = visualization.prepare(draw, *chart_args(chart, spotify_songs, inputs))
+    paths = []
+    for fmt in formats:
+        path = os.path.join(out_dir, f"{chart_slug(chart)}.{fmt}")
+        figure.savefig(path)
+        paths.append(path)
+    return name, paths, time.perf_counter() - start
+
+
+def write_index(out_dir, charts, formats):
+    with open(os.path.join(out_dir, 'report.md'), 'w', encoding='utf-8') as f:
+        f.write("# Spotify Songs Report\n")
+        for chart in charts:
+            f.write(f"\n## {chart.name}\n\n![{chart.name}]({chart_slug(chart)}.{formats[0]})\n\n{chart.conclusion}\n")
+
+
+def run_batch(file_path, out_dir, names=None, formats=('png',), workers=None):
+    charts = [CHARTS_BY_NAME[name] for name in names] if names else CHARTS
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    spotify_songs, inputs, loader = prepare_dataset(file_path)
+    load_time = time.perf_counter() - start
+    dataset = (spotify_songs, inputs)
+
+    # With fork, workers inherit the loaded dataset through shared copy-on-write pages.
+    # Elsewhere it is pickled once per worker through the initializer, never once per chart.
+    methods = multiprocessing.get_all_start_methods()
+    if 'fork' in methods:
+        init_worker(dataset)
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=(dataset,))
+
+    timings = {}
+    with pool:
+        futures = [pool.submit(render_chart, chart.name, out_dir, list(formats)) for chart in charts]
+        for future in as_completed(futures):
+            name, paths, seconds = future.result()
+            timings[name] = seconds
+    write_index(out_dir, charts, list(formats))
+    return {
+        'rows': len(spotify_songs),
+        'issues': len(loader.issues),
+        'load_seconds': load_time,
+        'chart_seconds': timings,
+        'wall_seconds': time.perf_counter() - start,
+    }
+
+
+def print_summary(summary):
+    print(f"Loaded {summary['rows']} rows in {summary['load_seconds']:.2f}s "
+          f"({summary['issues']} malformed values set to missing)")
+    for name, seconds in sorted(summary['chart_seconds'].items(), key=lambda item: -item[1]):
+        print(f"  {seconds:7.2f}s  {name}")
+    total = sum(summary['chart_seconds'].values())
+    print(f"Rendered {len(summary['chart_seconds'])} charts: {total:.2f}s of chart time "
+          f"in {summary['wall_seconds']:.2f}s wall time")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every visualization to image files without the GUI.")
+    parser.add_argument('--data', default='data/Popular_Spotify_Songs.csv', help="CSV file to load")
+    parser.add_argument('--out', default='reports', help="Directory for the rendered charts")
+    parser.add_argument('--chart', action='append', choices=[chart.name for chart in CHARTS], dest='charts',
+                        help="Chart to render (repeatable); all charts by default")
+    parser.add_argument('--format', action='append', choices=['png', 'svg', 'pdf'], dest='formats',
+                        help="Output format (repeatable); png by default")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.data, args.out, args.charts, args.formats or ['png'], args.workers)
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
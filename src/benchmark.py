@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from aggregate_cube import AggregateCube
+from artist_index import ArtistIndex
+from charts import CHARTS, chart_args
+from data_loader import load_spotify_songs
+from query_engine import QueryEngine
+from search_index import SearchIndex
+from similarity_index import SimilarityIndex
+from sort_index import SortIndex
+from synthetic_data import write_spotify_csv
+from visualization import Visualization
+
+DEFAULT_ROWS = [1000, 100000]
+DEFAULT_QUERY = "streams > 1e8 and released_year between 2015 and 2020"
+# A stage regresses when it is this much slower than the baseline and the difference is above the noise floor
+TOLERANCE = 0.25
+NOISE_SECONDS = 0.005
+# Committed baseline for the default sizes, from the synthetic generator; refresh it with --save-baseline
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+
+def timed(work, repeat):
+    # Best of repeat runs: the minimum is the least noisy estimate of the true cost
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = work()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def dataset_path(data_dir, rows, seed):
+    # Generated files are reused between runs; generating 10M rows takes minutes
+    path = os.path.join(data_dir, f"spotify_songs_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        write_spotify_csv(path + '.tmp', rows, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def time_explorer(spotify_songs, repeat):
+    # Table population and classification go through the explorer, which needs a display; returns no stages
+    # where Tk cannot start
+    from tkinter import Tk, TclError, ttk
+    from data_explorer import DataExplorer
+    from virtual_table import VirtualTable
+    try:
+        root = Tk()
+    except TclError:
+        return {}
+    try:
+        root.withdraw()
+        results = {}
+        tree = ttk.Treeview(root, columns=list(spotify_songs.columns), show='headings')
+        vsb = ttk.Scrollbar(root, orient="vertical")
+        tree.pack()
+        table = VirtualTable(tree, vsb)
+
+        def populate():
+            table.set_data(spotify_songs)
+            table.yview('moveto', 0.5)
+            root.update()
+
+        results['table'], _ = timed(populate, repeat)
+        # Without a task runner the explorer classifies inline, including the derived frame it queries
+        explorer = DataExplorer(ttk.Frame(root), spotify_songs)
+        results['classify'], _ = timed(explorer.classify_tracks, repeat)
+        return results
+    finally:
+        root.destroy()
+
+
+def time_startup(repeat):
+    # Cold start in fresh interpreters: importing the app module, and the startup milestones
+    # from main.py --startup-report where a display is available
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    script = "import time; start = time.perf_counter(); import spotify_app; print(time.perf_counter() - start)"
+    results['import'] = min(float(subprocess.run([sys.executable, '-c', script], cwd=src_dir, check=True,
+                                                 capture_output=True, text=True).stdout) for _ in range(repeat))
+    if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+        fd, report_path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            for _ in range(repeat):
+                subprocess.run([sys.executable, 'main.py', '--startup-report', report_path], cwd=src_dir,
+                               check=True, timeout=120)
+            with open(report_path, encoding='utf-8') as f:
+                reports = [json.loads(line) for line in f]
+        finally:
+            os.remove(report_path)
+        for name in reports[0]['marks']:
+            results[name] = min(report['marks'][name] for report in reports)
+    return results
+
+
+def run_benchmarks(rows, repeat=3, data_dir=None, seed=0, charts=None):
+    data_dir = data_dir or tempfile.gettempdir()
+    charts = charts or CHARTS
+    path = dataset_path(data_dir, rows, seed)
+    results = {}
+
+    results['ingest'], (spotify_songs, loader) = timed(lambda: load_spotify_songs(path, cache=False), repeat)
+    # Later starts memory-map the columnar copy written by the first cached load
+    load_spotify_songs(path)
+    results['reopen'], _ = timed(lambda: load_spotify_songs(path), repeat)
+    results['aggregate_cube'], cube = timed(lambda: AggregateCube(spotify_songs), repeat)
+    results['artist_index'], artist_index = timed(
+        lambda: ArtistIndex(spotify_songs['artist(s)_name'], spotify_songs['artist_count']), repeat)
+
+    search_index = SearchIndex(spotify_songs)
+    results['search_index'], _ = timed(lambda: SearchIndex(spotify_songs).build(['artist(s)_name', 'track_name']),
+                                       repeat)
+    search_index.build(['artist(s)_name', 'track_name'])
+    results['filter_substring'], _ = timed(lambda: search_index.search('track_name', 'love'), repeat)
+    top_artist = artist_index.top(spotify_songs['streams'], 1).index[0]
+    results['filter_artist'], _ = timed(lambda: artist_index.tracks(top_artist), repeat)
+    # A fresh engine each run, so the predicate masks are computed rather than served from the cache
+    results['filter_query'], _ = timed(lambda: QueryEngine(spotify_songs).search(DEFAULT_QUERY), repeat)
+    results['similarity_index'], similarity_index = timed(lambda: SimilarityIndex(spotify_songs), repeat)
+    results['filter_similar'], _ = timed(lambda: similarity_index.similar([0], 20), repeat)
+    sort_keys = [('released_year', False), ('streams', False)]
+    results['sort'], _ = timed(lambda: SortIndex(spotify_songs).order(sort_keys), repeat)
+    # Re-sorting a filtered view once the order is cached
+    sort_index = SortIndex(spotify_songs)
+    sort_index.order(sort_keys)
+    substring_positions = search_index.search('track_name', 'love')
+    results['sort_filtered'], _ = timed(lambda: sort_index.order(sort_keys, substring_positions), repeat)
+    results.update(time_explorer(spotify_songs, repeat))
+
+    inputs = {'cube': cube, 'artist_index': artist_index}
+    visualization = Visualization(None)
+    for chart in charts:
+        draw = getattr(visualization, chart.draw)
+        args = chart_args(chart, spotify_songs, inputs)
+        results[f"chart: {chart.name}"], _ = timed(lambda: visualization.show(visualization.prepare(draw, *args)),
+                                                   repeat)
+    return results
+
+
+def environment():
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=TOLERANCE, noise=NOISE_SECONDS):
+    # (rows, stage, baseline seconds, current seconds) for every stage that got slower than allowed
+    regressions = []
+    for rows, stages in results['results'].items():
+        baseline_stages = baseline['results'].get(rows, {})
+        for stage, seconds in stages.items():
+            before = baseline_stages.get(stage)
+            if before is not None and seconds > before * (1 + tolerance) and seconds - before > noise:
+                regressions.append((rows, stage, before, seconds))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    for rows, stages in results['results'].items():
+        print(f"{int(rows):,} rows" if rows.isdigit() else rows)
+        baseline_stages = (baseline or {}).get('results', {}).get(rows, {})
+        for stage, seconds in stages.items():
+            line = f"  {seconds * 1000:10.1f} ms  {stage}"
+            if stage in baseline_stages:
+                line += f"  ({seconds / max(baseline_stages[stage], 1e-9):.2f}x baseline)"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time ingestion, filtering, classification, the table and every "
+                                                 "chart on synthetic datasets, and compare against a baseline.")
+    parser.add_argument('--rows', action='append', type=int, help="Dataset size (repeatable); 1K and 100K by default")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage; the best time is kept")
+    parser.add_argument('--data-dir', default=None, help="Where generated datasets are cached")
+    parser.add_argument('--out', default='benchmark_results.json', help="JSON file for the results")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Allowed slowdown, e.g. 0.25 for 25%%")
+    args = parser.parse_args(argv)
+
+    results = environment()
+    results['repeat'] = args.repeat
+    results['results'] = {}
+    for rows in args.rows or DEFAULT_ROWS:
+        results['results'][str(rows)] = run_benchmarks(rows, args.repeat, args.data_dir)
+    results['results']['startup'] = time_startup(args.repeat)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print_results(results)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    for rows, stage, before, seconds in regressions:
+        print(f"REGRESSION {stage} at {rows}: {before * 1000:.1f} ms -> {seconds * 1000:.1f} ms")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    # Same copy-on-write semantics as the application
+    pd.set_option('mode.copy_on_write', True)
+    sys.exit(main())
@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+# A chart offered by the app: the Visualization.draw_* method that builds it, the precomputed inputs
+# it takes after the dataset ('cube' for the AggregateCube, 'artist_index' for the ArtistIndex,
+# 'snapshots' for the SnapshotSeries)
+# and the conclusion shown next to it.
+Chart = namedtuple('Chart', ['name', 'draw', 'inputs', 'conclusion'])
+
+CHARTS = [
+    Chart("Streams by Release Year", 'draw_streams_by_year', ('cube',),
+          "Conclusion: The graph clearly demonstrates the increasing trend of music streaming over the years, particularly in the last decade. The dominance of recent years highlights the impact of digital transformation in the music industry, with streaming platforms playing a pivotal role in how people consume music today.\nThe peak was in the 2022."),
+    Chart("Top 10 Artists by Streams", 'draw_top_artists_by_streams', ('artist_index',),
+          "Conclusion: The artists in the top 10 represent a variety of genres and styles, including pop (The Weeknd, Ed Sheeran, Taylor Swift, Harry Styles, Dua Lipa, Justin Bieber), hip-hop (Eminem, Drake), Latin (Bad Bunny) and K-pop (BTS). This diversity indicates that high streaming numbers are not limited to a single genre, reflecting varied musical tastes among listeners.\nCollaborations count towards every credited artist, which lifts frequent collaborators such as The Weeknd and Bad Bunny to the top. Artists like Bad Bunny and BTS, who have risen to fame more recently compared to some of the others, are also among the top 10. This suggests that newer artists can quickly amass a large number of streams and compete with long-established artists."),
+    Chart("Danceability vs. Energy", 'draw_danceability_vs_energy', (),
+          "Conclusion: Most of the points are concentrated in the range of 40 to 80 for both danceability and energy. This suggests that many popular songs tend to have moderate to high levels of both attributes, making them suitable for dancing and energetic activities.\nThere is no clear correlation between the two factors."),
+    Chart("Songs Released by Month", 'draw_songs_released_by_month', ('cube',),
+          "Conclusion: The graph shows that most songs are coming out in January and in May. The least amount of songs are published in August. This may be a part of some marketing/pr tactics or strategies regarding publishing songs in music industry."),
+    Chart("Key vs. Streams", 'draw_key_vs_streams', ('cube',),
+          "Conclusion: The graph illustrates that the key of C# is exceptionally popular, with significantly higher total streams compared to other keys. This trend suggests that songs in this key may have qualities that resonate particularly well with listeners. Other keys like D, E, F, G, and G# also show strong performance, while keys like D# and A are less popular. "),
+    Chart("Valence vs. Streams", 'draw_valence_vs_streams', (),
+          "Conclusion: TThere is no strong correlation between valence and the number of streams. Most songs, regardless of their valence, have streams clustered in the lower range (below 1 billion). A few outliers have much higher streams, but they do not show a clear pattern related to valence.\nHigh-stream songs (above 1 billion streams) are spread across different valence levels, further supporting the idea that musical positivity is not a key determinant of a song's popularity. "),
+    Chart("Mode vs. Streams", 'draw_mode_vs_streams', ('cube',),
+          "Conclusion: Despite the preference for Major mode songs, the presence of a considerable number of streams for Minor mode songs indicates that popular music maintains a balance of different emotional tones, catering to a wide range of listener moods and preferences."),
+    Chart("Danceability vs. BPM", 'draw_danceability_vs_bpm', (),
+          "Conclusion: There is a higher concentration of songs with BPM values between 80 and 140. This range is typical for many popular genres such as pop, rock, and electronic dance music, which tend to dominate streaming platforms.\nThere is no clear correlation between BPM and danceability. The points are widely scattered across the plot, indicating that a song can be highly danceable regardless of its BPM, and vice versa."),
+    Chart("Average BPM vs. Release Year", 'draw_avg_bpm_vs_release_year', ('cube',),
+          "Conclusion: There are noticeable peaks in average BPM during the early years (around the 1940s and 1950s) and in the 1980s. The peaks from 1980 and 2000 suggest periods when faster-tempo music was particularly popular. In the most recent years (2010s and 2020s), the average BPM appears to have stabilized at a lower range compared to earlier decades. This suggests a trend towards slower-tempo music in recent times."),
+    Chart("Pie Chart of All Keys", 'draw_pie_chart_of_keys', ('cube',),
+          "Conclusion: The pie chart illustrates a relatively balanced distribution of songs across different keys, with C# being the most popular and D# - the least popular."),
+    Chart("Collaborative vs. Solo Streams", 'draw_collaborative_vs_solo', ('cube',),
+          "Conclusion: The analysis shows, that the sum of total streams of Solo songs is more than 2 times greater than those which are collaborative. This may be also due to the dataset records as a whole."),
+    Chart("Danceability vs. Streams", 'draw_danceability_vs_streams', (),
+          "Conclusion: The scatter plot shows a concentration of songs with mid to high danceability values having a wide range of streams, indicating that while danceability is a factor, it does not solely determine the popularity of a song. Most of the records tend to keep moderate danceability, between 40-90%."),
+    Chart("Acousticness vs. Streams", 'draw_acousticness_vs_streams', (),
+          "Conclusion: The scatter plot indicates that in the dataset there is more records with low percentage (0-20%) of acousticnesss. There is no visible correlation between acousticness and streams, indicating that fully acoustic songs can also be popular. "),
+    Chart("Instrumentalness vs. Streams", 'draw_instrumentalness_vs_streams', (),
+          "Conclusion: Most high-stream songs have 0% or low instrumentalness percentage, indicating that purely instrumental tracks are less popular in terms of streaming."),
+    Chart("Liveness vs. Streams", 'draw_liveness_vs_streams', (),
+          "Conclusion: The scatter plot shows a wide distribution of liveness values that favor less liveness according to amount of streams. There is also significantly more records with liveness in a range between 20-40%."),
+]
+# Offered when a directory of snapshots is loaded; 'snapshots' is the SnapshotSeries
+SNAPSHOT_CHARTS = [
+    Chart("Total Streams by Snapshot", 'draw_streams_by_snapshot', ('snapshots',),
+          "Total streams of all tracks listed in each snapshot. Streams are cumulative, so the line only falls when tracks drop out of the export."),
+    Chart("Week-over-Week Change in Streams", 'draw_streams_change_by_snapshot', ('snapshots',),
+          "Streams gained between each snapshot and the one before it by the tracks listed in both, i.e. how much those tracks were listened to in that week."),
+    Chart("Week-over-Week Change in Playlists", 'draw_playlist_change_by_snapshot', ('snapshots',),
+          "Change in the Spotify, Apple Music and Deezer playlist counts between consecutive snapshots, over the tracks listed in both."),
+    Chart("Top Movers by Streams", 'draw_top_movers_by_streams', ('snapshots',),
+          "The ten tracks that gained the most streams between the last two snapshots."),
+]
+CHARTS_BY_NAME = {chart.name: chart for chart in CHARTS + SNAPSHOT_CHARTS}
+
+
+def chart_args(chart, spotify_songs, inputs):
+    # Positional arguments for the chart's draw method after the figure
+    return [spotify_songs] + [inputs[name] for name in chart.inputs]
+
+
+def chart_slug(chart):
+    # File-name friendly chart name, e.g. "Danceability vs. BPM" -> "danceability_vs_bpm"
+    return "_".join("".join(c if c.isalnum() else " " for c in chart.name.lower()).split())
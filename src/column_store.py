@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Bumped whenever the on-disk layout changes, so older caches are rebuilt instead of misread
+FORMAT_VERSION = 2
+# The fingerprint hashes this many bytes from the start and from the end of the source file
+FINGERPRINT_BYTES = 1024 * 1024
+MANIFEST = 'manifest.json'
+# Codes recoded per block when a string column's dictionary is sorted
+RECODE_BLOCK = 1 << 20
+
+
+def store_dir(file_path):
+    # data/Popular_Spotify_Songs.csv -> data/Popular_Spotify_Songs.columns
+    return os.path.splitext(file_path)[0] + '.columns'
+
+
+def source_key(file_path):
+    # Size, modification time and a hash of the head and tail of the file. Hashing a multi-GB file in full
+    # would cost as much as parsing it, while any append, truncation or rewrite changes one of these.
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > 2 * FINGERPRINT_BYTES:
+            f.seek(-FINGERPRINT_BYTES, os.SEEK_END)
+            digest.update(f.read())
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest(), 'format': FORMAT_VERSION}
+
+
+class ColumnStore:
+    # Binary columnar copy of a parsed CSV, memory-mapped on later opens instead of parsing the text again.
+    # Every column is one or two .npy files: fixed-width numeric arrays as they are, nullable integers as
+    # values plus a missing mask, categoricals as codes, and strings dictionary-encoded as codes plus the
+    # sorted distinct values as one UTF-8 buffer. Every column is mapped without copying, so instances opening
+    # the same store share its pages through the OS page cache: a string column comes back as a categorical
+    # over the mapped codes, whose categories are in sorted order so sorting by it sorts by value.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.path = store_dir(file_path)
+
+    def manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def open(self, key=None):
+        # The stored frame and its manifest, or (None, None) when there is no store for the current source
+        manifest = self.manifest()
+        key = key or source_key(self.file_path)
+        if manifest is None or manifest['source'] != key:
+            return None, None
+        try:
+            columns = {column['name']: self.read_column(column, manifest['token'])
+                       for column in manifest['columns']}
+        except (OSError, ValueError, KeyError):
+            return None, None
+        data = pd.DataFrame(columns, copy=False)
+        data.index = pd.RangeIndex(manifest['rows'])
+        return data, manifest
+
+    def array(self, token, name):
+        return np.load(os.path.join(self.path, f"{name}.{token}.npy"), mmap_mode='r')
+
+    def read_column(self, column, token):
+        name, kind = column['file'], column['kind']
+        if kind == 'numpy':
+            return np.asarray(self.array(token, name))
+        if kind == 'masked':
+            array_type = pd.api.types.pandas_dtype(column['dtype']).construct_array_type()
+            return array_type(np.asarray(self.array(token, name)), np.asarray(self.array(token, name + '.mask')))
+        if kind == 'category':
+            return pd.Categorical.from_codes(self.array(token, name), categories=column['categories'])
+        if kind == 'string':
+            buffer = self.array(token, name + '.dict')
+            dictionary = bytes(buffer).decode('utf-8').split('\0') if column['distinct'] else []
+            # Code -1 is missing. The codes are stored in the width pandas uses for this many categories,
+            # so they are not copied.
+            return pd.Categorical.from_codes(self.array(token, name), categories=pd.Index(dictionary, dtype=object),
+                                             validate=False)
+        raise ValueError(f"Unknown column kind {kind!r}")
+
+    def current(self, key=None):
+        # Whether the store was written for the file's current contents
+        manifest = self.manifest()
+        return manifest is not None and manifest['source'] == (key or source_key(self.file_path))
+
+    def write(self, data, key=None, extra=None):
+        writer = self.writer(key)
+        try:
+            writer.append(data)
+            return writer.finish(extra)
+        except BaseException:
+            writer.abort()
+            raise
+
+    def writer(self, key=None):
+        # For rows that arrive in chunks, e.g. a file streamed because it does not fit in memory
+        return ColumnWriter(self, key or source_key(self.file_path))
+
+
+def code_dtype(categories):
+    # The code width pandas gives a categorical with this many categories
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class ColumnWriter:
+    # Builds a store one chunk of rows at a time. Every file is appended to under a temporary name and gets its
+    # final .npy header once its length is known; strings share one dictionary across chunks, and an integer
+    # column keeps its missing mask only if some chunk had a missing value.
+    # Columns are written under a new token and the manifest is replaced last, so an instance mapping the
+    # previous files keeps reading them; files of older tokens are removed where the OS allows it.
+    def __init__(self, store, key):
+        self.store = store
+        self.key = key
+        self.token = key['hash'][:12] + f"{key['mtime_ns']:x}"
+        self.columns = None
+        # name -> (open file, dtype, header length)
+        self.files = {}
+        self.dictionaries = {}
+        self.missing = {}
+        self.rows = 0
+        os.makedirs(store.path, exist_ok=True)
+
+    def path(self, name):
+        return os.path.join(self.store.path, f"{name}.{self.token}.npy")
+
+    def append(self, chunk):
+        if self.columns is None:
+            self.columns = [self.start_column(chunk[name], name, f"c{i}") for i, name in enumerate(chunk.columns)]
+        elif list(chunk.columns) != [column['name'] for column in self.columns]:
+            raise ValueError("Chunks have different columns")
+        for column in self.columns:
+            for name, values in self.column_arrays(column, chunk[column['name']]).items():
+                self.write_array(name, values)
+        self.rows += len(chunk)
+
+    def start_column(self, series, name, file):
+        column = {'name': name, 'file': file, 'dtype': str(series.dtype)}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            return {**column, 'kind': 'category', 'categories': series.cat.categories.tolist()}
+        if isinstance(series.dtype, pd.StringDtype) or series.dtype == object:
+            self.dictionaries[file] = {}
+            return {**column, 'kind': 'string'}
+        if pd.api.types.is_integer_dtype(series.dtype):
+            # Plain or nullable integers: the values with a placeholder where missing, and the missing mask
+            self.missing[file] = False
+            return {**column, 'kind': 'numpy', 'dtype': str(getattr(series.dtype, 'numpy_dtype', series.dtype))}
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            raise ValueError(f"Column {name} has unsupported dtype {series.dtype}")
+        return {**column, 'kind': 'numpy'}
+
+    def column_arrays(self, column, series):
+        # The arrays one chunk adds to a column, by file name
+        file, kind = column['file'], column['kind']
+        if kind == 'category':
+            if series.cat.categories.tolist() != column['categories']:
+                raise ValueError(f"Column {column['name']} changes its categories")
+            return {file: series.cat.codes.to_numpy()}
+        if kind == 'string':
+            codes, uniques = pd.factorize(series)
+            dictionary = self.dictionaries[file]
+            # Chunk codes to store codes; the trailing -1 keeps missing values missing
+            lookup = np.array([dictionary.setdefault(str(value), len(dictionary)) for value in uniques] + [-1],
+                              dtype=np.int32)
+            return {file: lookup[codes]}
+        if file in self.missing:
+            mask = series.isna().to_numpy()
+            self.missing[file] = self.missing[file] or bool(mask.any())
+            values = series.to_numpy(dtype=getattr(series.dtype, 'numpy_dtype', series.dtype), na_value=0)
+            return {file: values, file + '.mask': mask}
+        return {file: series.to_numpy()}
+
+    def write_array(self, name, values):
+        if name not in self.files:
+            f = open(self.path(name) + '.tmp', 'wb')
+            self.files[name] = (f, values.dtype, self.write_header(f, values.dtype, 0))
+        f, dtype, header = self.files[name]
+        if values.dtype != dtype:
+            raise ValueError(f"{name} changes from {dtype} to {values.dtype} between chunks")
+        np.ascontiguousarray(values).tofile(f)
+
+    @staticmethod
+    def write_header(f, dtype, length):
+        # numpy pads the header so the length can grow in place; returns where the data starts
+        np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                 'fortran_order': False, 'shape': (length,)})
+        return f.tell()
+
+    def finish(self, extra=None):
+        columns = self.columns or []
+        for column in columns:
+            file = column['file']
+            if column['kind'] == 'string':
+                values = list(self.dictionaries[file])
+                order = np.argsort(np.array(values, dtype=object), kind='stable').astype(np.int64)
+                values = [values[i] for i in order]
+                # Old code -> sorted code; the trailing -1 keeps missing values missing
+                ranks = np.full(len(values) + 1, -1, dtype=np.int64)
+                ranks[order] = np.arange(len(values))
+                self.recode(file, ranks, code_dtype(len(values)))
+                joined = "\0".join(values)
+                if joined.count("\0") != max(len(values) - 1, 0):
+                    raise ValueError(f"Column {column['name']} contains NUL characters")
+                self.write_array(file + '.dict', np.frombuffer(joined.encode('utf-8'), dtype=np.uint8))
+                column['distinct'] = len(values)
+            elif self.missing.get(file):
+                column['kind'] = 'masked'
+                column['dtype'] = str(pd.array(np.zeros(0, dtype=column['dtype'])).dtype)
+            elif file in self.missing:
+                self.discard(file + '.mask')
+        for name, (f, dtype, header) in list(self.files.items()):
+            length = (f.tell() - header) // dtype.itemsize
+            f.seek(0)
+            if self.write_header(f, dtype, length) != header:
+                raise ValueError(f"Header of {name} does not fit in place")
+            f.close()
+            # Replaced rather than rewritten in place: the same source reuses the same names, and truncating a
+            # file another instance has mapped faults its readers
+            os.replace(self.path(name) + '.tmp', self.path(name))
+            del self.files[name]
+
+        manifest = {'source': self.key, 'token': self.token, 'rows': self.rows, 'columns': columns,
+                    **(extra or {})}
+        manifest_path = os.path.join(self.store.path, MANIFEST)
+        with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        for file_name in os.listdir(self.store.path):
+            if file_name.endswith(('.npy', '.npy.tmp')) and f".{self.token}." not in file_name:
+                try:
+                    os.remove(os.path.join(self.store.path, file_name))
+                except OSError:
+                    pass
+        return manifest
+
+    def recode(self, name, ranks, dtype):
+        # Rewrites the codes appended so far as ranks[codes], in dtype
+        f, old_dtype, header = self.files.pop(name)
+        length = (f.tell() - header) // old_dtype.itemsize
+        f.close()
+        unsorted = os.path.join(self.store.path, f"{name}.unsorted.{self.token}.npy.tmp")
+        os.replace(self.path(name) + '.tmp', unsorted)
+        try:
+            self.write_array(name, np.empty(0, dtype=dtype))
+            if length:
+                codes = np.memmap(unsorted, dtype=old_dtype, mode='r', offset=header, shape=(length,))
+                for start in range(0, length, RECODE_BLOCK):
+                    self.write_array(name, ranks[codes[start:start + RECODE_BLOCK]].astype(dtype))
+                del codes
+        finally:
+            os.remove(unsorted)
+
+    def discard(self, name):
+        f = self.files.pop(name)[0]
+        f.close()
+        os.remove(self.path(name) + '.tmp')
+
+    def abort(self):
+        for name in list(self.files):
+            try:
+                self.discard(name)
+            except OSError:
+                pass
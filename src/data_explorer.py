@@ -1,27 +1,41 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 from tkinter import ttk, Tk, messagebox
-import chardet
+from data_loader import load_spotify_songs
+from aggregate_cube import track_type
+from artist_index import ArtistIndex
+from instrumentation import INSTRUMENTATION
+from query_engine import QueryEngine, parse_query
+from search_index import SearchIndex
+from similarity_index import similarity_index
+from sort_index import SortIndex
+from virtual_table import VirtualTable
 
 
 class DataExplorer:
-    def __init__(self, parent, spotify_songs):
+    def __init__(self, parent, spotify_songs, artist_index=None, task_runner=None, data_path=None):
         self.frame_overview = ttk.LabelFrame(parent, text="Dataset Overview")
         self.frame_overview.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
         # Store the dataset
         self.spotify_songs = spotify_songs
+        # Filtering and classification run on this TaskRunner's worker threads; inline when it is None
+        self.task_runner = task_runner
 
         # Treeview widget for displaying the dataset
         self.tree = ttk.Treeview(self.frame_overview, columns=list(spotify_songs.columns), show='headings')
         for col in spotify_songs.columns:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text=col, command=lambda col=col: self.sort_by(col))
             self.tree.column(col, width=100)
+        # Click a heading to sort by it (again to reverse), shift-click to add it as a further sort key
+        self.tree.bind('<Shift-Button-1>', self.on_shift_click)
+        self.sort_index = SortIndex(spotify_songs)
+        self.sort_keys = []
+        # Row positions matched by the active filter, in filter order; None while every row is shown
+        self.filtered_positions = None
 
         # Vertical scrollbar
         self.vsb = ttk.Scrollbar(self.frame_overview, orient="vertical", command=self.tree.yview)
         self.vsb.pack(side='right', fill='y')
-        self.tree.configure(yscrollcommand=self.vsb.set)
 
         # Horizontal scrollbar
         self.hsb = ttk.Scrollbar(self.frame_overview, orient="horizontal", command=self.tree.xview)
@@ -30,8 +44,23 @@ class DataExplorer:
 
         self.tree.pack(side='left', fill='both', expand=True)
 
+        # Only the visible window of rows is materialized in the Treeview
+        self.table = VirtualTable(self.tree, self.vsb)
+
         self.load_data(spotify_songs)
 
+        # Trigram index over the filterable columns, warmed once the window is idle
+        self.search_index = SearchIndex(spotify_songs)
+        self.artist_index = artist_index
+        # Compound typed queries over any column, with per-predicate masks cached between refinements
+        self.query_engine = QueryEngine(spotify_songs, self.search_index)
+        # Nearest tracks by audio features, loaded from (or persisted next to) data_path on first use
+        self.data_path = data_path
+        self.similarity_index = None
+        self.similar_count = 20
+        # Solo/Collaborative per row once the tracks are classified, kept beside the dataset rather than in it
+        self.is_collaborative = None
+
         # Entry and button for filtering
         self.filter_frame = ttk.Frame(parent)
         self.filter_frame.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
@@ -40,12 +69,24 @@ class DataExplorer:
 
         # Dropdown for filter options
         self.filter_options = ["artist(s)_name", "track_name", "released_year", "streams"]  # Add more as needed
-        self.selected_filter_option = ttk.Combobox(self.filter_frame, values=self.filter_options)
+        # Exact (case-insensitive) match on one credited artist, answered from the artist index
+        self.artist_filter_option = "artist (exact)"
+        # e.g. "streams > 1e9 and released_year between 2015 and 2020 and key in (C#, D)"
+        self.query_filter_option = "query"
+        self.selected_filter_option = ttk.Combobox(self.filter_frame, values=self.filter_options + [
+            self.artist_filter_option, self.query_filter_option])
         self.selected_filter_option.grid(row=0, column=1, padx=5, pady=5)
         self.selected_filter_option.current(0)
 
         self.filter_entry = ttk.Entry(self.filter_frame)
         self.filter_entry.grid(row=0, column=2, padx=5, pady=5)
+
+        # Live filtering: re-apply the filter once typing pauses for filter_delay milliseconds
+        self.filter_delay = 150
+        self.pending_filter = None
+        self.filter_entry.bind('<KeyRelease>', self.schedule_filter)
+        self.selected_filter_option.bind('<<ComboboxSelected>>', self.schedule_filter)
+
         self.filter_button = ttk.Button(self.filter_frame, text="Apply Filter", command=self.apply_filter)
         self.filter_button.grid(row=0, column=3, padx=5, pady=5)
         self.clear_button = ttk.Button(self.filter_frame, text="Clear Filter", command=self.clear_filter)
@@ -59,44 +100,216 @@ class DataExplorer:
         self.plot_button = ttk.Button(self.extra_frame, text="Plot Collaborative vs Solo",
                                       command=self.plot_collaborative_vs_solo)
         self.plot_button.grid(row=0, column=1, padx=5, pady=5)
+        self.similar_button = ttk.Button(self.extra_frame, text="Similar Tracks", command=self.find_similar)
+        self.similar_button.grid(row=0, column=2, padx=5, pady=5)
+
+        parent.after_idle(self.run_task, 'index', lambda: self.search_index.build(self.filter_options),
+                          lambda result: None, "An error occurred while indexing data")
 
     def load_data(self, data):
         try:
-            for row in self.tree.get_children():
-                self.tree.delete(row)
-            for index, row in data.iterrows():
-                self.tree.insert("", "end", values=list(row))
+            with INSTRUMENTATION.stage('table', rows=len(data)):
+                self.table.set_data(data)
+                if data is self.spotify_songs:
+                    self.filtered_positions = None
+                    if self.sort_keys:
+                        self.table.set_view(self.sort_index.order(self.sort_keys))
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while loading data: {e}")
 
-    def apply_filter(self):
+    def run_task(self, channel, work, on_done, error_message):
+        def on_error(e):
+            messagebox.showerror("Error", f"{error_message}: {e}")
+
+        if self.task_runner is not None:
+            self.task_runner.submit(channel, work, on_done, on_error)
+            return
         try:
-            filter_column = self.selected_filter_option.get()
-            filter_text = self.filter_entry.get()
-            filtered_data = self.spotify_songs[
-                self.spotify_songs[filter_column].astype(str).str.contains(filter_text, case=False, na=False)]
-            self.load_data(filtered_data)
+            on_done(work())
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while applying filter: {e}")
+            on_error(e)
 
-    def clear_filter(self):
+    def apply_filter(self):
+        filter_column = self.selected_filter_option.get()
+        filter_text = self.filter_entry.get()
+        sort_keys = list(self.sort_keys)
+        self.run_task('filter', lambda: self.sorted_view(self.filter_positions(filter_column, filter_text), sort_keys),
+                      self.show_filtered, "An error occurred while applying filter")
+
+    def filter_positions(self, filter_column, filter_text):
+        with INSTRUMENTATION.stage(f"filter: {filter_column}") as stage:
+            if filter_column == self.artist_filter_option:
+                positions = self.get_artist_index().tracks(filter_text)
+            elif filter_column == self.query_filter_option:
+                positions = self.query_engine.search(filter_text)
+            else:
+                positions = self.search_index.search(filter_column, filter_text)
+            stage.rows = len(positions)
+        return positions
+
+    def sorted_view(self, positions, sort_keys):
+        # The filtered positions and the same rows in display order; positions None stands for every row
+        if not sort_keys:
+            return positions, positions
+        with INSTRUMENTATION.stage('sort', rows=len(self.spotify_songs) if positions is None else len(positions)):
+            return positions, self.sort_index.order(sort_keys, positions)
+
+    def show_filtered(self, view):
+        self.filtered_positions, positions = view
+        with INSTRUMENTATION.stage('table', rows=len(self.spotify_songs) if positions is None else len(positions)):
+            if self.table.data is not self.spotify_songs:
+                self.table.set_data(self.spotify_songs)
+            self.table.set_view(positions)
+
+    def sort_by(self, column, add=False):
+        # A plain click sorts by column alone, or reverses it when it already is the only key;
+        # with add, column becomes a further key, or an existing key is reversed in place
+        keys = dict(self.sort_keys)
+        if add and column in keys:
+            self.sort_keys = [(col, not ascending if col == column else ascending) for col, ascending in self.sort_keys]
+        elif add:
+            self.sort_keys = self.sort_keys + [(column, True)]
+        elif list(keys) == [column]:
+            self.sort_keys = [(column, not keys[column])]
+        else:
+            self.sort_keys = [(column, True)]
+        self.show_sort_keys()
+        positions = self.filtered_positions
+        sort_keys = list(self.sort_keys)
+        self.run_task('filter', lambda: self.sorted_view(positions, sort_keys), self.show_filtered,
+                      "An error occurred while sorting")
+
+    def on_shift_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != 'heading':
+            return None
+        column = self.tree.identify_column(event.x)
+        self.sort_by(self.tree['columns'][int(column[1:]) - 1], add=True)
+        # Keep the heading's own click handler from replacing the sort keys
+        return 'break'
+
+    def show_sort_keys(self):
+        # Arrows on the sorted headings, numbered when there are several keys
+        keys = dict(self.sort_keys)
+        for col in self.tree['columns']:
+            text = col
+            if col in keys:
+                text += ' \u25b2' if keys[col] else ' \u25bc'
+                if len(keys) > 1:
+                    text += str([key for key, _ in self.sort_keys].index(col) + 1)
+            self.tree.heading(col, text=text)
+
+    def extended_indexes(self, spotify_songs):
+        # The indexes extended with the rows appended in spotify_songs, leaving the current ones untouched.
+        # Safe to call from a worker thread; append_rows() installs the result.
+        with INSTRUMENTATION.stage('index: extend', rows=len(spotify_songs) - len(self.spotify_songs)):
+            similarity = self.similarity_index
+            if similarity is not None:
+                similarity = similarity.extended(spotify_songs.iloc[len(similarity):])
+            return self.sort_index.extended(spotify_songs), self.search_index.extended(spotify_songs), similarity
+
+    def append_rows(self, spotify_songs, artist_index=None, indexes=None):
+        # spotify_songs is the current dataset with rows appended at the end. The indexes are extended with the
+        # appended rows rather than rebuilt, here unless extended_indexes() already did it on a worker thread;
+        # an active filter is re-applied, otherwise the table keeps its scroll position.
+        self.sort_index, self.search_index, self.similarity_index = indexes or self.extended_indexes(spotify_songs)
+        self.spotify_songs = spotify_songs
+        self.artist_index = artist_index
+        self.query_engine.search_index = self.search_index
+        self.query_engine.set_data(spotify_songs)
+        if self.is_collaborative is not None:
+            # The appended rows are classified too
+            self.classify_tracks()
+        search_index = self.search_index
+        self.run_task('index', lambda: search_index.build(self.filter_options), lambda result: None,
+                      "An error occurred while indexing data")
+        if self.filter_entry.get():
+            self.apply_filter()
+            return
+        if self.sort_keys:
+            # The appended rows have to be merged into the sort order
+            sort_keys = list(self.sort_keys)
+            self.run_task('filter', lambda: self.sorted_view(None, sort_keys), self.show_filtered,
+                          "An error occurred while sorting")
+            return
         try:
-            self.filter_entry.delete(0, 'end')
-            self.load_data(self.spotify_songs)
+            with INSTRUMENTATION.stage('table', rows=len(spotify_songs)):
+                self.table.extend_data(spotify_songs)
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while clearing filter: {e}")
+            messagebox.showerror("Error", f"An error occurred while loading data: {e}")
+
+    def get_artist_index(self):
+        if self.artist_index is None:
+            self.artist_index = ArtistIndex(self.spotify_songs['artist(s)_name'], self.spotify_songs['artist_count'])
+        return self.artist_index
+
+    def get_similarity_index(self):
+        if self.similarity_index is None:
+            with INSTRUMENTATION.stage('index: similarity', rows=len(self.spotify_songs)):
+                self.similarity_index = similarity_index(self.spotify_songs, self.data_path)
+        return self.similarity_index
+
+    def find_similar(self):
+        # Tracks closest in audio features to the selected rows, nearest first
+        positions = self.table.selected_positions()
+        if not len(positions):
+            messagebox.showinfo("Similar Tracks", "Select one or more tracks in the table first.")
+            return
+        sort_keys = list(self.sort_keys)
+        self.run_task('filter', lambda: self.sorted_view(self.similar_positions(positions), sort_keys),
+                      self.show_filtered,
+                      "An error occurred while finding similar tracks")
+
+    def similar_positions(self, positions):
+        with INSTRUMENTATION.stage('filter: similar') as stage:
+            similar, _ = self.get_similarity_index().similar(positions, self.similar_count)
+            stage.rows = len(similar)
+        return similar
+
+    def schedule_filter(self, event=None):
+        if self.pending_filter is not None:
+            self.filter_entry.after_cancel(self.pending_filter)
+        self.pending_filter = self.filter_entry.after(self.filter_delay, self.run_scheduled_filter)
+
+    def run_scheduled_filter(self):
+        self.pending_filter = None
+        if self.selected_filter_option.get() == self.query_filter_option:
+            # A half-typed query is not an error while typing; it is reported when applied explicitly
+            try:
+                parse_query(self.filter_entry.get())
+            except ValueError:
+                return
+        self.apply_filter()
+
+    def clear_filter(self):
+        if self.pending_filter is not None:
+            self.filter_entry.after_cancel(self.pending_filter)
+            self.pending_filter = None
+        self.filter_entry.delete(0, 'end')
+        # Goes through the filter channel so a filter still running in the background is superseded
+        sort_keys = list(self.sort_keys)
+        self.run_task('filter', lambda: self.sorted_view(None, sort_keys), self.show_filtered,
+                      "An error occurred while clearing filter")
 
     def classify_tracks(self):
-        try:
-            self.spotify_songs['is_collaborative'] = self.spotify_songs['artist_count'].apply(
-                lambda x: 'Collaborative' if x > 1 else 'Solo')
-            self.load_data(self.spotify_songs)
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while classifying tracks: {e}")
+        self.run_task('classify', self.track_types, self.show_classified,
+                      "An error occurred while classifying tracks")
+
+    def track_types(self):
+        with INSTRUMENTATION.stage('classify', rows=len(self.spotify_songs)):
+            return track_type(self.spotify_songs['artist_count'])
+
+    def show_classified(self, is_collaborative):
+        if len(is_collaborative) != len(self.spotify_songs):
+            # Rows were appended while classifying
+            self.classify_tracks()
+            return
+        self.is_collaborative = pd.Series(is_collaborative, index=self.spotify_songs.index, name='is_collaborative')
+        # Queries can use the classification through a derived frame; the shared dataset is left as it is
+        self.query_engine.set_data(self.spotify_songs.assign(is_collaborative=self.is_collaborative))
 
     def get_collaboration_streams_summary(self):
         try:
-            summary = self.spotify_songs.groupby('is_collaborative')['streams'].sum().reset_index()
+            summary = self.spotify_songs['streams'].groupby(self.is_collaborative, observed=False).sum().reset_index()
             return summary
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while summarizing data: {e}")
@@ -104,6 +317,8 @@ class DataExplorer:
 
     def plot_collaborative_vs_solo(self):
         try:
+            # Imported on first use: pyplot is slow to import and not needed to show the table
+            import matplotlib.pyplot as plt
             summary = self.get_collaboration_streams_summary()
             plt.figure(figsize=(10, 6))
             plt.bar(summary['is_collaborative'],
@@ -117,12 +332,14 @@ class DataExplorer:
 
 
 if __name__ == "__main__":
+    # Derived frames never write through to the dataset shared by the table and the plots
+    pd.set_option('mode.copy_on_write', True)
     try:
         root = Tk()
-        with open('data/Popular_Spotify_Songs.csv', 'rb') as f:
-            result = chardet.detect(f.read())
-        encoding = result['encoding']
-        spotify_songs = pd.read_csv('data/Popular_Spotify_Songs.csv', encoding=encoding)
+        spotify_songs, loader = load_spotify_songs('data/Popular_Spotify_Songs.csv')
+        if loader.issues:
+            messagebox.showwarning("Data Warning",
+                                   f"{len(loader.issues)} malformed values were set to missing:\n{loader.summary()}")
         app = DataExplorer(root, spotify_songs)
         root.mainloop()
     except FileNotFoundError:
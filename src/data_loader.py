@@ -0,0 +1,285 @@
+import codecs
+import io
+import os
+import pandas as pd
+from column_store import ColumnStore, source_key
+from dataset import VALID_KEYS, normalize_spotify_songs
+from instrumentation import INSTRUMENTATION
+
+try:
+    import pyarrow  # noqa: F401
+    PARSE_ENGINE = 'pyarrow'
+except ImportError:
+    PARSE_ENGINE = 'c'
+
+# Explicit schema for the 24 columns of Popular_Spotify_Songs.csv.
+# streams, key and the playlist counts that use thousands separators are read as text and validated below.
+# Integer columns are parsed as float64, which the C parser reads as fast as int64 (nullable Int64 is several
+# times slower), so a blank cell is a missing value rather than a failed load. validate() reports blank and
+# fractional values and normalize_spotify_songs() stores the columns as compact integers.
+INTEGER = 'float64'
+SPOTIFY_SCHEMA = {
+    'track_name': 'string',
+    'artist(s)_name': 'string',
+    'artist_count': INTEGER,
+    'released_year': INTEGER,
+    'released_month': INTEGER,
+    'released_day': INTEGER,
+    'in_spotify_playlists': INTEGER,
+    'in_spotify_charts': INTEGER,
+    'streams': 'string',
+    'in_apple_playlists': INTEGER,
+    'in_apple_charts': INTEGER,
+    'in_deezer_playlists': 'string',
+    'in_deezer_charts': INTEGER,
+    'in_shazam_charts': 'string',
+    'bpm': INTEGER,
+    'key': 'string',
+    'mode': 'string',
+    'danceability_%': INTEGER,
+    'valence_%': INTEGER,
+    'energy_%': INTEGER,
+    'acousticness_%': INTEGER,
+    'instrumentalness_%': INTEGER,
+    'liveness_%': INTEGER,
+    'speechiness_%': INTEGER,
+}
+THOUSANDS_COLUMNS = ['in_deezer_playlists', 'in_shazam_charts']
+INTEGER_COLUMNS = [col for col, dtype in SPOTIFY_SCHEMA.items() if dtype == INTEGER]
+# Used when an integer column holds text, which fails the numeric parse: the integer columns are then read as
+# text as well and coerced in validate(), with the bad values reported like malformed streams
+TEXT_SCHEMA = {**SPOTIFY_SCHEMA, **{col: 'string' for col in INTEGER_COLUMNS}}
+
+# Encoding detection only looks at a few blocks spread over the file, never the whole file
+SAMPLE_BLOCKS = 8
+SAMPLE_BLOCK_SIZE = 16 * 1024
+FALLBACK_ENCODING = 'ISO-8859-1'
+# Block read backwards from the end when looking for the last complete line
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+class BoundedFile(io.RawIOBase):
+    # The first limit bytes of an open file, so rows appended while it is parsed are left for read_appended().
+    # on_progress, if given, is called with the fraction of those bytes the parser has consumed, which works
+    # the same for every read_csv engine.
+    def __init__(self, f, limit, on_progress=None):
+        self.f = f
+        self.limit = limit
+        self.remaining = limit
+        self.on_progress = on_progress
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.f.readinto(memoryview(buffer)[:min(len(buffer), self.remaining)])
+        self.remaining -= n
+        if self.on_progress is not None:
+            self.on_progress(1.0 - self.remaining / max(self.limit, 1))
+        return n
+
+
+def complete_length(f, size):
+    # Bytes up to and including the last newline within the first size bytes. A line still being written
+    # would otherwise be parsed as a truncated row.
+    end = size
+    while end > 0:
+        start = max(end - TAIL_BLOCK_SIZE, 0)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return size
+
+
+class SpotifyDataLoader:
+    def __init__(self, file_path, engine=PARSE_ENGINE):
+        self.file_path = file_path
+        self.engine = engine
+        self.encoding = None
+        self.issues = []
+
+    def read_sample(self):
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, 'rb') as f:
+            if size <= SAMPLE_BLOCKS * SAMPLE_BLOCK_SIZE:
+                return f.read()
+            blocks = []
+            step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for i in range(SAMPLE_BLOCKS):
+                f.seek(i * step)
+                blocks.append(f.read(SAMPLE_BLOCK_SIZE))
+            return b'\n'.join(blocks)
+
+    def detect_encoding(self):
+        sample = self.read_sample()
+        try:
+            # Blocks may cut a multi-byte character in half, so decode incrementally without flushing
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+        # Only needed for files that are not UTF-8, so it is not imported at startup
+        import chardet
+        return chardet.detect(sample)['encoding'] or FALLBACK_ENCODING
+
+    @staticmethod
+    def parse(read):
+        # read(dtype) with the schema, or with TEXT_SCHEMA when an integer column holds text
+        try:
+            return read(SPOTIFY_SCHEMA)
+        except UnicodeDecodeError:
+            raise
+        except ValueError:
+            return read(TEXT_SCHEMA)
+
+    def read_csv(self, encoding, on_progress=None):
+        # Only the first file_size bytes are parsed, however much the file has grown since. Progress comes
+        # from the handle rather than from reading in chunks, so it keeps the configured engine.
+        def read(dtype):
+            with open(self.file_path, 'rb') as f:
+                return pd.read_csv(BoundedFile(f, self.file_size, on_progress), encoding=encoding, dtype=dtype,
+                                   engine=self.engine)
+        return self.parse(read)
+
+    def load(self, on_progress=None, cache=False):
+        # on_progress, if given, is called from the reading thread with the fraction of the file parsed so far.
+        # With cache, a columnar copy kept next to the file is memory-mapped instead of parsing the text,
+        # and written after parsing when there is none for the file's current contents.
+        self.issues = []
+        key = source_key(self.file_path) if cache else None
+        if cache:
+            data = self.open_cache(key)
+            if data is not None:
+                if on_progress is not None:
+                    on_progress(1.0)
+                return data
+        # Rows appended after this point, and a last line not yet complete, are picked up by read_appended()
+        with open(self.file_path, 'rb') as f:
+            self.file_size = complete_length(f, key['size'] if cache else os.fstat(f.fileno()).st_size)
+        self.encoding = self.detect_encoding()
+        with INSTRUMENTATION.stage('load: parse') as stage:
+            try:
+                data = self.read_csv(self.encoding, on_progress)
+            except UnicodeDecodeError:
+                # The sample looked like UTF-8 but the rest of the file is not; Latin-1 decodes any byte
+                self.encoding = FALLBACK_ENCODING
+                data = self.read_csv(self.encoding, on_progress)
+            except ValueError as e:
+                raise pd.errors.ParserError(f"Column does not match the expected schema: {e}")
+            stage.rows = len(data)
+        with INSTRUMENTATION.stage('load: validate', rows=len(data)):
+            data = normalize_spotify_songs(self.validate(data))
+        if cache:
+            self.write_cache(data, key)
+        return data
+
+    def open_cache(self, key):
+        with INSTRUMENTATION.stage('load: open cache') as stage:
+            data, manifest = ColumnStore(self.file_path).open(key)
+            if data is None:
+                return None
+            self.encoding = manifest['encoding']
+            self.issues = manifest['issues']
+            self.file_size = manifest.get('file_size', key['size'])
+            stage.rows = len(data)
+        return data
+
+    def write_cache(self, data, key):
+        # A read-only data directory or an unsupported column only costs the next start a parse
+        with INSTRUMENTATION.stage('load: write cache', rows=len(data)):
+            try:
+                ColumnStore(self.file_path).write(data, key, {'encoding': self.encoding, 'issues': self.issues,
+                                                                 'file_size': self.file_size})
+            except (OSError, ValueError):
+                pass
+
+    def read_chunks(self, chunk_size, encoding=None, size=None):
+        # Same parsing and validation as load(), one bounded chunk at a time, over the complete lines
+        # within the first size bytes (by default the current size of the file)
+        self.issues = []
+        self.encoding = encoding or self.detect_encoding()
+        with open(self.file_path, 'rb') as f:
+            self.file_size = complete_length(f, os.fstat(f.fileno()).st_size if size is None else size)
+        done = 0
+        for dtype in (SPOTIFY_SCHEMA, TEXT_SCHEMA):
+            try:
+                with open(self.file_path, 'rb') as f:
+                    reader = pd.read_csv(BoundedFile(f, self.file_size), encoding=self.encoding, dtype=dtype,
+                                         engine='c', chunksize=chunk_size)
+                    with reader:
+                        for chunk in reader:
+                            # After a switch to TEXT_SCHEMA, the rows already yielded are parsed again but skipped
+                            chunk = chunk.iloc[max(done - chunk.index[0], 0):]
+                            if len(chunk):
+                                done += len(chunk)
+                                yield normalize_spotify_songs(self.validate(chunk))
+                return
+            except UnicodeDecodeError:
+                raise
+            except ValueError:
+                if dtype is TEXT_SCHEMA:
+                    raise
+
+    def read_appended(self, offset, first_row):
+        # Rows appended to the file after byte offset, parsed and validated like load(), with positions
+        # starting at first_row. Only complete lines are read, so a row still being written waits for the
+        # next call. Returns the rows (None if there are none) and the offset to continue from.
+        with open(self.file_path, 'rb') as f:
+            f.seek(offset)
+            block = f.read()
+        end = block.rfind(b'\n') + 1
+        if end == 0:
+            return None, offset
+        data = self.parse(lambda dtype: pd.read_csv(io.BytesIO(block[:end]), header=None, names=list(SPOTIFY_SCHEMA),
+                                                    dtype=dtype, encoding=self.encoding, engine='c'))
+        if data.empty:
+            return None, offset + end
+        data.index = pd.RangeIndex(first_row, first_row + len(data))
+        return normalize_spotify_songs(self.validate(data)), offset + end
+
+    def validate(self, data):
+        for col in INTEGER_COLUMNS:
+            # Required by the schema, so a blank cell is reported like a malformed value
+            self.report_missing(data, col)
+            if data[col].dtype == 'string':
+                data[col] = self.coerce_numeric(data, col, data[col])
+            fractional = (data[col] % 1 != 0) & data[col].notna()
+            if fractional.any():
+                self.report(data, col, fractional)
+                data[col] = data[col].mask(fractional)
+        for col in THOUSANDS_COLUMNS:
+            data[col] = self.coerce_numeric(data, col, data[col].str.replace(',', '', regex=False))
+        data['streams'] = self.coerce_numeric(data, 'streams', data['streams'])
+
+        key = data['key']
+        invalid_keys = key.notna() & ~key.isin(VALID_KEYS)
+        self.report(data, 'key', invalid_keys)
+        data['key'] = key.mask(invalid_keys)
+        return data
+
+    def coerce_numeric(self, data, col, values):
+        numeric = pd.to_numeric(values, errors='coerce')
+        self.report(data, col, numeric.isna() & values.notna())
+        return numeric
+
+    def report(self, data, col, invalid):
+        for index, value in data.loc[invalid, col].items():
+            self.issues.append(f"Row {index + 2}: invalid {col} value {str(value)[:40]!r}")
+
+    def report_missing(self, data, col):
+        for index in data.index[data[col].isna().to_numpy()]:
+            self.issues.append(f"Row {index + 2}: missing {col} value")
+
+    def summary(self, limit=5):
+        lines = self.issues[:limit]
+        if len(self.issues) > limit:
+            lines.append(f"... and {len(self.issues) - limit} more")
+        return "\n".join(lines)
+
+
+def load_spotify_songs(file_path, on_progress=None, cache=True):
+    loader = SpotifyDataLoader(file_path)
+    data = loader.load(on_progress, cache)
+    return data, loader
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+VALID_KEYS = ['A', 'A#', 'B', 'C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#']
+VALID_MODES = ['Major', 'Minor']
+
+# Compact dtype for every numeric column; a column with missing values gets the nullable variant
+COMPACT_DTYPES = {
+    'artist_count': 'uint8',
+    'released_year': 'int16',
+    'released_month': 'int16',
+    'released_day': 'int16',
+    'in_spotify_playlists': 'int32',
+    'in_spotify_charts': 'int16',
+    'streams': 'int64',
+    'in_apple_playlists': 'int32',
+    'in_apple_charts': 'int16',
+    'in_deezer_playlists': 'int32',
+    'in_deezer_charts': 'int16',
+    'in_shazam_charts': 'int32',
+    'bpm': 'int16',
+    'danceability_%': 'uint8',
+    'valence_%': 'uint8',
+    'energy_%': 'uint8',
+    'acousticness_%': 'uint8',
+    'instrumentalness_%': 'uint8',
+    'liveness_%': 'uint8',
+    'speechiness_%': 'uint8',
+}
+CATEGORY_COLUMNS = {
+    'key': VALID_KEYS,
+    'mode': VALID_MODES,
+}
+NULLABLE_DTYPES = {'uint8': 'UInt8', 'int16': 'Int16', 'int32': 'Int32', 'int64': 'Int64'}
+# Spare rows reserved when an AppendBuffer runs out of room, as a fraction of the rows it holds
+APPEND_HEADROOM = 0.5
+
+
+def compact_numeric(values, dtype):
+    numeric = pd.to_numeric(values, errors='coerce')
+    info = np.iinfo(dtype)
+    # Values that do not fit the compact type become missing rather than wrapping around
+    numeric = numeric.where((numeric >= info.min) & (numeric <= info.max))
+    if numeric.isna().any():
+        return numeric.astype(NULLABLE_DTYPES[dtype])
+    return numeric.astype(dtype)
+
+
+def normalize_spotify_songs(data):
+    # Coerce every known column once and downcast it to a compact dtype.
+    # The plotting layer relies on this and never converts or writes back into the frame.
+    data = data.copy(deep=False)
+    for col, dtype in COMPACT_DTYPES.items():
+        if col in data.columns:
+            data[col] = compact_numeric(data[col], dtype)
+    for col, categories in CATEGORY_COLUMNS.items():
+        if col in data.columns:
+            data[col] = pd.Categorical(data[col], categories=categories)
+    return data
+
+
+def with_capacity(values, rows, capacity):
+    # The first rows of a column in a new array of capacity rows of the same dtype; the rest is unset
+    if isinstance(values, np.ndarray):
+        grown = np.empty(capacity, dtype=values.dtype)
+        grown[:rows] = values[:rows]
+        return grown
+    return values.take(np.concatenate([np.arange(rows), np.full(capacity - rows, -1)]), allow_fill=True)
+
+
+class AppendBuffer:
+    # The columns of a dataset with spare room at the end, so appending rows writes only those rows instead of
+    # copying the whole frame. frame() is a zero-copy view of the rows so far. Rows are never written twice, so
+    # frames handed out earlier stay valid while later rows are appended. When the room runs out the columns are
+    # reallocated with headroom in proportion to their length, which keeps the copying proportional to the
+    # appended rows over time.
+    def __init__(self, data):
+        self.rows = len(data)
+        self.capacity = self.rows
+        self.columns = {col: data[col].values for col in data.columns}
+        self.data = data
+
+    def append(self, chunk):
+        # The dataset with chunk's rows appended, as a new frame
+        if list(chunk.columns) != list(self.columns):
+            raise ValueError("Appended rows have different columns")
+        rows = self.rows + len(chunk)
+        if rows > self.capacity:
+            self.capacity = max(rows, int(self.rows * (1 + APPEND_HEADROOM)))
+            self.columns = {col: with_capacity(values, self.rows, self.capacity)
+                            for col, values in self.columns.items()}
+        for col, values in self.columns.items():
+            added = chunk[col].values
+            if added.dtype != values.dtype:
+                # e.g. the first missing value in an integer column, or text appended to names opened from a
+                # column store as categorical: the column takes the common dtype once
+                if isinstance(added.dtype, pd.StringDtype):
+                    dtype = added.dtype
+                else:
+                    dtype = pd.concat([pd.Series(values[:0]), pd.Series(added[:0])]).dtype
+                if dtype != values.dtype:
+                    values = pd.Series(values[:self.rows]).astype(dtype).values
+                    self.columns[col] = values = with_capacity(values, self.rows, self.capacity)
+                added = pd.Series(added).astype(dtype).values
+            values[self.rows:rows] = added
+        self.rows = rows
+        self.data = pd.DataFrame({col: values[:rows] for col, values in self.columns.items()}, copy=False)
+        return self.data
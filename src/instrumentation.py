@@ -0,0 +1,162 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+try:
+    import psutil
+    PROCESS = psutil.Process()
+except ImportError:
+    PROCESS = None
+
+# One timed stage. start and duration are in seconds; memory_delta is the change in resident memory in bytes
+# (None where it cannot be measured); rows is the number of rows the stage handled, if known.
+Event = namedtuple('Event', ['name', 'start', 'duration', 'thread', 'rows', 'memory_delta'])
+
+MAX_EVENTS = 100000
+
+
+def resident_memory():
+    if PROCESS is not None:
+        return PROCESS.memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class NullStage:
+    # Returned by stage() while instrumentation is off: entering and leaving it does nothing
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+class Stage:
+    def __init__(self, instrumentation, name, rows):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.rows = rows
+        self.profiler = None
+
+    def __enter__(self):
+        self.profile_path = self.instrumentation.claim_profile()
+        if self.profile_path is not None:
+            self.profiler = cProfile.Profile()
+        self.memory = resident_memory()
+        self.start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+        end = time.perf_counter()
+        memory = resident_memory()
+        memory_delta = memory - self.memory if memory is not None and self.memory is not None else None
+        self.instrumentation.record(Event(self.name, self.start, end - self.start, threading.get_ident(),
+                                          self.rows, memory_delta))
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.profile_path)
+        return False
+
+
+class Instrumentation:
+    # Records wall time, row counts and resident memory deltas of named stages:
+    #     with INSTRUMENTATION.stage('filter', rows=len(data)) as stage:
+    #         ...
+    #         stage.rows = len(result)
+    # While disabled, stage() returns a shared no-op context, so instrumented code pays one attribute check.
+    def __init__(self, enabled=False, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.last = None
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.profile_path = None
+
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            return NULL_STAGE
+        return Stage(self, name, rows)
+
+    def record(self, event):
+        with self.lock:
+            self.events.append(event)
+            self.last = event
+
+    def profile_next(self, path):
+        # Capture a cProfile of the next stage that starts, written to path in pstats format
+        with self.lock:
+            self.profile_path = path
+
+    def claim_profile(self):
+        # The first stage to claim an armed profile path gets it; checked without the lock while unarmed
+        if self.profile_path is None:
+            return None
+        with self.lock:
+            path, self.profile_path = self.profile_path, None
+            return path
+
+    def summary(self):
+        # name -> (calls, total seconds, max seconds)
+        totals = {}
+        with self.lock:
+            events = list(self.events)
+        for event in events:
+            calls, total, longest = totals.get(event.name, (0, 0.0, 0.0))
+            totals[event.name] = (calls + 1, total + event.duration, max(longest, event.duration))
+        return totals
+
+    def chrome_trace(self):
+        # Complete ("X") events in the Trace Event Format read by chrome://tracing and Perfetto
+        with self.lock:
+            events = list(self.events)
+        trace = []
+        for event in events:
+            args = {}
+            if event.rows is not None:
+                args['rows'] = int(event.rows)
+            if event.memory_delta is not None:
+                args['memory_delta_bytes'] = int(event.memory_delta)
+            trace.append({
+                'name': event.name,
+                'cat': event.name.split(':')[0],
+                'ph': 'X',
+                'ts': (event.start - self.origin) * 1e6,
+                'dur': event.duration * 1e6,
+                'pid': os.getpid(),
+                'tid': event.thread,
+                'args': args,
+            })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+def describe(event):
+    # Short status bar text, e.g. "filter: 12.3 ms, 953 rows"
+    text = f"{event.name}: {event.duration * 1000:.1f} ms"
+    if event.rows is not None:
+        text += f", {int(event.rows):,} rows"
+    if event.memory_delta:
+        text += f", {event.memory_delta / 2 ** 20:+.1f} MB"
+    return text
+
+
+# Shared by the loader, the explorer, the visualization and the app; SPOTIFY_INSTRUMENT=1 turns it on
+INSTRUMENTATION = Instrumentation(enabled=os.environ.get('SPOTIFY_INSTRUMENT') == '1')
@@ -1,7 +1,45 @@
-import tkinter as tk
-from spotify_app import SpotifyApp
+import time
 
-if __name__ == "__main__":
+START = time.perf_counter()
+
+import argparse  # noqa: E402
+import tkinter as tk  # noqa: E402
+from tkinter import ttk  # noqa: E402
+from startup import StartupTimer  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spotify Songs Explorer")
+    parser.add_argument('--startup-report', metavar='PATH',
+                        help="Append startup milestone timings to PATH as a JSON line and exit once the data is shown")
+    parser.add_argument('--data', default='data/Popular_Spotify_Songs.csv',
+                        help="CSV file to load, or a directory of dated CSV snapshots")
+    args = parser.parse_args(argv)
+    timer = StartupTimer(START)
+
+    # Put the window on screen before the heavy imports and the data load
     root = tk.Tk()
-    app = SpotifyApp(root)
+    root.title("Spotify Songs Explorer")
+    splash = ttk.Label(root, text="Starting...")
+    splash.grid(row=0, column=0, padx=10, pady=10)
+    root.update()
+    timer.mark('window')
+
+    import pandas as pd
+    from spotify_app import SpotifyApp
+    # Derived frames never write through to the dataset shared by the table and the plots
+    pd.set_option('mode.copy_on_write', True)
+    splash.destroy()
+    app = SpotifyApp(root, startup_timer=timer, data_path=args.data)
+
+    if args.startup_report:
+        def on_ready():
+            timer.write(args.startup_report)
+            root.after_idle(app.close)
+
+        app.on_ready = on_ready
     root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import re
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+import pandas as pd
+
+# One typed condition on one column. value is a number or string, a (low, high) pair for between,
+# or a tuple of values for in.
+Predicate = namedtuple('Predicate', ['column', 'op', 'value'])
+
+COMPARISONS = ['>=', '<=', '!=', '==', '>', '<', '=']
+OPERATORS = COMPARISONS + ['between', 'in', 'contains']
+
+VALUE = r"""'[^']*'|"[^"]*"|[^\s,()'"]+"""
+COLUMN = r"[\w()%#]+"
+CLAUSES = [
+    re.compile(rf"(?P<column>{COLUMN})\s+between\s+(?P<low>{VALUE})\s+and\s+(?P<high>{VALUE})", re.I),
+    re.compile(rf"(?P<column>{COLUMN})\s+in\s*\((?P<values>[^)]*)\)", re.I),
+    re.compile(rf"(?P<column>{COLUMN})\s+contains\s+(?P<value>{VALUE})", re.I),
+    re.compile(rf"(?P<column>{COLUMN})\s*(?P<op>>=|<=|!=|==|>|<|=)\s*(?P<value>{VALUE})", re.I),
+]
+AND = re.compile(r"\s+and\s+", re.I)
+# Predicate bitsets kept per engine, n/8 bytes each; every distinct predicate typed adds one
+BITSET_CACHE_SIZE = 64
+
+
+def unquote(text):
+    if len(text) > 1 and text[0] in "'\"" and text[-1] == text[0]:
+        return text[1:-1]
+    return text
+
+
+def parse_value(text):
+    if unquote(text) != text:
+        return unquote(text)
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_query(text):
+    # "streams > 1e9 and released_year between 2015 and 2020 and key in (C#, D)" -> list of Predicates
+    predicates = []
+    text = text.strip()
+    position = 0
+    while position < len(text):
+        for clause in CLAUSES:
+            match = clause.match(text, position)
+            if match:
+                break
+        else:
+            raise ValueError(f"Cannot parse query at {text[position:position + 30]!r}")
+        fields = match.groupdict()
+        column = fields['column']
+        if fields.get('low') is not None:
+            predicates.append(Predicate(column, 'between', (parse_value(fields['low']), parse_value(fields['high']))))
+        elif fields.get('values') is not None:
+            values = tuple(parse_value(value.strip()) for value in fields['values'].split(',') if value.strip())
+            predicates.append(Predicate(column, 'in', values))
+        elif fields.get('op') is not None:
+            predicates.append(Predicate(column, '==' if fields['op'] == '=' else fields['op'],
+                                        parse_value(fields['value'])))
+        else:
+            predicates.append(Predicate(column, 'contains', unquote(fields['value'])))
+
+        position = match.end()
+        if position < len(text):
+            separator = AND.match(text, position)
+            if not separator:
+                raise ValueError(f"Expected 'and' at {text[position:position + 30]!r}")
+            position = separator.end()
+    return predicates
+
+
+class QueryEngine:
+    # Evaluates conjunctions of predicates over a dataset. Each predicate's mask is cached as a packed
+    # bitset keyed by (dataset version, predicate), so refining a query only evaluates the new predicate
+    # and the rest is a bitwise AND over n/8 bytes. The least recently used bitsets are dropped past
+    # cache_size; the lock lets the query service's worker threads share one engine.
+    def __init__(self, data, search_index=None, cache_size=BITSET_CACHE_SIZE):
+        self.version = 0
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.bitsets = OrderedDict()
+        self.search_index = search_index
+        self.set_data(data)
+
+    def set_data(self, data):
+        # Masks computed for an older version of the dataset are never reused
+        with self.lock:
+            self.data = data
+            self.version += 1
+            self.bitsets = OrderedDict()
+
+    def bitset(self, predicate):
+        key = (self.version, predicate)
+        with self.lock:
+            if key in self.bitsets:
+                self.bitsets.move_to_end(key)
+                return self.bitsets[key]
+        bitset = np.packbits(self.compute(predicate))
+        with self.lock:
+            if key[0] == self.version:
+                self.bitsets[key] = bitset
+                while len(self.bitsets) > self.cache_size:
+                    self.bitsets.popitem(last=False)
+        return bitset
+
+    def mask(self, predicate):
+        return np.unpackbits(self.bitset(predicate), count=len(self.data)).astype(bool)
+
+    def compute(self, predicate):
+        column, op, value = predicate
+        if column not in self.data.columns:
+            raise ValueError(f"Unknown column {column!r}")
+        values = self.data[column]
+
+        if op == 'contains':
+            # Text columns are answered from the trigram index when it covers this dataset
+            if (self.search_index is not None and self.search_index.data is self.data and value
+                    and (pd.api.types.is_string_dtype(values.dtype)
+                         or isinstance(values.dtype, pd.CategoricalDtype)
+                         and pd.api.types.is_string_dtype(values.cat.categories.dtype))):
+                mask = np.zeros(len(self.data), dtype=bool)
+                mask[self.search_index.search(column, value)] = True
+                return mask
+            return values.astype('string').str.contains(value, case=False, regex=False).to_numpy(dtype=bool,
+                                                                                                na_value=False)
+        if op == 'in':
+            return values.isin(value).to_numpy(dtype=bool)
+
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            # Missing values become NaN, which fails every comparison
+            values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            bounds = value if op == 'between' else (value,)
+            if not all(isinstance(bound, (int, float)) for bound in bounds):
+                raise ValueError(f"{column} is numeric, got {value!r}")
+        else:
+            if op != '==' and op != '!=':
+                raise ValueError(f"{column} is not numeric; use =, !=, in or contains")
+            # Missing values match neither = nor !=
+            mask = values.isin([value]).to_numpy(dtype=bool)
+            return mask if op == '==' else ~mask & values.notna().to_numpy(dtype=bool)
+
+        with np.errstate(invalid='ignore'):
+            if op == 'between':
+                low, high = value
+                mask = (values >= low) & (values <= high)
+            elif op == '>':
+                mask = values > value
+            elif op == '>=':
+                mask = values >= value
+            elif op == '<':
+                mask = values < value
+            elif op == '<=':
+                mask = values <= value
+            elif op == '==':
+                mask = values == value
+            elif op == '!=':
+                mask = (values != value) & ~np.isnan(values)
+            else:
+                raise ValueError(f"Unknown operator {op!r}, expected one of {OPERATORS}")
+        return np.asarray(mask, dtype=bool)
+
+    def positions(self, predicates):
+        # Row positions matching every predicate, in dataset order
+        if not predicates:
+            return np.arange(len(self.data))
+        combined = self.bitset(predicates[0])
+        for predicate in predicates[1:]:
+            combined = combined & self.bitset(predicate)
+        return np.flatnonzero(np.unpackbits(combined, count=len(self.data)))
+
+    def search(self, text):
+        return self.positions(parse_query(text))
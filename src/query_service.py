@@ -0,0 +1,334 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+import pandas as pd
+from aggregate_cube import AggregateCube, CUBE_DIMENSIONS, TRACK_TYPES, track_type
+from artist_index import ArtistIndex, WEIGHTINGS
+from data_loader import load_spotify_songs
+from query_engine import QueryEngine
+from search_index import SearchIndex
+
+HOST = '127.0.0.1'
+PORT = 8765
+# Encoded responses kept for repeated queries, bounded by their total size. A response larger than
+# CACHE_ENTRY_BYTES (e.g. thousands of filtered records) is not cached, so it cannot evict many small ones.
+CACHE_BYTES = 64 * 1024 * 1024
+CACHE_ENTRY_BYTES = 4 * 1024 * 1024
+# Rows returned by /filter unless limit asks for more, and the most it may ask for
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+# The explorer's filter options: a substring match on one of these columns, an exact artist, or a typed query
+FILTER_COLUMNS = ["artist(s)_name", "track_name", "released_year", "streams"]
+ARTIST_FILTER = "artist (exact)"
+QUERY_FILTER = "query"
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def to_json(value):
+    # numpy scalars and pandas missing values in records and aggregates
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode(result):
+    return json.dumps(result, default=to_json, allow_nan=False).encode('utf-8')
+
+
+class QueryService:
+    # Serves filters, classification and the grouped chart aggregates of one in-memory dataset over HTTP/JSON.
+    # Queries run on a thread pool so the event loop keeps answering while a slow one is computed.
+    # Identical queries arriving while one is computed share its result, and encoded results are cached.
+    def __init__(self, spotify_songs, aggregate_cube=None, artist_index=None, workers=None, cache_bytes=CACHE_BYTES):
+        self.spotify_songs = spotify_songs
+        if aggregate_cube is None:
+            aggregate_cube = AggregateCube(spotify_songs)
+        if artist_index is None:
+            artist_index = ArtistIndex(spotify_songs['artist(s)_name'], spotify_songs['artist_count'])
+        self.aggregate_cube = aggregate_cube
+        self.artist_index = artist_index
+        self.search_index = SearchIndex(spotify_songs)
+        self.search_index.build(FILTER_COLUMNS)
+        self.query_engine = QueryEngine(spotify_songs, self.search_index)
+        self.track_types = track_type(spotify_songs['artist_count'])
+        self.executor = ThreadPoolExecutor(workers)
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.stats = {'requests': 0, 'cache_hits': 0, 'shared': 0, 'computed': 0}
+        self.routes = {
+            '/health': self.health,
+            '/filter': self.filter,
+            '/classify': self.classify,
+            '/aggregate': self.aggregate,
+            '/top_artists': self.top_artists,
+        }
+
+    async def query(self, path, params):
+        # Returns (status, encoded body)
+        self.stats['requests'] += 1
+        route = self.routes.get(path)
+        if route is None:
+            return 404, encode({'error': f"Unknown path {path}"})
+        if route == self.health:
+            return 200, encode(self.health(params))
+
+        key = (path, tuple(sorted(params.items())))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return self.cache[key]
+        if key in self.in_flight:
+            self.stats['shared'] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        self.stats['computed'] += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, self.respond, route, params)
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark it retrieved so a query nobody else was waiting for does not log an unretrieved exception
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if result[0] == 200 and len(result[1]) <= min(CACHE_ENTRY_BYTES, self.cache_bytes):
+                self.cache[key] = result
+                self.cached_bytes += len(result[1])
+                while self.cached_bytes > self.cache_bytes:
+                    self.cached_bytes -= len(self.cache.popitem(last=False)[1][1])
+            return result
+        finally:
+            del self.in_flight[key]
+
+    def respond(self, route, params):
+        # Runs on a worker thread
+        try:
+            return 200, encode(route(params))
+        except RequestError as e:
+            return e.status, encode({'error': str(e)})
+        except (ValueError, KeyError) as e:
+            return 400, encode({'error': str(e)})
+
+    def health(self, params):
+        return {'rows': len(self.spotify_songs), **self.stats}
+
+    def filter(self, params):
+        # apply_filter semantics: column is one of FILTER_COLUMNS, ARTIST_FILTER or QUERY_FILTER
+        column = params.get('column', FILTER_COLUMNS[0])
+        text = params.get('text', '')
+        if column == ARTIST_FILTER:
+            positions = self.artist_index.tracks(text)
+        elif column == QUERY_FILTER:
+            positions = self.query_engine.search(text)
+        elif column in FILTER_COLUMNS:
+            positions = self.search_index.search(column, text)
+        else:
+            raise RequestError(400, f"Cannot filter by {column!r}")
+        offset = max(int(params.get('offset', 0)), 0)
+        limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 0), MAX_LIMIT)
+        page = np.asarray(positions)[offset:offset + limit]
+        records = self.spotify_songs.iloc[page]
+        if params.get('classify') == '1':
+            records = records.assign(is_collaborative=np.asarray(self.track_types)[page])
+        records = records.astype(object).where(records.notna(), None)
+        return {'rows': len(positions), 'offset': offset, 'positions': page.tolist(),
+                'records': records.to_dict('records')}
+
+    def classify(self, params):
+        counts = pd.Series(self.track_types).value_counts().reindex(TRACK_TYPES, fill_value=0)
+        streams = self.aggregate_cube.rollup(['is_collaborative'])['streams_sum'].reindex(TRACK_TYPES, fill_value=0)
+        return {'tracks': counts.to_dict(), 'streams': streams.to_dict()}
+
+    def aggregate(self, params):
+        # The cube behind the grouped charts: by=released_year,key and optional dimension filters, e.g. mode=Major
+        dims = [dim for dim in params.get('by', 'released_year').split(',') if dim]
+        unknown = [dim for dim in dims if dim not in CUBE_DIMENSIONS]
+        if unknown or not dims:
+            raise RequestError(400, f"by must list dimensions from {', '.join(CUBE_DIMENSIONS)}")
+        where = {}
+        for dim in CUBE_DIMENSIONS:
+            if dim in params:
+                column = self.aggregate_cube.cells[dim]
+                values = params[dim].split(',')
+                where[dim] = values if not pd.api.types.is_numeric_dtype(column) else [float(v) for v in values]
+        totals = self.aggregate_cube.rollup(dims, where).reset_index()
+        totals = totals.replace([np.inf, -np.inf], np.nan).astype(object)
+        return {'by': dims, 'rows': totals.where(totals.notna(), None).to_dict('records')}
+
+    def top_artists(self, params):
+        n = min(max(int(params.get('n', 10)), 1), MAX_LIMIT)
+        weighting = params.get('weighting', 'full')
+        if weighting not in WEIGHTINGS:
+            raise RequestError(400, f"weighting must be one of {', '.join(WEIGHTINGS)}")
+        top = self.artist_index.top(self.spotify_songs['streams'], n, weighting)
+        return {'weighting': weighting, 'artists': [{'artist': artist, 'streams': streams}
+                                                     for artist, streams in top.items()]}
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 GET requests with keep-alive; the query string holds the parameters
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                # A request body is not used, but it has to be consumed to keep the connection in step
+                await reader.readexactly(int(headers.get('content-length', 0)))
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body = 400, encode({'error': "Malformed request line"})
+                elif parts[0] != 'GET':
+                    status, body = 405, encode({'error': "Only GET is supported"})
+                else:
+                    url = urlsplit(parts[1])
+                    try:
+                        status, body = await self.query(url.path, dict(parse_qsl(url.query)))
+                    except Exception as e:
+                        status, body = 500, encode({'error': f"An error occurred while answering the query: {e}"})
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT, on_ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        if on_ready is not None:
+            on_ready(server)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+async def fetch(reader, writer, target):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {HOST}\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def load_test(targets, host=HOST, port=PORT, concurrency=50, requests=2000):
+    # concurrency keep-alive clients send requests round-robin over targets; returns throughput and latency
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                start = time.perf_counter()
+                status, _ = await fetch(reader, writer, targets[i % len(targets)])
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+    latencies = np.sort(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': seconds,
+        'requests_per_second': len(latencies) / seconds,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+    }
+
+
+DEFAULT_TARGETS = [
+    '/filter?column=track_name&text=love',
+    '/filter?column=artist%20(exact)&text=Taylor%20Swift',
+    '/filter?column=query&text=streams%20%3E%201e9%20and%20released_year%20between%202015%20and%202020',
+    '/aggregate?by=released_year',
+    '/aggregate?by=key,mode',
+    '/classify',
+    '/top_artists?n=10',
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve filters, classification and chart aggregates of one dataset "
+                                                 "over a local HTTP/JSON API, or load-test a running service.")
+    parser.add_argument('--data', default='data/Popular_Spotify_Songs.csv', help="CSV file to load")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None, help="Threads that compute queries")
+    parser.add_argument('--load-test', action='store_true', help="Send requests to a running service and report "
+                                                                 "throughput instead of serving")
+    parser.add_argument('--concurrency', type=int, default=50, help="Concurrent clients for --load-test")
+    parser.add_argument('--requests', type=int, default=2000, help="Total requests for --load-test")
+    parser.add_argument('--target', action='append', dest='targets',
+                        help="Path and query string to request (repeatable) for --load-test")
+    args = parser.parse_args(argv)
+
+    if args.load_test:
+        result = asyncio.run(load_test(args.targets or DEFAULT_TARGETS, args.host, args.port, args.concurrency,
+                                       args.requests))
+        print(f"{result['requests']} requests ({result['errors']} errors) in {result['seconds']:.2f}s: "
+              f"{result['requests_per_second']:.0f} requests/s, p50 {result['p50_ms']:.1f} ms, "
+              f"p99 {result['p99_ms']:.1f} ms")
+        return 1 if result['errors'] else 0
+
+    spotify_songs, loader = load_spotify_songs(args.data)
+    if loader.issues:
+        print(f"{len(loader.issues)} malformed values were set to missing:\n{loader.summary()}")
+    service = QueryService(spotify_songs, workers=args.workers)
+    try:
+        asyncio.run(service.serve(args.host, args.port, lambda server: print(
+            f"Serving {len(spotify_songs)} rows on http://{args.host}:{args.port}")))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    # Same copy-on-write semantics as the application
+    pd.set_option('mode.copy_on_write', True)
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import copy
+import numpy as np
+import pandas as pd
+
+# Above this many matching distinct values, building a row mask is cheaper than gathering row lists
+GATHER_LIMIT = 1024
+
+
+def trigram_keys(codepoints):
+    # Pack three consecutive code points (< 2**21 each) into one integer key
+    codepoints = codepoints.astype(np.uint64)
+    return (codepoints[:-2] << np.uint64(42)) | (codepoints[1:-1] << np.uint64(21)) | codepoints[2:]
+
+
+def to_codepoints(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+def value_trigrams(values, first_id=0):
+    # Key and value id of every trigram occurrence in values, with the values numbered from first_id
+    codepoints = to_codepoints("\0".join(values.tolist()) + "\0")
+    lengths = np.fromiter((len(value) + 1 for value in values), dtype=np.int64, count=len(values))
+    value_ids = np.repeat(np.arange(first_id, first_id + len(values), dtype=np.int32), lengths)
+
+    keys = trigram_keys(codepoints) if len(codepoints) > 2 else np.empty(0, dtype=np.uint64)
+    # A trigram is valid when it does not run into the separator after its value
+    valid = (value_ids[:-2] == value_ids[2:]) & (codepoints[2:] != 0)
+    return keys[valid], value_ids[:-2][valid]
+
+
+def group_postings(codes, ids, groups):
+    # ids grouped by trigram code without repeats, and the count of each of the groups. Value ids are already
+    # ascending, so each posting list comes out sorted.
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    ids = ids[order]
+    distinct = np.ones(len(ids), dtype=bool)
+    distinct[1:] = (codes[1:] != codes[:-1]) | (ids[1:] != ids[:-1])
+    return ids[distinct], np.bincount(codes[distinct], minlength=groups)
+
+
+def merge_groups(offsets, items, added, counts):
+    # CSR groups (group g owns items[offsets[g]:offsets[g + 1]]) with added, grouped the same way with counts
+    # items per group, inserted at the end of each group. counts may cover more groups than offsets.
+    old_counts = np.zeros(len(counts), dtype=np.int64)
+    old_counts[:len(offsets) - 1] = np.diff(offsets)
+    ends = np.full(len(counts), offsets[-1])
+    ends[:len(offsets) - 1] = offsets[1:]
+    merged = np.insert(items, np.repeat(ends, counts), added)
+    return merged, np.concatenate(([0], np.cumsum(old_counts + counts)))
+
+
+class TrigramIndex:
+    # Lowercase trigram index over the distinct stringified values of one column.
+    # Posting lists are stored CSR-style: trigram code c owns postings[offsets[c]:offsets[c + 1]].
+    def __init__(self, column):
+        codes, uniques = pd.factorize(column)
+        self.values = np.array([value.lower() for value in pd.Index(uniques).astype(str)], dtype=object)
+        self.codes = codes.astype(np.int32)
+        # Distinct value -> value id, built when the index is first extended
+        self.uniques = uniques
+        self.lookup = None
+
+        # Rows grouped by distinct value, so a few matching values can be gathered without a full scan
+        self.row_order = np.argsort(self.codes, kind='stable')
+        counts = np.bincount(self.codes[self.codes >= 0], minlength=len(self.values))
+        self.row_offsets = np.concatenate(([0], np.cumsum(counts))) + np.count_nonzero(self.codes < 0)
+
+        self.build_postings()
+
+    def build_postings(self):
+        keys, ids = value_trigrams(self.values)
+        # Dense trigram codes keep the sort small: a stable radix sort when they fit in 16 bits
+        codes, grams = pd.factorize(keys)
+        codes = codes.astype(np.uint16 if len(grams) <= 2 ** 16 else np.int32)
+        self.grams = dict(zip(grams.tolist(), range(len(grams))))
+        self.postings, counts = group_postings(codes, ids, len(grams))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def extended(self, column):
+        # A new index that also covers rows appended after the existing ones. Only the appended values are
+        # factorized and only values not seen before are split into trigrams; their postings and rows are
+        # merged onto the end of the existing lists. This index is left untouched for readers on other threads.
+        # The new index gets its own lookup, so a filter still running on this one never sees it change
+        if self.lookup is None:
+            lookup = {value: value_id for value_id, value in enumerate(pd.Index(self.uniques).tolist())}
+        else:
+            lookup = dict(self.lookup)
+        codes, uniques = pd.factorize(column)
+        # Appended codes onto this index's value ids, giving unseen values the next free ids
+        mapping = np.full(len(uniques) + 1, -1, dtype=np.int32)
+        new_values = []
+        for added_id, value in enumerate(pd.Index(uniques).tolist()):
+            value_id = lookup.get(value)
+            if value_id is None:
+                value_id = len(self.values) + len(new_values)
+                lookup[value] = value_id
+                new_values.append(str(value).lower())
+            mapping[added_id] = value_id
+        new_values = np.array(new_values, dtype=object)
+
+        index = copy.copy(self)
+        index.lookup = lookup
+        index.uniques = None
+        index.values = np.concatenate([self.values, new_values])
+        added_codes = mapping[codes]
+        index.codes = np.concatenate([self.codes, added_codes])
+
+        # Row groups with the missing rows as group 0
+        groups = added_codes + 1
+        index.row_order, offsets = merge_groups(np.concatenate(([0], self.row_offsets)), self.row_order,
+                                                np.argsort(groups, kind='stable') + len(self.codes),
+                                                np.bincount(groups, minlength=len(index.values) + 1))
+        index.row_offsets = offsets[1:]
+
+        keys, ids = value_trigrams(new_values, len(self.values))
+        index.grams = dict(self.grams)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        key_codes = np.array([index.grams.setdefault(key, len(index.grams)) for key in unique_keys.tolist()],
+                             dtype=np.int32)
+        postings, counts = group_postings(key_codes[inverse], ids, len(index.grams))
+        index.postings, index.offsets = merge_groups(self.offsets, self.postings, postings, counts)
+        return index
+
+    def posting(self, key):
+        code = self.grams.get(int(key))
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.offsets[code]:self.offsets[code + 1]]
+
+    def matching_values(self, text):
+        text = text.lower()
+        if len(text) < 3:
+            # Too short for a trigram; scan the distinct values, which is still far less than the rows
+            return np.flatnonzero(pd.Series(self.values).str.contains(text, regex=False).to_numpy())
+
+        # Intersect posting lists, smallest first, to narrow the candidates before verifying
+        lists = sorted((self.posting(key) for key in np.unique(trigram_keys(to_codepoints(text)))), key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(text) == 3:
+            return candidates
+        return np.array([i for i in candidates.tolist() if text in self.values[i]], dtype=np.int32)
+
+    def search(self, text):
+        # Row positions whose value contains text (case-insensitive), in row order
+        matches = self.matching_values(text)
+        if len(matches) > GATHER_LIMIT:
+            hit = np.zeros(len(self.values) + 1, dtype=bool)
+            hit[matches] = True
+            return np.flatnonzero(hit[self.codes])
+        if not len(matches):
+            return np.empty(0, dtype=np.intp)
+        rows = np.concatenate([self.row_order[self.row_offsets[i]:self.row_offsets[i + 1]] for i in matches])
+        return np.sort(rows)
+
+
+class SearchIndex:
+    # Per-column trigram indexes over a dataset, built on first use or warmed up front
+    def __init__(self, data):
+        self.data = data
+        self.indexes = {}
+
+    def index(self, column):
+        if column not in self.indexes:
+            self.indexes[column] = TrigramIndex(self.data[column])
+        return self.indexes[column]
+
+    def build(self, columns):
+        for column in columns:
+            self.index(column)
+
+    def extended(self, data):
+        # data is this dataset with rows appended; built columns are extended, the others are built on use
+        index = SearchIndex(data)
+        index.indexes = {column: trigram.extended(data[column].iloc[len(trigram.codes):])
+                         for column, trigram in list(self.indexes.items())}
+        return index
+
+    def search(self, column, text):
+        if not text:
+            return np.arange(len(self.data))
+        return self.index(column).search(text)
@@ -0,0 +1,165 @@
+import os
+import numpy as np
+import pandas as pd
+
+FEATURE_COLUMNS = ['bpm', 'danceability_%', 'valence_%', 'energy_%', 'acousticness_%', 'instrumentalness_%',
+                   'liveness_%', 'speechiness_%']
+# Distances computed per block (queries x rows), so a block's distance matrix stays within 8 MB
+# however many tracks are queried at once
+BLOCK_DISTANCES = 2 ** 21
+# Rows per block for a single query
+BLOCK_ROWS = 65536
+
+
+def source_key(file_path, rows):
+    # A persisted index is reused only while the data file and the indexed row count are unchanged
+    stat = os.stat(file_path)
+    return np.array([stat.st_size, stat.st_mtime_ns, rows], dtype=np.int64)
+
+
+def cache_path(file_path):
+    return os.path.splitext(file_path)[0] + '.similarity.npz'
+
+
+class SimilarityIndex:
+    # Standardized float32 audio feature matrix with blocked brute-force k-nearest-neighbour search.
+    # Each feature is centred and scaled to unit variance; a missing value is set to the mean (zero).
+    # Squared distances are expanded as |x|^2 - 2 x.q + |q|^2, so every block is one matrix product.
+    def __init__(self, data=None, features=None, mean=None, scale=None):
+        if features is None:
+            values = self.raw_features(data)
+            mean = np.nanmean(values, axis=0)
+            scale = np.nanstd(values, axis=0)
+            mean = np.where(np.isnan(mean), 0.0, mean).astype(np.float32)
+            scale = np.where(np.isnan(scale) | (scale == 0), 1.0, scale).astype(np.float32)
+            features = self.standardize(values, mean, scale)
+        self.features = features
+        self.mean = mean
+        self.scale = scale
+        self.norms = np.einsum('ij,ij->i', features, features)
+
+    @staticmethod
+    def raw_features(data):
+        return np.column_stack([data[col].astype('Float32').to_numpy(dtype=np.float32, na_value=np.nan)
+                                for col in FEATURE_COLUMNS])
+
+    @staticmethod
+    def standardize(values, mean, scale):
+        features = (values - mean) / scale
+        return np.nan_to_num(features, nan=0.0).astype(np.float32)
+
+    def __len__(self):
+        return len(self.features)
+
+    def extended(self, data):
+        # A new index that also covers rows appended after the existing ones, scaled like them
+        added = self.standardize(self.raw_features(data), self.mean, self.scale)
+        return SimilarityIndex(features=np.concatenate([self.features, added]), mean=self.mean, scale=self.scale)
+
+    def nearest(self, queries, k=10, block_rows=None):
+        # queries: (m, features) standardized vectors. Returns (m, k) row positions and distances, nearest first.
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self.features))
+        if block_rows is None:
+            block_rows = max(min(BLOCK_ROWS, BLOCK_DISTANCES // max(len(queries), 1)), k)
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        best_positions = np.empty((len(queries), 0), dtype=np.int64)
+        best_distances = np.empty((len(queries), 0), dtype=np.float32)
+        bounds = None
+        for start in range(0, len(self.features), block_rows):
+            block = self.features[start:start + block_rows]
+            # In place: the temporaries of the plain expression cost more than the product itself
+            distances = queries @ block.T
+            distances *= -2
+            distances += self.norms[start:start + block_rows]
+            distances += query_norms[:, None]
+            if bounds is not None:
+                # Only a distance below a query's current k-th best can enter its k best. Once the first block
+                # has set those bounds, a comparison discards nearly every entry without partitioning the block.
+                rows, cols = np.divmod(np.flatnonzero(distances < bounds[:, None]), distances.shape[1])
+                if len(rows):
+                    # Merged only for the queries that have candidates
+                    hit, hit_rows = np.unique(rows, return_inverse=True)
+                    best_positions[hit], best_distances[hit] = self.merge_candidates(
+                        best_positions[hit], best_distances[hit], hit_rows, cols + start, distances[rows, cols])
+                    bounds[hit] = best_distances[hit].max(axis=1)
+                continue
+            # Keep the k best of this block, then merge them with the k best so far
+            if distances.shape[1] > k:
+                keep = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                distances = np.take_along_axis(distances, keep, axis=1)
+            else:
+                keep = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+            best_positions = np.concatenate([best_positions, keep + start], axis=1)
+            best_distances = np.concatenate([best_distances, distances], axis=1)
+            if best_distances.shape[1] > k:
+                keep = np.argpartition(best_distances, k - 1, axis=1)[:, :k]
+                best_positions = np.take_along_axis(best_positions, keep, axis=1)
+                best_distances = np.take_along_axis(best_distances, keep, axis=1)
+            if best_distances.shape[1] == k:
+                bounds = best_distances.max(axis=1)
+        order = np.argsort(best_distances, axis=1, kind='stable')
+        distances = np.sqrt(np.maximum(np.take_along_axis(best_distances, order, axis=1), 0))
+        return np.take_along_axis(best_positions, order, axis=1), distances
+
+    @staticmethod
+    def merge_candidates(best_positions, best_distances, rows, positions, distances):
+        # The k best per query of its current k best plus the candidates (query row, position, distance)
+        m, k = best_distances.shape
+        queries = np.concatenate([np.repeat(np.arange(m), k), rows])
+        order = np.lexsort((np.concatenate([best_distances.ravel(), distances]), queries))
+        # Every query has at least its k current entries, so its first k after sorting are its new k best
+        queries = queries[order]
+        keep = order[np.arange(len(order)) - np.searchsorted(queries, queries) < k]
+        return (np.concatenate([best_positions.ravel(), positions])[keep].reshape(m, k),
+                np.concatenate([best_distances.ravel(), distances])[keep].reshape(m, k))
+
+    def query(self, positions, k=10):
+        # k nearest tracks to each track at positions, excluding the track itself
+        positions = np.asarray(positions, dtype=np.int64)
+        k = min(k, len(self.features) - 1)
+        neighbours, distances = self.nearest(self.features[positions], k + 1)
+        # Duplicates of a track are at distance zero too, so drop the track by position rather than by rank
+        keep = neighbours != positions[:, None]
+        rows = [(n[m][:k], d[m][:k]) for n, d, m in zip(neighbours, distances, keep)]
+        return np.array([n for n, _ in rows]), np.array([d for _, d in rows])
+
+    def similar(self, positions, k=10):
+        # k tracks nearest to any track of a playlist, nearest first; the playlist's own tracks are left out
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        neighbours, distances = self.nearest(self.features[positions], k + len(positions))
+        candidates = pd.DataFrame({'position': neighbours.ravel(), 'distance': distances.ravel()})
+        candidates = candidates[~candidates['position'].isin(positions)]
+        closest = candidates.groupby('position')['distance'].min().sort_values(kind='stable')
+        return closest.index.to_numpy()[:k], closest.to_numpy()[:k]
+
+    def save(self, path, key):
+        with open(path, 'wb') as f:
+            np.savez(f, features=self.features, mean=self.mean, scale=self.scale, key=key)
+
+    @classmethod
+    def load(cls, path, key):
+        # None when there is no persisted index for this key
+        try:
+            with np.load(path) as saved:
+                if not np.array_equal(saved['key'], key):
+                    return None
+                return cls(features=saved['features'], mean=saved['mean'], scale=saved['scale'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def similarity_index(data, file_path=None):
+    # The persisted index for file_path when it is still current, otherwise a new one that is then persisted
+    if file_path is None:
+        return SimilarityIndex(data)
+    path = cache_path(file_path)
+    key = source_key(file_path, len(data))
+    index = SimilarityIndex.load(path, key)
+    if index is None:
+        index = SimilarityIndex(data)
+        try:
+            index.save(path, key)
+        except OSError:
+            pass
+    return index
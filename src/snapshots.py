@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+from data_loader import load_spotify_songs
+from dataset import COMPACT_DTYPES, compact_numeric
+
+TRACK_KEY = ['track_name', 'artist(s)_name']
+# Per-snapshot measures kept as fact arrays; the other columns describe the track
+SNAPSHOT_MEASURES = ['streams', 'in_spotify_playlists', 'in_apple_playlists', 'in_deezer_playlists']
+# 2024-01-07 or 20240107 anywhere in the file name
+DATE_PATTERN = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+
+
+def snapshot_date(file_path):
+    # The date in the file name, otherwise the day the file was last modified
+    match = DATE_PATTERN.search(os.path.basename(file_path))
+    if match:
+        try:
+            return date(*(int(part) for part in match.groups()))
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(file_path)).date()
+
+
+def snapshot_files(directory):
+    files = [os.path.join(directory, name) for name in os.listdir(directory) if name.lower().endswith('.csv')]
+    return sorted(files, key=lambda path: (snapshot_date(path), path))
+
+
+def load_snapshot(file_path):
+    # Runs in a worker process; returns the parsed rows and the load issues, prefixed with the file name
+    data, loader = load_spotify_songs(file_path)
+    return data, [f"{os.path.basename(file_path)}: {issue}" for issue in loader.issues]
+
+
+class SnapshotSeries:
+    # A series of exports of the dataset taken on different dates, stored as one track dimension plus facts.
+    # tracks has one row per distinct (track_name, artist(s)_name) with its attributes from the latest snapshot
+    # that lists it. Fact i says track fact_tracks[i] had measures[m][i] in snapshot fact_snapshots[i];
+    # a track missing from a snapshot has no fact there. Facts are sorted by track and then snapshot, so the
+    # facts of one track in consecutive snapshots are consecutive rows and deltas never need a dense matrix.
+    def __init__(self, snapshots, frames, issues=None):
+        self.snapshots = np.array(snapshots, dtype='datetime64[D]')
+        self.issues = issues or []
+        rows = pd.concat(frames, ignore_index=True)
+        # Snapshots opened from a column store have categorical names, each over its own dictionary
+        rows[TRACK_KEY] = rows[TRACK_KEY].astype('string')
+        self.columns = list(rows.columns)
+        snapshot_ids = np.repeat(np.arange(len(frames), dtype=np.int16), [len(frame) for frame in frames])
+
+        # The latest snapshot's attributes win: number tracks by their last row
+        keys = rows.groupby(TRACK_KEY, dropna=False, sort=False).ngroup().to_numpy()
+        last = np.full(keys.max() + 1 if len(keys) else 0, -1, dtype=np.int64)
+        last[keys] = np.arange(len(keys))
+        self.tracks = rows.iloc[last].drop(columns=SNAPSHOT_MEASURES).reset_index(drop=True)
+        self.tracks['last_snapshot'] = self.snapshots[snapshot_ids[last]]
+
+        # A track listed twice in one snapshot has its measures summed into one fact
+        facts = pd.DataFrame({'track': keys, 'snapshot': snapshot_ids})
+        for measure in SNAPSHOT_MEASURES:
+            facts[measure] = rows[measure].astype('Float64')
+        facts = facts.groupby(['track', 'snapshot'], sort=True)[SNAPSHOT_MEASURES].sum(min_count=1)
+        self.fact_tracks = facts.index.get_level_values('track').to_numpy(dtype=np.int32)
+        self.fact_snapshots = facts.index.get_level_values('snapshot').to_numpy(dtype=np.int16)
+        self.measures = {measure: compact_numeric(facts[measure].reset_index(drop=True),
+                                                  COMPACT_DTYPES[measure]).values
+                         for measure in SNAPSHOT_MEASURES}
+
+    def __len__(self):
+        return len(self.fact_tracks)
+
+    def values(self, measure):
+        # The measure of every fact as int64, with missing values as 0, and the missing mask
+        values = pd.Series(self.measures[measure], copy=False)
+        return values.to_numpy(dtype=np.int64, na_value=0), values.isna().to_numpy()
+
+    def totals(self, measure):
+        values, missing = self.values(measure)
+        totals = np.bincount(self.fact_snapshots[~missing], weights=values[~missing], minlength=len(self.snapshots))
+        return pd.Series(totals, index=pd.DatetimeIndex(self.snapshots, name='snapshot'), name=measure)
+
+    def deltas(self, measure):
+        # Change of a track between consecutive snapshots, one row per track and later snapshot, for the tracks
+        # with a value in both; a diff over consecutive facts, so the result has at most one row per fact
+        values, missing = self.values(measure)
+        later = np.flatnonzero((self.fact_tracks[1:] == self.fact_tracks[:-1])
+                               & (self.fact_snapshots[1:] == self.fact_snapshots[:-1] + 1)
+                               & ~missing[1:] & ~missing[:-1]) + 1
+        return pd.DataFrame({'track': self.fact_tracks[later], 'snapshot': self.fact_snapshots[later],
+                             'change': values[later] - values[later - 1]})
+
+    def total_deltas(self, measure):
+        # Summed change between consecutive snapshots, indexed by the later snapshot. Only tracks listed in both
+        # count: a track entering or leaving the export would otherwise move the total by its whole cumulative count.
+        deltas = self.deltas(measure)
+        totals = np.bincount(deltas['snapshot'].to_numpy() - 1, weights=deltas['change'].to_numpy(),
+                             minlength=max(len(self.snapshots) - 1, 0))
+        return pd.Series(totals, index=pd.DatetimeIndex(self.snapshots[1:], name='snapshot'), name=measure)
+
+    def movers(self, measure, n=10):
+        # Tracks with the largest change from the previous snapshot to the latest one, largest first
+        deltas = self.deltas(measure)
+        deltas = deltas[deltas['snapshot'] == len(self.snapshots) - 1]
+        top = deltas.sort_values('change', ascending=False, kind='stable').head(n)
+        tracks = self.tracks.iloc[top['track']]
+        labels = (tracks['track_name'].astype(object).fillna('').to_numpy() + ' - '
+                  + tracks['artist(s)_name'].astype(object).fillna('').to_numpy())
+        return pd.Series(top['change'].to_numpy(), index=labels, name=measure)
+
+    def frame(self):
+        # Every fact as a row: the track's attributes, the snapshot date and the measures
+        rows = self.tracks.drop(columns='last_snapshot').iloc[self.fact_tracks].reset_index(drop=True)
+        rows['snapshot'] = self.snapshots[self.fact_snapshots]
+        for measure in SNAPSHOT_MEASURES:
+            rows[measure] = self.measures[measure]
+        return rows
+
+    def latest(self):
+        # The tracks of the latest snapshot in the layout of a single export, tagged with the snapshot date
+        latest = self.fact_snapshots == len(self.snapshots) - 1
+        rows = self.tracks.drop(columns='last_snapshot').iloc[self.fact_tracks[latest]].reset_index(drop=True)
+        for measure in SNAPSHOT_MEASURES:
+            # Missing values elsewhere in the series do not make this snapshot's column nullable
+            rows[measure] = compact_numeric(pd.Series(self.measures[measure][latest]), COMPACT_DTYPES[measure])
+        rows = rows[self.columns]
+        rows['snapshot'] = self.snapshots[-1]
+        return rows
+
+    def summary(self, limit=5):
+        lines = self.issues[:limit]
+        if len(self.issues) > limit:
+            lines.append(f"... and {len(self.issues) - limit} more")
+        return "\n".join(lines)
+
+
+def load_snapshots(directory, workers=None, on_progress=None):
+    # Parses every export in directory across a process pool. Workers are spawned rather than forked,
+    # since the app calls this from a thread of a process running Tk.
+    files = snapshot_files(directory)
+    if not files:
+        raise FileNotFoundError(f"No .csv snapshots in {directory}")
+    results = {}
+    if len(files) == 1 or workers == 1:
+        for done, file_path in enumerate(files, 1):
+            results[file_path] = load_snapshot(file_path)
+            if on_progress is not None:
+                on_progress(done / len(files))
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(min(workers or os.cpu_count() or 1, len(files)), mp_context=context) as pool:
+            futures = {pool.submit(load_snapshot, file_path): file_path for file_path in files}
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if on_progress is not None:
+                    on_progress(done / len(files))
+    return SnapshotSeries([snapshot_date(path) for path in files], [results[path][0] for path in files],
+                          [issue for path in files for issue in results[path][1]])
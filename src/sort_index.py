@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Sort orders (full-length permutations) kept for re-sorting filtered views
+ORDER_CACHE_SIZE = 8
+# Views smaller than this fraction of the rows are sorted directly rather than gathered from a full permutation
+GATHER_FRACTION = 1 / 16
+
+
+class SortIndex:
+    # Sort orders over a dataset for the table's sortable columns. Each column is factorized once into dense
+    # ranks (missing values rank last in either direction); a sort key list is a stable lexsort over those ranks.
+    # A filtered view is ordered by keeping the permutation entries that are in the view, which is one gather.
+    # The lock guards the cached orders, which the explorer's worker threads and extended() share.
+    def __init__(self, data, cache_size=ORDER_CACHE_SIZE):
+        self.data = data
+        self.ranks = {}
+        # Sorted distinct values of each ranked column, for placing appended values among them
+        self.uniques = {}
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.orders = OrderedDict()
+
+    def rank(self, column, ascending=True):
+        if column not in self.ranks:
+            codes, uniques = pd.factorize(self.data[column], sort=True)
+            codes = codes.astype(np.int32)
+            codes[codes < 0] = len(uniques)
+            # Set before the ranks, which extended() may be reading from another thread
+            self.uniques[column] = pd.Index(uniques)
+            self.ranks[column] = (codes, len(uniques))
+        codes, distinct = self.ranks[column]
+        if ascending:
+            return codes
+        return np.where(codes < distinct, distinct - 1 - codes, distinct).astype(np.int32)
+
+    def permutation(self, sort_keys):
+        # sort_keys: [(column, ascending), ...], most significant first
+        key = tuple(sort_keys)
+        with self.lock:
+            if key in self.orders:
+                self.orders.move_to_end(key)
+                return self.orders[key]
+        # lexsort takes the most significant key last
+        order = np.lexsort([self.rank(column, ascending) for column, ascending in reversed(sort_keys)])
+        with self.lock:
+            self.orders[key] = order
+            while len(self.orders) > self.cache_size:
+                self.orders.popitem(last=False)
+        return order
+
+    def order(self, sort_keys, positions=None):
+        # Row positions (all rows, or those in positions) sorted by sort_keys; ties keep row order
+        if positions is None:
+            return self.permutation(sort_keys)
+        positions = np.asarray(positions)
+        with self.lock:
+            cached = tuple(sort_keys) in self.orders
+        if not cached and len(positions) < len(self.data) * GATHER_FRACTION:
+            keys = [positions] + [self.rank(column, ascending)[positions] for column, ascending in reversed(sort_keys)]
+            return positions[np.lexsort(keys)]
+        permutation = self.permutation(sort_keys)
+        in_view = np.zeros(len(self.data), dtype=bool)
+        in_view[positions] = True
+        return permutation[in_view[permutation]]
+
+    def extended(self, data):
+        # A new index over data, this dataset with rows appended. Appended values are placed among the sorted
+        # distinct values, existing ranks are shifted past the new ones with one lookup per row, and the
+        # appended rows are inserted into each cached order, so only the appended rows are sorted.
+        index = SortIndex(data, self.cache_size)
+        rows = len(self.data)
+        for column, (codes, distinct) in list(self.ranks.items()):
+            added_codes, added = pd.factorize(data[column].iloc[rows:], sort=True)
+            uniques = self.uniques[column]
+            if uniques.dtype != added.dtype:
+                # e.g. names opened from a column store as categorical, with text appended: compared as values
+                uniques = uniques.astype(object)
+                added = pd.Index(added).astype(object)
+            positions = uniques.searchsorted(added)
+            found = positions < distinct
+            found[found] = uniques.take(positions[found]) == added[found]
+            inserted = positions[~found]
+            # Old rank r moves past every value inserted at or before it; missing values stay last
+            shift = np.arange(distinct + 1) + np.searchsorted(inserted, np.arange(distinct + 1), side='right')
+            shift[distinct] = distinct + len(inserted)
+            # The j-th inserted value lands at its position plus j
+            added_ranks = np.where(found, shift[np.minimum(positions, distinct)], positions + np.cumsum(~found) - 1)
+            added_ranks = np.append(added_ranks, shift[distinct])
+            index.ranks[column] = (np.concatenate([shift[codes], added_ranks[added_codes]]).astype(np.int32),
+                                   distinct + len(inserted))
+            order = np.empty(distinct + len(inserted), dtype=np.int64)
+            order[shift[:distinct]] = np.arange(distinct)
+            order[inserted + np.arange(len(inserted))] = distinct + np.arange(len(inserted))
+            index.uniques[column] = uniques.append(pd.Index(added[~found])).take(order)
+
+        with self.lock:
+            orders = list(self.orders.items())
+        for sort_keys, permutation in orders:
+            keys = index.combined_rank(sort_keys)
+            if keys is None:
+                continue
+            added_order = np.argsort(keys[rows:], kind='stable')
+            # Appended rows come after existing rows with equal keys, as in a stable sort
+            at = np.searchsorted(keys[permutation], keys[rows:][added_order], side='right')
+            index.orders[sort_keys] = np.insert(permutation, at, added_order + rows)
+        return index
+
+    def combined_rank(self, sort_keys):
+        # One int64 rank per row ordering like the sort keys, or None when the ranks do not fit
+        bases = [self.ranks[column][1] + 1 for column, _ in sort_keys]
+        if np.prod(bases, dtype=object) >= 2 ** 62:
+            return None
+        combined = np.zeros(len(self.data), dtype=np.int64)
+        for (column, ascending), base in zip(sort_keys, bases):
+            combined = combined * base + self.rank(column, ascending)
+        return combined
@@ -1,28 +1,60 @@
+import os
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import pandas as pd
-import chardet
+from aggregate_cube import AggregateCube
+from artist_index import ArtistIndex
+from charts import CHARTS, CHARTS_BY_NAME, SNAPSHOT_CHARTS, chart_args
+from column_store import ColumnStore
+from data_loader import load_spotify_songs
 from data_explorer import DataExplorer
-from visualization import Visualization
+from dataset import AppendBuffer
+from instrumentation import INSTRUMENTATION, describe
+from snapshots import load_snapshots
+from startup import StartupTimer
+from streaming import stream_spotify_songs
+from task_runner import TaskRunner
+
+# Files larger than this are streamed in chunks instead of being loaded whole
+STREAMING_THRESHOLD = 512 * 1024 * 1024
+# How often live refresh checks the data file for appended rows, in milliseconds
+WATCH_INTERVAL = 2000
+# Where the instrumentation shortcuts write the timeline and the profile
+TRACE_PATH = 'spotify_trace.json'
+PROFILE_PATH = 'spotify_profile.prof'
 
 
 class SpotifyApp:
-    def __init__(self, root):
+    def __init__(self, root, startup_timer=None, data_path='data/Popular_Spotify_Songs.csv'):
         try:
             self.root = root
             self.root.title("Spotify Songs Explorer")
+            self.root.protocol("WM_DELETE_WINDOW", self.close)
+            self.startup_timer = startup_timer or StartupTimer()
+            # Called once the data is shown; main.py uses it to write the startup report
+            self.on_ready = None
 
-            # Autodetect encoding
-            file_path = 'data/Popular_Spotify_Songs.csv'
-            with open(file_path, 'rb') as f:
-                result = chardet.detect(f.read())
-            encoding = result['encoding']
-
-            # Load the dataset
-            self.spotify_songs = pd.read_csv(file_path, encoding=encoding)
+            # Worker threads for loading, filtering, aggregation and chart preparation, with a progress indicator
+            self.task_runner = TaskRunner(self.root)
+            self.frame_status = ttk.Frame(self.root)
+            self.frame_status.grid(row=3, column=0, padx=10, pady=5, sticky="ew")
+            self.progress = ttk.Progressbar(self.frame_status, mode='indeterminate', length=150)
+            self.progress.grid(row=0, column=0, padx=5)
+            self.label_status = ttk.Label(self.frame_status, text="")
+            self.label_status.grid(row=0, column=1, padx=5, sticky="w")
+            self.task_runner.on_busy = self.set_busy
+            self.status_text = ""
+            self.loading = False
 
-            # Create DataExplorer
-            self.data_explorer = DataExplorer(self.root, self.spotify_songs)
+            # Live refresh: rows appended to the data file are parsed and added without reloading it
+            self.live_refresh = tk.BooleanVar(value=False)
+            self.check_live_refresh = ttk.Checkbutton(self.frame_status, text="Live refresh",
+                                                      variable=self.live_refresh, command=self.toggle_live_refresh,
+                                                      state='disabled')
+            self.check_live_refresh.grid(row=0, column=3, padx=5, sticky="e")
+            self.pending_watch = None
+            if INSTRUMENTATION.enabled:
+                self.setup_instrumentation()
 
             # Frame for visualization
             self.frame_visualization = ttk.LabelFrame(self.root, text="Data Visualization")
@@ -33,106 +65,305 @@ class SpotifyApp:
             self.frame_controls.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
 
             # Dropdown for visualization options
-            self.visualization_options = [
-                "Streams by Release Year",
-                "Top 10 Artists by Streams",
-                "Danceability vs. Energy",
-                "Songs Released by Month",
-                "Key vs. Streams",
-                "Valence vs. Streams",
-                "Mode vs. Streams",
-                "Danceability vs. BPM",
-                "Average BPM vs. Release Year",
-                "Pie Chart of All Keys",
-                "Collaborative vs. Solo Streams",
-                "Danceability vs. Streams",
-                "Acousticness vs. Streams",
-                "Instrumentalness vs. Streams",
-                "Liveness vs. Streams"
-            ]
+            self.visualization_options = [chart.name for chart in CHARTS]
             self.selected_option = tk.StringVar()
             self.selected_option.set(self.visualization_options[0])
             self.dropdown_visualization = ttk.OptionMenu(self.frame_controls, self.selected_option,
                                                          *self.visualization_options)
             self.dropdown_visualization.grid(row=0, column=0, padx=5, pady=5)
 
-            # Button to create visualization
+            # Button to create visualization, enabled once the data is loaded
             self.btn_create_viz = ttk.Button(self.frame_controls, text="Create Visualization",
-                                             command=self.create_visualization)
+                                             command=self.create_visualization, state='disabled')
             self.btn_create_viz.grid(row=0, column=1, padx=5, pady=5)
 
             # Label for conclusions
             self.label_conclusions = ttk.Label(self.frame_controls, text="", wraplength=500)
             self.label_conclusions.grid(row=0, column=2, padx=10, pady=5, sticky="w")
 
-            # Create Visualization instance
-            self.visualization = Visualization(self.frame_visualization)
-        except FileNotFoundError:
+            # matplotlib and the chart canvas are created when the first chart is requested
+            self.visualization = None
+            self.data_explorer = None
+            # Part of the rendered-chart cache key; bumped whenever the dataset behind the charts changes
+            self.data_version = 0
+            self.startup_timer.mark('controls')
+
+            # data_path is one export, or a directory of exports taken on different dates
+            self.start_loading(data_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"An unexpected error occurred: {e}")
+
+    def start_loading(self, file_path):
+        # Parsing, validation and indexing run on a worker thread while the window stays responsive
+        self.loading = True
+        self.load_progress = 0.0
+        self.loaded_rows = 0
+        self.progress.config(mode='determinate', maximum=1.0, value=0.0)
+        self.label_loading = ttk.Label(self.root, text="Loading data...")
+        self.label_loading.grid(row=0, column=0, padx=10, pady=10)
+        self.task_runner.submit('load', lambda: self.load_dataset(file_path), self.show_dataset,
+                                self.show_load_error)
+        self.update_load_progress()
+
+    def update_load_progress(self):
+        if not self.loading:
+            return
+        self.progress.config(value=self.load_progress)
+        text = f"Loading data... {self.load_progress:.0%}"
+        if self.loaded_rows:
+            text = f"Loading data... {self.loaded_rows:,} rows"
+        self.label_status.config(text=text)
+        self.root.after(50, self.update_load_progress)
+
+    def set_load_progress(self, fraction):
+        # Called from the loading thread; update_load_progress copies it to the widgets
+        self.load_progress = fraction
+
+    def set_loaded_rows(self, rows):
+        self.loaded_rows = rows
+
+    def load_dataset(self, file_path):
+        # Runs on a worker thread and touches no widgets
+        snapshots = None
+        if os.path.isdir(file_path):
+            # A directory of snapshots: the table and the single-export charts show the latest one
+            with INSTRUMENTATION.stage('load: snapshots') as stage:
+                snapshots = load_snapshots(file_path, on_progress=self.set_load_progress)
+                stage.rows = len(snapshots)
+            spotify_songs = snapshots.latest()
+            summary = None
+            # The series carries the load issues of every snapshot
+            loader = snapshots
+            with INSTRUMENTATION.stage('index: cube', rows=len(spotify_songs)):
+                aggregate_cube = AggregateCube(spotify_songs)
+        elif os.path.getsize(file_path) > STREAMING_THRESHOLD and not ColumnStore(file_path).current():
+            # Too large to hold in memory: the cube and artist totals cover every row,
+            # while the table and the row-level charts work on a bounded sample.
+            # The column store written on the way is memory-mapped by later starts instead of streaming again.
+            with INSTRUMENTATION.stage('load: stream') as stage:
+                summary, loader = stream_spotify_songs(file_path, on_progress=self.set_loaded_rows, cache=True)
+                stage.rows = summary.rows
+            spotify_songs = summary.sample.rows()
+            aggregate_cube = summary.cube
+        else:
+            summary = None
+            with INSTRUMENTATION.stage('load') as stage:
+                spotify_songs, loader = load_spotify_songs(file_path, self.set_load_progress)
+                stage.rows = len(spotify_songs)
+            # Grouped charts are answered from this cube instead of rescanning the rows
+            with INSTRUMENTATION.stage('index: cube', rows=len(spotify_songs)):
+                aggregate_cube = AggregateCube(spotify_songs)
+
+        # Per-artist totals and exact artist filters are lookups in this index
+        with INSTRUMENTATION.stage('index: artists', rows=len(spotify_songs)):
+            artist_index = ArtistIndex(spotify_songs['artist(s)_name'], spotify_songs['artist_count'])
+        return spotify_songs, loader, aggregate_cube, artist_index, summary, snapshots
+
+    def show_dataset(self, result):
+        self.spotify_songs, self.loader, self.aggregate_cube, self.artist_index, summary, self.snapshots = result
+        loader = self.loader
+        self.streaming = summary is not None
+        self.loading = False
+        self.startup_timer.mark('data')
+        self.progress.config(mode='indeterminate', value=0.0)
+        self.label_status.config(text=self.status_text)
+        self.label_loading.destroy()
+
+        # When streaming, the artist chart uses totals over every row rather than the sample
+        artist_totals = summary.top_artists if self.streaming else self.artist_index
+        self.chart_inputs = {'cube': self.aggregate_cube, 'artist_index': artist_totals, 'snapshots': self.snapshots}
+        if self.snapshots is not None:
+            menu = self.dropdown_visualization['menu']
+            for chart in SNAPSHOT_CHARTS:
+                menu.add_command(label=chart.name, command=tk._setit(self.selected_option, chart.name))
+
+        # Create DataExplorer
+        # A streamed file only has a sample in memory, so its similarity index is not persisted;
+        # neither is one built over the latest of several snapshots
+        data_path = None if self.streaming or self.snapshots is not None else loader.file_path
+        self.data_explorer = DataExplorer(self.root, self.spotify_songs, self.artist_index, self.task_runner,
+                                          data_path)
+        # Keep the chart frame stacked above the explorer's button row, as when it was created after it
+        self.frame_visualization.lift()
+        self.btn_create_viz.config(state='normal')
+        # Appended rows are read from where the load stopped; a streamed file only keeps a sample in memory
+        # and a snapshot directory gains new files rather than rows
+        if data_path is not None:
+            self.file_offset = loader.file_size
+            # Holds the rows with room to append to, created on the first refresh that finds new rows
+            self.append_buffer = None
+            self.check_live_refresh.config(state='normal')
+        if self.streaming:
+            self.status_text = (f"Streamed {summary.rows} rows; the table shows a sample of "
+                                f"{len(self.spotify_songs)}")
+            self.label_status.config(text=self.status_text)
+        if self.snapshots is not None:
+            self.status_text = (f"{len(self.snapshots.snapshots)} snapshots of {len(self.snapshots.tracks):,} tracks; "
+                                f"the table shows {self.snapshots.snapshots[-1]}")
+            self.label_status.config(text=self.status_text)
+        self.startup_timer.mark('interactive')
+
+        if loader.issues:
+            messagebox.showwarning("Data Warning",
+                                   f"{len(loader.issues)} malformed values were set to missing:\n{loader.summary()}")
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def show_load_error(self, e):
+        self.loading = False
+        self.label_status.config(text="")
+        self.label_loading.config(text="No data loaded")
+        if isinstance(e, FileNotFoundError):
             messagebox.showerror("Error", "The data file was not found.")
-        except pd.errors.ParserError:
+        elif isinstance(e, pd.errors.ParserError):
             messagebox.showerror("Error", "Error parsing the data file.")
-        except Exception as e:
+        else:
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
 
-    def create_visualization(self):
+    def toggle_live_refresh(self):
+        if self.live_refresh.get():
+            self.watch_file()
+        elif self.pending_watch is not None:
+            self.root.after_cancel(self.pending_watch)
+            self.pending_watch = None
+
+    def watch_file(self):
+        self.pending_watch = None
+        if not self.live_refresh.get():
+            return
+        try:
+            size = os.path.getsize(self.loader.file_path)
+        except OSError as e:
+            self.live_refresh.set(False)
+            messagebox.showerror("Error", f"An error occurred while watching the data file: {e}")
+            return
+        if size < self.file_offset:
+            self.live_refresh.set(False)
+            messagebox.showwarning("Live Refresh", "The data file was truncated or replaced; restart to reload it.")
+            return
+        if size > self.file_offset:
+            self.task_runner.submit('refresh', self.read_appended, self.show_appended, self.show_refresh_error)
+            return
+        self.pending_watch = self.root.after(WATCH_INTERVAL, self.watch_file)
+
+    def read_appended(self):
+        # Runs on a worker thread: parses only the bytes after the last read and extends the derived state,
+        # so the cost grows with the appended rows rather than with the whole file
+        spotify_songs = self.spotify_songs
+        issues = len(self.loader.issues)
+        with INSTRUMENTATION.stage('refresh: parse') as stage:
+            appended, offset = self.loader.read_appended(self.file_offset, len(spotify_songs))
+            stage.rows = 0 if appended is None else len(appended)
+        if appended is None:
+            return None, offset
+        with INSTRUMENTATION.stage('refresh: merge', rows=len(appended)):
+            # Only written by this task; a buffer that does not hold the current rows is started over
+            if self.append_buffer is None or self.append_buffer.data is not spotify_songs:
+                self.append_buffer = AppendBuffer(spotify_songs)
+            combined = self.append_buffer.append(appended)
+            aggregate_cube = AggregateCube.merge([self.aggregate_cube, AggregateCube(appended)])
+            artist_index = self.artist_index.extended(appended['artist(s)_name'], appended['artist_count'])
+        indexes = self.data_explorer.extended_indexes(combined)
+        return (spotify_songs, combined, aggregate_cube, artist_index, indexes, self.loader.issues[issues:]), offset
+
+    def show_appended(self, result):
+        appended, self.file_offset = result
+        if appended is not None:
+            previous, spotify_songs, self.aggregate_cube, self.artist_index, indexes, issues = appended
+            self.spotify_songs = spotify_songs
+            self.chart_inputs = {'cube': self.aggregate_cube, 'artist_index': self.artist_index, 'snapshots': None}
+            self.data_version += 1
+            self.data_explorer.append_rows(spotify_songs, self.artist_index, indexes)
+            rows = len(spotify_songs) - len(previous)
+            self.status_text = f"Appended {rows:,} rows ({len(spotify_songs):,} in total)"
+            self.label_status.config(text=self.status_text)
+            if issues:
+                messagebox.showwarning("Data Warning",
+                                       f"{len(issues)} malformed values were set to missing:\n"
+                                       + "\n".join(issues[:5]))
+        self.pending_watch = self.root.after(WATCH_INTERVAL, self.watch_file)
+
+    def show_refresh_error(self, e):
+        self.live_refresh.set(False)
+        messagebox.showerror("Error", f"An error occurred while reading appended rows: {e}")
+
+    def get_visualization(self):
+        if self.visualization is None:
+            # Imported on first use: matplotlib is the slowest import of the app
+            from visualization import Visualization
+            self.visualization = Visualization(self.frame_visualization)
+        return self.visualization
+
+    def set_busy(self, busy):
+        if self.loading:
+            # The progress bar shows how much of the file has been read
+            return
+        if busy:
+            self.progress.start(10)
+            self.label_status.config(text="Working...")
+        else:
+            self.progress.stop()
+            self.label_status.config(text=self.status_text)
+
+    def setup_instrumentation(self):
+        # Latency of the last instrumented operation next to the progress bar, plus two shortcuts:
+        # Ctrl+Shift+T writes the Chrome trace timeline, Ctrl+Shift+P profiles the next operation
+        self.label_latency = ttk.Label(self.frame_status, text="")
+        self.label_latency.grid(row=0, column=2, padx=5, sticky="e")
+        self.frame_status.columnconfigure(1, weight=1)
+        self.root.bind('<Control-T>', lambda event: self.export_trace())
+        self.root.bind('<Control-P>', lambda event: self.profile_next())
+        self.last_event = None
+        self.update_latency()
+
+    def update_latency(self):
+        # Stages finish on worker threads too, so the label is refreshed by polling from the Tk thread
+        event = INSTRUMENTATION.last
+        if event is not self.last_event:
+            self.last_event = event
+            self.label_latency.config(text=f"Last: {describe(event)}")
+        self.root.after(250, self.update_latency)
+
+    def export_trace(self):
+        try:
+            path = INSTRUMENTATION.export_chrome_trace(TRACE_PATH)
+            messagebox.showinfo("Trace", f"Wrote {len(INSTRUMENTATION.events)} events to {path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while exporting the trace: {e}")
+
+    def profile_next(self):
+        INSTRUMENTATION.profile_next(PROFILE_PATH)
+        self.status_text = f"The next operation will be profiled to {PROFILE_PATH}"
+        self.label_status.config(text=self.status_text)
+
+    def close(self):
+        self.task_runner.shutdown()
+        self.root.destroy()
+
+    def show_visualization(self, draw, *args, conclusion="", key=None):
+        # The figure is built on a worker thread; clicking again supersedes a chart still being prepared.
+        # A chart already rendered for this data version is redisplayed from its cached bitmap, and an
+        # older version of it is updated in place rather than rebuilt.
         selected_viz = self.selected_option.get()
-        if selected_viz == "Streams by Release Year":
-            self.visualization.plot_streams_by_year(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The graph clearly demonstrates the increasing trend of music streaming over the years, particularly in the last decade. The dominance of recent years highlights the impact of digital transformation in the music industry, with streaming platforms playing a pivotal role in how people consume music today.\nThe peak was in the 2022.")
-        elif selected_viz == "Top 10 Artists by Streams":
-            self.visualization.plot_top_artists_by_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion:The artists in the top 10 represent a variety of genres and styles, including pop (Taylor Swift, Ed Sheeran, Harry Styles), hip-hop (Eminem), Latin (Bad Bunny), and alternative/rock (Arctic Monkeys, Imagine Dragons). This diversity indicates that high streaming numbers are not limited to a single genre, reflecting varied musical tastes among listeners.\nArtists like Olivia Rodrigo and Bad Bunny, who have risen to fame more recently compared to some of the others, are also among the top 10. This suggests that newer artists can quickly amass a large number of streams and compete with long-established artists.")
-        elif selected_viz == "Danceability vs. Energy":
-            self.visualization.plot_danceability_vs_energy(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: Most of the points are concentrated in the range of 40 to 80 for both danceability and energy. This suggests that many popular songs tend to have moderate to high levels of both attributes, making them suitable for dancing and energetic activities.\nThere is no clear correlation between the two factors.")
-        elif selected_viz == "Songs Released by Month":
-            self.visualization.plot_songs_released_by_month(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The graph shows that most songs are coming out in January and in May. The least amount of songs are published in August. This may be a part of some marketing/pr tactics or strategies regarding publishing songs in music industry.")
-        elif selected_viz == "Key vs. Streams":
-            self.visualization.plot_key_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The graph illustrates that the key of C# is exceptionally popular, with significantly higher total streams compared to other keys. This trend suggests that songs in this key may have qualities that resonate particularly well with listeners. Other keys like D, E, F, G, and G# also show strong performance, while keys like D# and A are less popular. ")
-        elif selected_viz == "Valence vs. Streams":
-            self.visualization.plot_valence_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: TThere is no strong correlation between valence and the number of streams. Most songs, regardless of their valence, have streams clustered in the lower range (below 1 billion). A few outliers have much higher streams, but they do not show a clear pattern related to valence.\nHigh-stream songs (above 1 billion streams) are spread across different valence levels, further supporting the idea that musical positivity is not a key determinant of a song's popularity. ")
-        elif selected_viz == "Mode vs. Streams":
-            self.visualization.plot_mode_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: Despite the preference for Major mode songs, the presence of a considerable number of streams for Minor mode songs indicates that popular music maintains a balance of different emotional tones, catering to a wide range of listener moods and preferences.")
-        elif selected_viz == "Danceability vs. BPM":
-            self.visualization.plot_danceability_vs_bpm(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: There is a higher concentration of songs with BPM values between 80 and 140. This range is typical for many popular genres such as pop, rock, and electronic dance music, which tend to dominate streaming platforms.\nThere is no clear correlation between BPM and danceability. The points are widely scattered across the plot, indicating that a song can be highly danceable regardless of its BPM, and vice versa.")
-        elif selected_viz == "Average BPM vs. Release Year":
-            self.visualization.plot_avg_bpm_vs_release_year(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: There are noticeable peaks in average BPM during the early years (around the 1940s and 1950s) and in the 1980s. The peaks from 1980 and 2000 suggest periods when faster-tempo music was particularly popular. In the most recent years (2010s and 2020s), the average BPM appears to have stabilized at a lower range compared to earlier decades. This suggests a trend towards slower-tempo music in recent times.")
-        elif selected_viz == "Pie Chart of All Keys":
-            self.visualization.plot_pie_chart_of_keys(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The pie chart illustrates a relatively balanced distribution of songs across different keys, with C# being the most popular and D# - the least popular.")
-        elif selected_viz == "Collaborative vs. Solo Streams":
-            self.visualization.plot_collaborative_vs_solo(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The analysis shows, that the sum of total streams of Solo songs is more than 2 times greater than those which are collaborative. This may be also due to the dataset records as a whole.")
-        elif selected_viz == "Danceability vs. Streams":
-            self.visualization.plot_danceability_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The scatter plot shows a concentration of songs with mid to high danceability values having a wide range of streams, indicating that while danceability is a factor, it does not solely determine the popularity of a song. Most of the records tend to keep moderate danceability, between 40-90%.")
-        elif selected_viz == "Acousticness vs. Streams":
-            self.visualization.plot_acousticness_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The scatter plot indicates that in the dataset there is more records with low percentage (0-20%) of acousticnesss. There is no visible correlation between acousticness and streams, indicating that fully acoustic songs can also be popular. ")
-        elif selected_viz == "Instrumentalness vs. Streams":
-            self.visualization.plot_instrumentalness_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: Most high-stream songs have 0% or low instrumentalness percentage, indicating that purely instrumental tracks are less popular in terms of streaming.")
-        elif selected_viz == "Liveness vs. Streams":
-            self.visualization.plot_liveness_vs_streams(self.spotify_songs)
-            self.label_conclusions.config(
-                text="Conclusion: The scatter plot shows a wide distribution of liveness values that favor less liveness according to amount of streams. There is also significantly more records with liveness in a range between 20-40%.")
+        if key is not None and self.visualization.show_cached(key):
+            # Supersede a chart still being prepared so it does not replace this one when it finishes
+            self.task_runner.submit('visualization', lambda: None, lambda result: None)
+            self.label_conclusions.config(text=conclusion)
+            return
+        figure = self.visualization.reusable(key) if key is not None else None
+
+        def on_done(figure):
+            self.visualization.show(figure, key)
+            self.label_conclusions.config(text=conclusion)
+
+        def on_error(e):
+            messagebox.showerror("Error", f"An error occurred while plotting {selected_viz}: {e}")
+
+        self.task_runner.submit('visualization', lambda: self.visualization.prepare(draw, *args, figure=figure),
+                                on_done, on_error)
+
+    def create_visualization(self):
+        chart = CHARTS_BY_NAME[self.selected_option.get()]
+        self.show_visualization(getattr(self.get_visualization(), chart.draw),
+                                *chart_args(chart, self.spotify_songs, self.chart_inputs),
+                                conclusion=chart.conclusion, key=(chart.name, self.data_version))
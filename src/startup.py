@@ -0,0 +1,44 @@
+import json
+import time
+from datetime import datetime, timezone
+
+# Seconds from process start that each startup milestone must stay within:
+# window - the main window is on screen, controls - every control is built,
+# data - the dataset is parsed and indexed, interactive - the table shows the data
+STARTUP_BUDGET = {
+    'window': 0.3,
+    'controls': 1.0,
+    'data': 2.5,
+    'interactive': 3.0,
+}
+
+
+class StartupTimer:
+    # Seconds from start to each named milestone; only the first mark of a milestone counts
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.start
+        return self.marks[name]
+
+    def over_budget(self, budget=None):
+        # milestone -> (seconds, budget) for every milestone reached later than its budget
+        budget = STARTUP_BUDGET if budget is None else budget
+        return {name: (self.marks[name], limit) for name, limit in budget.items()
+                if name in self.marks and self.marks[name] > limit}
+
+    def report(self):
+        return {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'marks': self.marks,
+            'budget': STARTUP_BUDGET,
+            'over_budget': sorted(self.over_budget()),
+        }
+
+    def write(self, path):
+        # One JSON line per run, so the file tracks startup time across runs
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.report()) + "\n")
@@ -0,0 +1,146 @@
+import heapq
+import numpy as np
+import pandas as pd
+from aggregate_cube import AggregateCube
+from artist_index import ArtistIndex
+from column_store import ColumnStore, source_key
+from data_loader import FALLBACK_ENCODING, SpotifyDataLoader
+
+CHUNK_SIZE = 100000
+# Rows kept for the table and the scatter plots
+SAMPLE_SIZE = 100000
+# Most-streamed rows always added to the sample so the hits stay visible
+HIT_ROWS = 50
+# Distinct artists tracked for the top-artists chart
+ARTIST_CAPACITY = 20000
+
+
+class TopArtistsAccumulator:
+    # Per-artist stream totals kept in a bounded table. When it overflows, only the capacity largest
+    # totals are kept. An artist dropped more than once loses each partial total, so error is the sum of
+    # everything dropped so far (as in Space-Saving), an upper bound on any artist's undercount.
+    def __init__(self, capacity=ARTIST_CAPACITY, weighting='full'):
+        self.capacity = capacity
+        self.weighting = weighting
+        self.totals = {}
+        self.error = 0.0
+
+    def update(self, chunk):
+        index = ArtistIndex(chunk['artist(s)_name'], chunk['artist_count'])
+        for artist, total in index.totals(chunk['streams'], self.weighting).items():
+            self.totals[artist] = self.totals.get(artist, 0.0) + total
+        self.trim()
+
+    def merge(self, other):
+        for artist, total in other.totals.items():
+            self.totals[artist] = self.totals.get(artist, 0.0) + total
+        self.error += other.error
+        self.trim()
+
+    def trim(self):
+        if len(self.totals) <= self.capacity:
+            return
+        dropped = sum(self.totals.values())
+        self.totals = dict(heapq.nlargest(self.capacity, self.totals.items(), key=lambda item: item[1]))
+        self.error += dropped - sum(self.totals.values())
+
+    def top(self, values=None, n=10, weighting='full'):
+        # Same call shape as ArtistIndex.top; values are ignored because the totals were streamed already
+        if weighting != self.weighting:
+            raise ValueError(f"Artist totals were accumulated with {self.weighting!r} weighting")
+        top = heapq.nlargest(n, self.totals.items(), key=lambda item: item[1])
+        return pd.Series([total for artist, total in top], index=pd.Index([artist for artist, total in top],
+                                                                            name='artist'))
+
+
+class RowSample:
+    # Uniform sample of at most size rows (bottom-k on random keys, so chunks can be folded in one by one)
+    # plus the most-streamed rows, which are always kept.
+    def __init__(self, size=SAMPLE_SIZE, hits=HIT_ROWS, seed=0):
+        self.size = size
+        self.hits = hits
+        self.rng = np.random.default_rng(seed)
+        self.sample = None
+        self.sample_keys = np.empty(0)
+        self.top = None
+
+    def update(self, chunk):
+        keys = np.concatenate([self.sample_keys, self.rng.random(len(chunk))])
+        rows = chunk if self.sample is None else pd.concat([self.sample, chunk])
+        keep = np.argsort(keys, kind='stable')[:self.size]
+        keep.sort()
+        self.sample = rows.iloc[keep]
+        self.sample_keys = keys[keep]
+
+        top = chunk if self.top is None else pd.concat([self.top, chunk])
+        self.top = top.loc[top['streams'].fillna(-1).nlargest(self.hits).index]
+
+    def rows(self):
+        if self.sample is None:
+            return None
+        extra = self.top[~self.top.index.isin(self.sample.index)]
+        return pd.concat([self.sample, extra]).sort_index()
+
+
+class StreamingSummary:
+    # Everything the GUI needs from a file too large to hold in memory
+    def __init__(self, chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE, artist_capacity=ARTIST_CAPACITY):
+        self.chunk_size = chunk_size
+        self.cube = None
+        self.top_artists = TopArtistsAccumulator(artist_capacity)
+        self.sample = RowSample(sample_size)
+        self.rows = 0
+
+    def update(self, chunk):
+        cube = AggregateCube(chunk)
+        self.cube = cube if self.cube is None else AggregateCube.merge([self.cube, cube])
+        self.top_artists.update(chunk)
+        self.sample.update(chunk)
+        self.rows += len(chunk)
+
+
+def stream_spotify_songs(file_path, chunk_size=CHUNK_SIZE, sample_size=SAMPLE_SIZE, on_progress=None, cache=False):
+    # Read the CSV in bounded chunks, folding each one into the summary; peak memory does not grow with the file.
+    # on_progress, if given, is called with the number of rows read so far after every chunk.
+    # With cache, the chunks are also written to the file's column store, which later loads memory-map.
+    loader = SpotifyDataLoader(file_path)
+    key = source_key(file_path) if cache else None
+    encoding = None
+    while True:
+        summary = StreamingSummary(chunk_size, sample_size)
+        writer = ColumnStore(file_path).writer(key) if cache else None
+        try:
+            for chunk in loader.read_chunks(chunk_size, encoding, key['size'] if cache else None):
+                summary.update(chunk)
+                writer = append_to_store(writer, chunk)
+                if on_progress is not None:
+                    on_progress(summary.rows)
+            if writer is not None:
+                try:
+                    writer.finish({'encoding': loader.encoding, 'issues': loader.issues, 'file_size': loader.file_size})
+                except (OSError, ValueError):
+                    writer.abort()
+            return summary, loader
+        except UnicodeDecodeError:
+            if writer is not None:
+                writer.abort()
+            if encoding == FALLBACK_ENCODING:
+                raise
+            # The sampled encoding did not hold for the whole file; Latin-1 decodes any byte
+            encoding = FALLBACK_ENCODING
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+
+def append_to_store(writer, chunk):
+    # A store that cannot be written, e.g. in a read-only directory, only costs the next start a parse
+    if writer is None:
+        return None
+    try:
+        writer.append(chunk)
+        return writer
+    except (OSError, ValueError):
+        writer.abort()
+        return None
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from data_loader import FALLBACK_ENCODING, SPOTIFY_SCHEMA
+from dataset import VALID_KEYS, VALID_MODES
+
+# Rows generated per block, so writing 10M rows never holds more than one block in memory
+BLOCK_SIZE = 500000
+# Fraction of rows whose streams value is garbage, like row 576 of the real file
+DIRTY_STREAMS_RATE = 0.001
+MISSING_KEY_RATE = 0.1
+MISSING_SHAZAM_RATE = 0.05
+
+WORDS = ['love', 'night', 'summer', 'heart', 'girl', 'dance', 'fire', 'dream', 'baby', 'money', 'blue', 'city',
+         'rain', 'star', 'forever', 'crazy', 'kiss', 'wild', 'gold', 'ghost', 'feel', 'alone', 'sky', 'caf\xe9',
+         'coraz\xf3n', 'vida', 'noche', 'amor', 'way', 'home']
+SYLLABLES = ['ta', 'lo', 'mi', 'ra', 'ke', 'zu', 'na', 'vi', 'so', 'el', 'jo', 'ri', 'an', 'be', '\xf1o', 'dy']
+
+
+def artist_pool(size, rng):
+    first = np.char.add(rng.choice(SYLLABLES, size), rng.choice(SYLLABLES, size))
+    last = np.char.add(np.char.add(rng.choice(SYLLABLES, size), rng.choice(SYLLABLES, size)),
+                       rng.choice(SYLLABLES, size))
+    names = pd.Series(first).str.capitalize() + ' ' + pd.Series(last).str.capitalize()
+    # Numbered so that every pooled name is distinct
+    return (names + ' ' + pd.Series(np.arange(size)).astype(str)).to_numpy(dtype=object)
+
+
+def with_thousands(values):
+    # The real file writes large counts in these columns as quoted "2,445"
+    text = pd.Series(values).map('{:,}'.format)
+    return text.where(values >= 1000, pd.Series(values).astype(str))
+
+
+def generate_spotify_songs(rows, seed=0, start=0, artists=None):
+    # One block of raw rows with the same 24 columns, text formats and defects as Popular_Spotify_Songs.csv
+    rng = np.random.default_rng(seed)
+    if artists is None:
+        artists = artist_pool(max(50, rows // 5), rng)
+
+    # Popularity is heavy-tailed: a few artists appear on many tracks
+    artist_count = rng.choice([1, 2, 3, 4], rows, p=[0.7, 0.2, 0.07, 0.03])
+    credited = [artists[np.minimum(rng.zipf(1.3, rows), len(artists)) - 1] for _ in range(4)]
+    names = pd.Series(credited[0])
+    for i in range(1, 4):
+        names = names.where(artist_count <= i, names + ', ' + credited[i])
+
+    track_name = (pd.Series(rng.choice(WORDS, rows)).str.capitalize() + ' ' + rng.choice(WORDS, rows)
+                  + ' ' + (start + np.arange(rows)).astype(str))
+    released_year = np.clip(2023 - rng.geometric(0.15, rows) + 1, 1930, 2023)
+    spotify_playlists = rng.lognormal(7.5, 1.3, rows).astype(np.int64)
+    streams = (spotify_playlists * rng.lognormal(11.5, 1.0, rows)).astype(np.int64)
+    streams_text = pd.Series(streams).astype(str)
+    dirty = rng.random(rows) < DIRTY_STREAMS_RATE
+    streams_text[dirty] = np.char.add(np.char.add('BPM', rng.integers(65, 207, dirty.sum()).astype(str)),
+                                      'KeyAModeMajor')
+
+    key = pd.Series(rng.choice(VALID_KEYS, rows))
+    key[rng.random(rows) < MISSING_KEY_RATE] = ''
+    shazam = with_thousands(rng.lognormal(3.5, 2.0, rows).astype(np.int64))
+    shazam[rng.random(rows) < MISSING_SHAZAM_RATE] = ''
+
+    def percent(mean, spread):
+        return np.clip(rng.normal(mean, spread, rows), 0, 100).astype(np.int64)
+
+    columns = {
+        'track_name': track_name,
+        'artist(s)_name': names,
+        'artist_count': artist_count,
+        'released_year': released_year,
+        'released_month': rng.integers(1, 13, rows),
+        'released_day': rng.integers(1, 29, rows),
+        'in_spotify_playlists': spotify_playlists,
+        'in_spotify_charts': rng.poisson(10, rows),
+        'streams': streams_text,
+        'in_apple_playlists': rng.lognormal(3.5, 1.2, rows).astype(np.int64),
+        'in_apple_charts': rng.poisson(50, rows),
+        'in_deezer_playlists': with_thousands(rng.lognormal(4.0, 1.6, rows).astype(np.int64)),
+        'in_deezer_charts': rng.poisson(2, rows),
+        'in_shazam_charts': shazam,
+        'bpm': rng.integers(65, 207, rows),
+        'key': key,
+        'mode': rng.choice(VALID_MODES, rows, p=[0.58, 0.42]),
+        'danceability_%': percent(67, 15),
+        'valence_%': percent(51, 24),
+        'energy_%': percent(64, 17),
+        'acousticness_%': np.clip(rng.exponential(27, rows), 0, 97).astype(np.int64),
+        'instrumentalness_%': np.where(rng.random(rows) < 0.9, 0, rng.integers(1, 92, rows)),
+        'liveness_%': np.clip(rng.exponential(18, rows), 3, 97).astype(np.int64),
+        'speechiness_%': np.clip(rng.exponential(10, rows), 2, 64).astype(np.int64),
+    }
+    data = pd.DataFrame({col: pd.Series(values).to_numpy() for col, values in columns.items()},
+                        index=pd.RangeIndex(start, start + rows))
+    return data[list(SPOTIFY_SCHEMA)]
+
+
+def write_spotify_csv(file_path, rows, seed=0, encoding=FALLBACK_ENCODING):
+    # Written block by block with one shared artist pool, in the real file's Latin-1 encoding
+    rng = np.random.default_rng(seed)
+    artists = artist_pool(max(50, rows // 5), rng)
+    for start in range(0, rows, BLOCK_SIZE):
+        block = generate_spotify_songs(min(BLOCK_SIZE, rows - start), seed + 1 + start // BLOCK_SIZE, start,
+                                       artists)
+        block.to_csv(file_path, mode='w' if start == 0 else 'a', header=start == 0, index=False,
+                     encoding=encoding)
+    return file_path
@@ -0,0 +1,54 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskRunner:
+    # Runs pandas work on background threads and hands results back on the Tk main thread via root.after.
+    # Tasks are grouped by channel: submitting a new task on a channel supersedes the previous one,
+    # which is cancelled if it has not started yet and has its result dropped otherwise.
+    def __init__(self, root, max_workers=2, poll_interval=20):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='spotify-worker')
+        self.generations = {}
+        self.futures = {}
+        self.running = 0
+        # Called with True when the first task starts and False when the last one finishes
+        self.on_busy = None
+
+    def submit(self, channel, work, on_done, on_error=None):
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        previous = self.futures.get(channel)
+        if previous is not None:
+            previous.cancel()
+
+        future = self.executor.submit(work)
+        self.futures[channel] = future
+        self.set_running(self.running + 1)
+        self.root.after(self.poll_interval, self.poll, channel, generation, future, on_done, on_error)
+
+    def poll(self, channel, generation, future, on_done, on_error):
+        if not future.done():
+            self.root.after(self.poll_interval, self.poll, channel, generation, future, on_done, on_error)
+            return
+        self.set_running(self.running - 1)
+        if self.generations.get(channel) != generation or future.cancelled():
+            return
+        del self.futures[channel]
+        try:
+            result = future.result()
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(e)
+            return
+        on_done(result)
+
+    def set_running(self, running):
+        was_busy = self.running > 0
+        self.running = running
+        if self.on_busy is not None and was_busy != (running > 0):
+            self.on_busy(running > 0)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
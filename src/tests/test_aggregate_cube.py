@@ -0,0 +1,36 @@
+import unittest
+import pandas as pd
+from ..aggregate_cube import AggregateCube
+
+
+class TestAggregateCube(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'released_year': [2020, 2021, 2020, 2021],
+            'released_month': [1, 1, 5, 5],
+            'key': ['C#', 'B', None, 'C#'],
+            'mode': ['Major', 'Minor', 'Major', 'Major'],
+            'artist_count': [1, 2, 1, 2],
+            'streams': [1000, 2000, 1500, 2500],
+            'bpm': [100, 120, 140, 160],
+        })
+        self.cube = AggregateCube(self.data)
+
+    def test_rollup_matches_groupby(self):
+        expected = self.data.groupby('released_year')['streams'].sum()
+        self.assertEqual(self.cube.rollup(['released_year'])['streams_sum'].tolist(), expected.tolist())
+        expected = self.data.groupby('key')['streams'].sum()
+        self.assertEqual(self.cube.rollup(['key'])['streams_sum'].to_dict(), expected.to_dict())
+
+    def test_rollup_means_and_counts(self):
+        totals = self.cube.rollup(['released_year'])
+        self.assertEqual(totals['bpm_mean'].tolist(), [120.0, 140.0])
+        self.assertEqual(self.cube.rollup(['released_month'])['rows'].tolist(), [2, 2])
+
+    def test_rollup_with_filter(self):
+        totals = self.cube.rollup(['is_collaborative'], where={'mode': 'Major'})
+        self.assertEqual(totals['streams_sum'].to_dict(), {'Collaborative': 2500, 'Solo': 2500})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import pandas as pd
+from ..artist_index import ArtistIndex
+
+
+class TestArtistIndex(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'artist(s)_name': ['Latto, Jung Kook', 'Jung Kook', 'Myke Towers', None],
+            'artist_count': [2, 1, 1, 1],
+            'streams': [1000, 2000, 1500, 2500],
+        })
+        self.index = ArtistIndex(self.data['artist(s)_name'], self.data['artist_count'])
+
+    def test_collaborations_are_exploded(self):
+        self.assertEqual(sorted(self.index.artists), ['Jung Kook', 'Latto', 'Myke Towers'])
+        self.assertEqual(self.index.artists_of(0), ['Latto', 'Jung Kook'])
+        self.assertEqual(self.index.artists_of(3), [])
+
+    def test_totals_by_weighting(self):
+        streams = self.data['streams']
+        self.assertEqual(self.index.totals(streams)['Jung Kook'], 3000)
+        self.assertEqual(self.index.totals(streams, 'split')['Jung Kook'], 2500)
+        self.assertEqual(self.index.totals(streams, 'primary')['Jung Kook'], 2000)
+        self.assertEqual(self.index.top(streams, 1).index[0], 'Jung Kook')
+
+    def test_tracks_exact_match(self):
+        self.assertEqual(self.index.tracks('jung kook').tolist(), [0, 1])
+        self.assertEqual(len(self.index.tracks('Jung')), 0)
+
+    def test_extended_matches_full_build(self):
+        appended = pd.DataFrame({
+            'artist(s)_name': ['Myke Towers, Bad Bunny', 'Bad Bunny'],
+            'artist_count': [2, 1],
+            'streams': [500, 700],
+        })
+        data = pd.concat([self.data, appended], ignore_index=True)
+        full = ArtistIndex(data['artist(s)_name'], data['artist_count'])
+        extended = self.index.extended(appended['artist(s)_name'], appended['artist_count'])
+        for weighting in ['full', 'split', 'primary']:
+            pd.testing.assert_series_equal(extended.totals(data['streams'], weighting).sort_index(),
+                                           full.totals(data['streams'], weighting).sort_index())
+        self.assertEqual(extended.tracks('bad bunny').tolist(), [4, 5])
+        for artist in full.artists:
+            self.assertEqual(extended.tracks(artist).tolist(), full.tracks(artist).tolist())
+        self.assertEqual(extended.artists_of(4), ['Myke Towers', 'Bad Bunny'])
+        self.assertEqual(len(self.index.tracks('bad bunny')), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+from ..batch_report import prepare_dataset, run_batch
+from ..charts import CHARTS_BY_NAME, chart_args, chart_slug
+from ..synthetic_data import write_spotify_csv
+from ..visualization import Visualization
+
+
+class TestBatchReport(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.file_path = write_spotify_csv(os.path.join(self.dir, 'songs.csv'), 500, seed=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_chart_renders_headless(self):
+        spotify_songs, inputs, _ = prepare_dataset(self.file_path)
+        chart = CHARTS_BY_NAME["Key vs. Streams"]
+        visualization = Visualization(None)
+        figure = visualization.prepare(getattr(visualization, chart.draw), *chart_args(chart, spotify_songs, inputs))
+        self.assertEqual(figure.axes[0].get_title(), 'Total Streams by Key')
+        self.assertEqual(chart_slug(chart), 'key_vs_streams')
+
+    def test_batch_writes_charts_and_index(self):
+        out_dir = os.path.join(self.dir, 'reports')
+        names = ["Key vs. Streams", "Top 10 Artists by Streams"]
+        summary = run_batch(self.file_path, out_dir, names=names, workers=1)
+        self.assertEqual(summary['rows'], 500)
+        self.assertEqual(sorted(summary['chart_seconds']), sorted(names))
+        self.assertEqual(sorted(os.listdir(out_dir)),
+                         ['key_vs_streams.png', 'report.md', 'top_10_artists_by_streams.png'])
+        with open(os.path.join(out_dir, 'report.md'), encoding='utf-8') as f:
+            report = f.read()
+        self.assertIn("## Key vs. Streams", report)
+        self.assertIn("(top_10_artists_by_streams.png)", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
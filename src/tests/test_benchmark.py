@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+from ..benchmark import BASELINE_PATH, DEFAULT_ROWS, compare
+from ..data_loader import SpotifyDataLoader, SPOTIFY_SCHEMA
+from ..synthetic_data import generate_spotify_songs, write_spotify_csv
+
+
+class TestSyntheticData(unittest.TestCase):
+    def test_generated_rows_match_schema(self):
+        data = generate_spotify_songs(2000, seed=1)
+        self.assertEqual(list(data.columns), list(SPOTIFY_SCHEMA))
+        self.assertEqual(len(data), 2000)
+        self.assertTrue(data['artist(s)_name'].str.contains(', ').any())
+        counts = data['artist(s)_name'].str.count(', ') + 1
+        self.assertTrue((counts == data['artist_count']).all())
+
+    def test_written_file_loads_with_dirty_values(self):
+        fd, file_path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            write_spotify_csv(file_path, 5000, seed=2)
+            loader = SpotifyDataLoader(file_path)
+            data = loader.load()
+        finally:
+            os.remove(file_path)
+        self.assertEqual(len(data), 5000)
+        self.assertTrue(any('invalid streams' in issue for issue in loader.issues))
+        self.assertTrue(data['key'].isna().any())
+        self.assertGreater(data['in_deezer_playlists'].max(), 999)
+
+
+class TestCompare(unittest.TestCase):
+    def test_compare_flags_only_real_slowdowns(self):
+        baseline = {'results': {'1000': {'ingest': 0.100, 'classify': 0.001, 'table': 0.050}}}
+        results = {'results': {'1000': {'ingest': 0.200, 'classify': 0.004, 'table': 0.055, 'new': 1.0}}}
+        self.assertEqual(compare(results, baseline), [('1000', 'ingest', 0.100, 0.200)])
+        self.assertEqual(compare(results, baseline, tolerance=1.5), [])
+
+    def test_committed_baseline_covers_default_sizes(self):
+        with open(BASELINE_PATH, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for rows in DEFAULT_ROWS:
+            self.assertIn('ingest', baseline['results'][str(rows)])
+        self.assertEqual(compare(baseline, baseline), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from ..column_store import ColumnStore, source_key, store_dir
+from ..data_loader import SpotifyDataLoader
+from ..synthetic_data import write_spotify_csv
+
+TEXT_COLUMNS = {'track_name': 'string', 'artist(s)_name': 'string'}
+
+
+class TestColumnStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.dir, 'songs.csv')
+        write_spotify_csv(self.file_path, 2000, seed=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_reopen_matches_parsed_data(self):
+        loader = SpotifyDataLoader(self.file_path)
+        parsed = loader.load(cache=True)
+        self.assertTrue(os.path.exists(os.path.join(store_dir(self.file_path), 'manifest.json')))
+
+        reopened_loader = SpotifyDataLoader(self.file_path)
+        reopened = reopened_loader.load(cache=True)
+        pd.testing.assert_frame_equal(reopened.astype(TEXT_COLUMNS), parsed)
+        self.assertEqual(reopened_loader.issues, loader.issues)
+        self.assertEqual(reopened_loader.encoding, loader.encoding)
+        self.assertEqual(reopened_loader.file_size, os.path.getsize(self.file_path))
+        # Columns are read-only views of the mapped files rather than copies, strings as categorical codes
+        self.assertFalse(reopened['bpm'].to_numpy().flags.writeable)
+        names = reopened['track_name'].cat
+        self.assertFalse(names.codes.to_numpy().flags.writeable)
+        self.assertEqual(names.categories.tolist(), sorted(names.categories))
+
+    def test_changed_source_is_parsed_again(self):
+        SpotifyDataLoader(self.file_path).load(cache=True)
+        store = ColumnStore(self.file_path)
+        self.assertIsNotNone(store.open()[0])
+        with open(self.file_path, 'rb') as f:
+            lines = f.read().split(b'\n')
+        with open(self.file_path, 'ab') as f:
+            f.write(lines[1] + b'\n')
+        self.assertEqual(store.open(), (None, None))
+        data = SpotifyDataLoader(self.file_path).load(cache=True)
+        self.assertEqual(len(data), 2001)
+        self.assertEqual(len(store.open()[0]), 2001)
+        self.assertEqual(store.manifest()['source'], source_key(self.file_path))
+
+    def test_rewrite_replaces_mapped_files(self):
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load(cache=True)
+        store = ColumnStore(self.file_path)
+        mapped, manifest = store.open()
+        path = os.path.join(store.path, f"c0.{manifest['token']}.npy")
+        inode = os.stat(path).st_ino
+        # Same source, so the same file names: they are replaced rather than truncated under the mapping
+        store.write(data)
+        self.assertNotEqual(os.stat(path).st_ino, inode)
+        pd.testing.assert_frame_equal(mapped.astype(TEXT_COLUMNS), data)
+        self.assertFalse([name for name in os.listdir(store.path) if name.endswith('.tmp')])
+
+    def test_strings_with_missing_values_round_trip(self):
+        data = pd.DataFrame({
+            'name': pd.array(['a', None, 'caf\xe9', 'a', ''], dtype='string'),
+            'count': pd.array([1, None, 3, 4, 5], dtype='Int32'),
+            'key': pd.Categorical(['C#', None, 'D', 'D', 'C#'], categories=['C#', 'D']),
+        })
+        store = ColumnStore(self.file_path)
+        store.write(data)
+        opened = store.open()[0]
+        self.assertEqual(opened['name'].cat.categories.tolist(), ['', 'a', 'caf\xe9'])
+        pd.testing.assert_frame_equal(opened.astype({'name': 'string'}), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,46 @@ class TestDataExplorer(unittest.TestCase):
         self.data_explorer.load_data(self.data)
         self.assertEqual(len(self.data_explorer.tree.get_children()), len(self.data))
 
+    def test_load_data_large_dataset_is_windowed(self):
+        data = pd.concat([self.data] * 2500, ignore_index=True)
+        self.data_explorer.load_data(data)
+        self.assertLess(len(self.data_explorer.tree.get_children()), 100)
+        self.data_explorer.table.yview('moveto', '1.0')
+        last_item = self.data_explorer.tree.get_children()[-1]
+        self.assertEqual(self.data_explorer.table.row_position(last_item), len(data) - 1)
+
+    def test_selection_stays_on_its_row_when_scrolling(self):
+        data = pd.concat([self.data] * 2500, ignore_index=True)
+        self.data_explorer.load_data(data)
+        table = self.data_explorer.table
+        first_item = self.data_explorer.tree.get_children()[0]
+        self.data_explorer.tree.selection_set(first_item)
+        table.on_select()
+        # The item now draws another row, so it is deselected while row 0 stays selected
+        table.scroll(50)
+        self.assertEqual(self.data_explorer.tree.selection(), ())
+        self.assertEqual(table.selected_positions().tolist(), [0])
+        table.scroll(-50)
+        self.assertEqual(self.data_explorer.tree.selection(), (first_item,))
+
+    def test_arrow_keys_move_the_window(self):
+        data = pd.concat([self.data] * 2500, ignore_index=True)
+        self.data_explorer.load_data(data)
+        table = self.data_explorer.table
+        visible = table.visible_rows()
+        for _ in range(visible + 2):
+            table.move_focus(1)
+        # Focus left the first window, which scrolled to keep the focused row in view
+        self.assertEqual(table.first, 2)
+        self.assertEqual(table.row_position(self.data_explorer.tree.focus()), visible + 1)
+        self.assertEqual(table.selected_positions().tolist(), [visible + 1])
+        table.move_focus(visible)
+        self.assertEqual(table.row_position(self.data_explorer.tree.focus()), 2 * visible + 1)
+        table.move_focus(-2 * visible - 10)
+        self.assertEqual(table.first, 0)
+        self.assertEqual(table.row_position(self.data_explorer.tree.focus()), 0)
+        self.assertEqual(self.data_explorer.tree.selection(), (self.data_explorer.tree.get_children()[0],))
+
     def test_apply_filter(self):
         self.data_explorer.filter_entry.insert(0, 'Artist 1')
         self.data_explorer.selected_filter_option.set('artist(s)_name')
@@ -36,11 +76,37 @@ class TestDataExplorer(unittest.TestCase):
         self.data_explorer.clear_filter()
         self.assertEqual(len(self.data_explorer.tree.get_children()), len(self.data))
 
+    def test_sort_by_column_headings(self):
+        self.data_explorer.sort_by('streams')
+        self.assertEqual(self.data_explorer.table.view.tolist(), [0, 2, 1, 3])
+        self.data_explorer.sort_by('streams')
+        self.assertEqual(self.data_explorer.table.view.tolist(), [3, 1, 2, 0])
+        self.assertEqual(self.data_explorer.tree.heading('streams', 'text'), 'streams \u25bc')
+
+        self.data_explorer.sort_by('released_year')
+        self.data_explorer.sort_by('streams', add=True)
+        self.assertEqual(self.data_explorer.table.view.tolist(), [0, 2, 1, 3])
+        self.assertEqual(self.data_explorer.tree.heading('streams', 'text'), 'streams \u25b22')
+
+    def test_sort_applies_to_filtered_rows(self):
+        self.data_explorer.sort_by('streams')
+        self.data_explorer.sort_by('streams')
+        self.data_explorer.filter_entry.insert(0, 'Artist 1')
+        self.data_explorer.selected_filter_option.set('artist(s)_name')
+        self.data_explorer.apply_filter()
+        self.assertEqual(self.data_explorer.table.view.tolist(), [2, 0])
+        self.data_explorer.clear_filter()
+        self.assertEqual(self.data_explorer.table.view.tolist(), [3, 1, 2, 0])
+
     def test_classify_tracks(self):
         self.data_explorer.classify_tracks()
-        self.assertIn('is_collaborative', self.data_explorer.spotify_songs.columns)
-        self.assertEqual(self.data_explorer.spotify_songs['is_collaborative'].iloc[0], 'Solo')
-        self.assertEqual(self.data_explorer.spotify_songs['is_collaborative'].iloc[1], 'Collaborative')
+        # The classification is kept beside the dataset, which the table and the plots share
+        self.assertNotIn('is_collaborative', self.data_explorer.spotify_songs.columns)
+        self.assertEqual(self.data_explorer.is_collaborative.iloc[0], 'Solo')
+        self.assertEqual(self.data_explorer.is_collaborative.iloc[1], 'Collaborative')
+        summary = self.data_explorer.get_collaboration_streams_summary()
+        self.assertEqual(summary.set_index('is_collaborative')['streams'].to_dict(),
+                         {'Collaborative': 4500, 'Solo': 2500})
 
 
 if __name__ == '__main__':
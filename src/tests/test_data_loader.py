@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from ..data_loader import SpotifyDataLoader, SPOTIFY_SCHEMA
+
+
+class TestSpotifyDataLoader(unittest.TestCase):
+    def setUp(self):
+        header = ",".join(SPOTIFY_SCHEMA)
+        rows = [
+            'Seven,"Latto, Jung Kook",2,2023,7,14,553,147,141381703,43,263,45,10,826,125,B,Major,80,89,83,31,0,8,4',
+            'LALA,Myke Towers,1,2023,3,23,1474,48,133716286,48,126,"2,445",14,"1,021",92,C#,Major,71,61,74,7,0,10,4',
+            'Caf\xe9,Artist 3,1,2022,1,1,10,0,BPM110KeyA,1,1,1,1,,92,H,Minor,71,61,74,7,0,10,4',
+        ]
+        fd, self.file_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='ISO-8859-1') as f:
+            f.write("\n".join([header] + rows) + "\n")
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_load_detects_encoding_from_sample(self):
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load()
+        self.assertEqual(data['track_name'].iloc[2], 'Caf\xe9')
+        self.assertEqual(data['artist(s)_name'].iloc[0], 'Latto, Jung Kook')
+
+    def test_load_parses_thousands_separators(self):
+        data = SpotifyDataLoader(self.file_path).load()
+        self.assertEqual(data['in_deezer_playlists'].iloc[1], 2445)
+        self.assertEqual(data['in_shazam_charts'].iloc[1], 1021)
+
+    def test_load_reports_malformed_streams_and_key(self):
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load()
+        self.assertTrue(data['streams'].isna().iloc[2])
+        self.assertTrue(data['key'].isna().iloc[2])
+        self.assertEqual(len(loader.issues), 2)
+        self.assertIn('streams', loader.issues[0])
+        self.assertIn('key', loader.issues[1])
+
+    def test_progress_keeps_the_configured_engine(self):
+        progress = []
+        loader = SpotifyDataLoader(self.file_path, engine='python')
+        data = loader.load(on_progress=progress.append)
+        pd.testing.assert_frame_equal(data, SpotifyDataLoader(self.file_path, engine='c').load())
+        self.assertEqual(progress, sorted(progress))
+        self.assertEqual(progress[-1], 1.0)
+
+    def test_read_appended_parses_only_complete_new_lines(self):
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load()
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write('New,Artist 4,1,2024,1,5,20,1,1000,2,3,4,5,6,100,D,Minor,50,50,50,5,0,5,5\n'
+                    'Partial,Artist 5,1,2024')
+        appended, offset = loader.read_appended(loader.file_size, len(data))
+        self.assertEqual(len(appended), 1)
+        self.assertEqual(appended.index[0], 3)
+        self.assertEqual(appended['streams'].iloc[0], 1000)
+        self.assertEqual(appended['key'].iloc[0], 'D')
+
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write(',2,3,4,0,BPM,1,1,1,1,1,90,Z,Major,1,1,1,1,1,1,1\n')
+        appended, offset = loader.read_appended(offset, 4)
+        self.assertEqual(appended['track_name'].tolist(), ['Partial'])
+        self.assertEqual(len(loader.issues), 4)
+        self.assertIn('Row 6', loader.issues[2])
+        self.assertEqual(loader.read_appended(offset, 5), (None, offset))
+
+    def test_load_leaves_incomplete_last_line_for_read_appended(self):
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write('Partial,Artist 5,1,2024')
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load()
+        self.assertEqual(len(data), 3)
+        self.assertEqual(loader.file_size, size)
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write(',2,3,4,0,1000,1,1,1,1,1,90,A,Major,1,1,1,1,1,1,1\n')
+        appended, offset = loader.read_appended(loader.file_size, len(data))
+        self.assertEqual(appended['track_name'].tolist(), ['Partial'])
+
+    def test_rows_past_the_size_read_are_not_parsed(self):
+        size = os.path.getsize(self.file_path)
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write('New,Artist 4,1,2024,1,5,20,1,1000,2,3,4,5,6,100,D,Minor,50,50,50,5,0,5,5\n')
+        loader = SpotifyDataLoader(self.file_path)
+        chunks = list(loader.read_chunks(2, size=size))
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 3)
+        self.assertEqual(loader.file_size, size)
+
+
+    def test_blank_and_text_integers_are_reported_not_fatal(self):
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write('Blank,Artist 4,1,,1,5,20,1,1000,2,3,4,5,6,100,D,Minor,50,50,50,5,0,5,5\n'
+                    'Text,Artist 5,1,2024,1,5,20,1,1000,2,3,4,5,6,fast,D,Minor,50,50,50,5,0,5,5\n'
+                    'Half,Artist 6,1,2024,1,5,20,1,1000,2,3,4,5,6,92.5,D,Minor,50,50,50,5,0,5,5\n')
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load()
+        self.assertEqual(len(data), 6)
+        self.assertTrue(data['released_year'].isna().iloc[3])
+        self.assertTrue(data['bpm'].isna().iloc[4])
+        self.assertEqual(data['bpm'].iloc[0], 125)
+        self.assertIn("Row 5: missing released_year value", loader.issues)
+        self.assertIn("Row 6: invalid bpm value 'fast'", loader.issues)
+        self.assertIn("Row 7: invalid bpm value '92.5'", loader.issues)
+        self.assertEqual(data['bpm'].dtype, 'Int16')
+        # Reading in chunks gives the same rows and issues, also when the text is in a later chunk
+        chunks = list(loader.read_chunks(2))
+        pd.testing.assert_frame_equal(pd.concat(chunks), data, check_dtype=False)
+        self.assertEqual(len(loader.issues), 5)
+
+    def test_read_appended_reports_blank_integers(self):
+        loader = SpotifyDataLoader(self.file_path)
+        data = loader.load()
+        with open(self.file_path, 'a', encoding='ISO-8859-1') as f:
+            f.write('New,Artist 4,1,2024,1,5,,1,1000,2,3,4,5,6,100,D,Minor,50,50,50,5,0,5,5\n')
+        appended, offset = loader.read_appended(loader.file_size, len(data))
+        self.assertTrue(appended['in_spotify_playlists'].isna().iloc[0])
+        self.assertEqual(loader.issues[-1], "Row 5: missing in_spotify_playlists value")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ..dataset import AppendBuffer, normalize_spotify_songs
+
+
+class TestNormalizeSpotifySongs(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'released_year': ['2020', '2021', '2020'],
+            'streams': ['1000', '2000', 'BPM110KeyAModeMajor'],
+            'danceability_%': [80, 300, 55],
+            'key': ['C#', None, 'B'],
+            'mode': ['Major', 'Minor', 'Major'],
+        })
+
+    def test_compact_dtypes(self):
+        data = normalize_spotify_songs(self.data)
+        self.assertEqual(data['released_year'].dtype, 'int16')
+        self.assertEqual(data['key'].dtype, 'category')
+        self.assertEqual(data['mode'].dtype, 'category')
+
+    def test_invalid_values_become_missing(self):
+        data = normalize_spotify_songs(self.data)
+        self.assertEqual(data['streams'].dtype, 'Int64')
+        self.assertTrue(data['streams'].isna().iloc[2])
+        self.assertEqual(data['danceability_%'].dtype, 'UInt8')
+        self.assertTrue(data['danceability_%'].isna().iloc[1])
+
+    def test_input_frame_is_not_modified(self):
+        normalize_spotify_songs(self.data)
+        self.assertEqual(self.data['streams'].iloc[0], '1000')
+
+
+
+class TestAppendBuffer(unittest.TestCase):
+    def setUp(self):
+        self.data = normalize_spotify_songs(pd.DataFrame({
+            'track_name': pd.array(['a', 'b'], dtype='string'),
+            'released_year': [2020, 2021],
+            'key': ['C#', 'B'],
+        }))
+        self.buffer = AppendBuffer(self.data)
+
+    def chunk(self, names, years, keys, start):
+        chunk = normalize_spotify_songs(pd.DataFrame({
+            'track_name': pd.array(names, dtype='string'),
+            'released_year': years,
+            'key': keys,
+        }))
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        return chunk
+
+    def test_appended_frames_match_concat(self):
+        first = self.buffer.append(self.chunk(['c'], [2022], ['A'], 2))
+        chunk = self.chunk(['d', None], [2023, 2024], [None, 'B'], 3)
+        second = self.buffer.append(chunk)
+        pd.testing.assert_frame_equal(second, pd.concat([first, chunk]))
+        # Rows appended later are not seen by a frame handed out earlier, nor written into the original
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first['track_name'].tolist(), ['a', 'b', 'c'])
+        self.assertEqual(len(self.data), 2)
+
+    def test_rows_are_written_into_spare_room(self):
+        for i in range(20):
+            data = self.buffer.append(self.chunk([f"t{i}"], [2000 + i], ['A'], 2 + i))
+        self.assertEqual(len(data), 22)
+        self.assertGreater(self.buffer.capacity, len(data))
+        more = self.buffer.append(self.chunk(['u'], [1999], ['B'], 22))
+        self.assertTrue(np.shares_memory(more['released_year'].to_numpy(), data['released_year'].to_numpy()))
+
+    def test_missing_value_makes_column_nullable(self):
+        data = self.buffer.append(self.chunk(['c'], [None], ['A'], 2))
+        self.assertEqual(data['released_year'].dtype, 'Int16')
+        self.assertEqual(data['released_year'].tolist(), [2020, 2021, pd.NA])
+
+    def test_different_columns_are_rejected(self):
+        with self.assertRaises(ValueError):
+            self.buffer.append(self.chunk(['c'], [2022], ['A'], 2).drop(columns='key'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+from ..instrumentation import NULL_STAGE, Instrumentation, describe
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        instrumentation = Instrumentation(enabled=False)
+        with instrumentation.stage('filter', rows=10) as stage:
+            stage.rows = 5
+        self.assertIs(instrumentation.stage('filter'), NULL_STAGE)
+        self.assertEqual(len(instrumentation.events), 0)
+        self.assertIsNone(instrumentation.last)
+
+    def test_nested_stages_and_summary(self):
+        instrumentation = Instrumentation(enabled=True)
+        with instrumentation.stage('load') as outer:
+            with instrumentation.stage('load: parse', rows=3):
+                pass
+            outer.rows = 3
+        self.assertEqual([event.name for event in instrumentation.events], ['load: parse', 'load'])
+        self.assertEqual(instrumentation.last.name, 'load')
+        self.assertEqual(instrumentation.last.rows, 3)
+        self.assertGreaterEqual(instrumentation.last.duration, instrumentation.events[0].duration)
+        self.assertEqual(instrumentation.summary()['load'][0], 1)
+        self.assertIn('load: ', describe(instrumentation.last))
+        self.assertIn('3 rows', describe(instrumentation.last))
+
+    def test_chrome_trace_and_profile(self):
+        instrumentation = Instrumentation(enabled=True)
+        out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, out_dir)
+        profile_path = os.path.join(out_dir, 'profile.prof')
+        instrumentation.profile_next(profile_path)
+        with instrumentation.stage('classify', rows=2):
+            sum(range(1000))
+        with instrumentation.stage('table'):
+            pass
+        self.assertIsNone(instrumentation.profile_path)
+        self.assertGreater(pstats.Stats(profile_path).total_calls, 0)
+
+        trace_path = instrumentation.export_chrome_trace(os.path.join(out_dir, 'trace.json'))
+        with open(trace_path, encoding='utf-8') as f:
+            trace = json.load(f)
+        events = trace['traceEvents']
+        self.assertEqual([event['name'] for event in events], ['classify', 'table'])
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['args']['rows'], 2)
+        self.assertLessEqual(events[0]['ts'] + events[0]['dur'], events[1]['ts'])
+
+
+if __name__ == '__main__':
+    unittest.main()
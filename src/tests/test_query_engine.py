@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ..query_engine import Predicate, QueryEngine, parse_query
+
+
+class TestQueryEngine(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'track_name': ['Seven', 'LALA', 'vampire', 'Cruel Summer', 'Flowers'],
+            'artist(s)_name': ['Latto, Jung Kook', 'Myke Towers', 'Olivia Rodrigo', 'Taylor Swift', 'Miley Cyrus'],
+            'released_year': pd.array([2023, 2023, 2023, 2019, 2023], dtype='Int16'),
+            'streams': pd.array([141381703, 133716286, None, 800840817, 1316855716], dtype='Int64'),
+            'key': pd.Categorical(['B', 'C#', 'F', None, None], categories=['B', 'C#', 'F']),
+            'danceability_%': np.array([80, 71, 51, 55, 71], dtype=np.uint8),
+        })
+        self.engine = QueryEngine(self.data)
+
+    def test_parse_query(self):
+        predicates = parse_query("streams > 1e9 and released_year between 2015 and 2020 and key in (C#, 'B') "
+                                 "and track_name contains 'cruel summer' and danceability_% = 71")
+        self.assertEqual(predicates, [
+            Predicate('streams', '>', 1e9),
+            Predicate('released_year', 'between', (2015, 2020)),
+            Predicate('key', 'in', ('C#', 'B')),
+            Predicate('track_name', 'contains', 'cruel summer'),
+            Predicate('danceability_%', '==', 71),
+        ])
+        self.assertEqual(parse_query("  "), [])
+        with self.assertRaises(ValueError):
+            parse_query("streams > 1 or bpm < 3")
+
+    def test_compound_query(self):
+        self.assertEqual(self.engine.search("streams > 5e8 and released_year >= 2020").tolist(), [4])
+        self.assertEqual(self.engine.search("danceability_% = 71 and key in (C#)").tolist(), [1])
+        self.assertEqual(self.engine.search("artist(s)_name contains ' s'").tolist(), [3])
+        self.assertEqual(len(self.engine.search("")), 5)
+
+    def test_missing_values_never_match(self):
+        self.assertEqual(self.engine.search("streams != 1").tolist(), [0, 1, 3, 4])
+        self.assertEqual(self.engine.search("key != B").tolist(), [1, 2])
+        self.assertEqual(self.engine.search("streams between 0 and 1e10").tolist(), [0, 1, 3, 4])
+
+    def test_masks_are_cached_per_version(self):
+        self.engine.search("released_year = 2023 and streams > 1e8")
+        self.engine.search("released_year = 2023 and streams > 1e8 and key = B")
+        self.assertEqual(len(self.engine.bitsets), 3)
+        version = self.engine.version
+        self.engine.set_data(self.data.iloc[:2])
+        self.assertEqual(self.engine.version, version + 1)
+        self.assertEqual(self.engine.bitsets, {})
+        self.assertEqual(self.engine.search("released_year = 2023").tolist(), [0, 1])
+
+    def test_bitset_cache_is_bounded(self):
+        engine = QueryEngine(self.data, cache_size=2)
+        engine.search("released_year = 2023")
+        engine.search("streams > 1e8")
+        engine.search("released_year = 2023")
+        engine.search("key = B")
+        self.assertEqual([predicate for _, predicate in engine.bitsets],
+                         [Predicate('released_year', '==', 2023), Predicate('key', '==', 'B')])
+
+    def test_invalid_predicates(self):
+        with self.assertRaises(ValueError):
+            self.engine.search("unknown > 1")
+        with self.assertRaises(ValueError):
+            self.engine.search("key > 3")
+        with self.assertRaises(ValueError):
+            self.engine.search("streams > many")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import asyncio
+import json
+import unittest
+import pandas as pd
+from ..query_service import QueryService, fetch, load_test
+
+
+class TestQueryService(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'track_name': pd.array(['Love Song', 'Other', 'Lovely', 'Track'], dtype='string'),
+            'artist(s)_name': pd.array(['Artist 1', 'Artist 1, Artist 2', 'Artist 2', 'Artist 3'], dtype='string'),
+            'artist_count': [1, 2, 1, 1],
+            'released_year': [2020, 2021, 2020, 2019],
+            'released_month': [1, 2, 3, 4],
+            'key': pd.Categorical(['C#', 'D', None, 'C#'], categories=['C#', 'D']),
+            'mode': pd.Categorical(['Major', 'Minor', 'Major', 'Major'], categories=['Major', 'Minor']),
+            'streams': pd.array([1000, 2000, None, 4000], dtype='Int64'),
+            'bpm': [100, 120, 90, 110],
+        })
+        self.service = QueryService(self.data, workers=2)
+
+    def tearDown(self):
+        self.service.close()
+
+    def query(self, path, **params):
+        status, body = asyncio.run(self.service.query(path, params))
+        return status, json.loads(body)
+
+    def test_filter_matches_the_explorer_filters(self):
+        status, result = self.query('/filter', column='track_name', text='love')
+        self.assertEqual(status, 200)
+        self.assertEqual(result['positions'], [0, 2])
+        self.assertIsNone(result['records'][1]['streams'])
+        self.assertIsNone(result['records'][1]['key'])
+        self.assertEqual(self.query('/filter', column='artist (exact)', text='artist 2')[1]['positions'], [1, 2])
+        self.assertEqual(self.query('/filter', column='query', text='streams >= 2000')[1]['rows'], 2)
+        self.assertEqual(self.query('/filter', column='query', text='streams >')[0], 400)
+        self.assertEqual(self.query('/filter', column='bpm')[0], 400)
+
+    def test_classify_and_aggregates(self):
+        status, result = self.query('/classify')
+        self.assertEqual(result['tracks'], {'Collaborative': 1, 'Solo': 3})
+        self.assertEqual(result['streams'], {'Collaborative': 2000, 'Solo': 5000})
+        rows = self.query('/aggregate', by='released_year', mode='Major')[1]['rows']
+        self.assertEqual([(row['released_year'], row['rows']) for row in rows], [(2019, 1), (2020, 2)])
+        self.assertEqual(self.query('/aggregate', by='streams')[0], 400)
+        self.assertEqual(self.query('/top_artists', n='1')[1]['artists'][0]['artist'], 'Artist 3')
+
+    def test_identical_queries_are_computed_once(self):
+        async def run():
+            return await asyncio.gather(*(self.service.query('/filter', {'text': 'artist'}) for _ in range(10)))
+
+        results = asyncio.run(run())
+        self.assertEqual(len({body for _, body in results}), 1)
+        self.assertEqual(self.service.stats['computed'], 1)
+        self.query('/filter', text='artist')
+        self.assertEqual(self.service.stats['cache_hits'], 1)
+
+    def test_cache_is_bounded_by_encoded_size(self):
+        _, small = asyncio.run(self.service.query('/filter', {'text': 'track'}))
+        _, large = asyncio.run(self.service.query('/filter', {'text': 'artist'}))
+        self.service.close()
+        self.service = QueryService(self.data, workers=1, cache_bytes=len(large))
+        # The large response fills the cache, so caching the small one evicts it
+        asyncio.run(self.service.query('/filter', {'text': 'artist'}))
+        asyncio.run(self.service.query('/filter', {'text': 'track'}))
+        self.assertEqual(list(self.service.cache), [('/filter', (('text', 'track'),))])
+        self.assertEqual(self.service.cached_bytes, len(small))
+        # A response larger than the whole cache is not kept
+        self.service.cache_bytes = len(small) - 1
+        asyncio.run(self.service.query('/filter', {'text': 'artist'}))
+        self.assertEqual(self.service.cached_bytes, len(small))
+
+    def test_http_round_trip_and_load_test(self):
+        async def run():
+            server = await asyncio.start_server(self.service.handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                responses = [await fetch(reader, writer, '/filter?column=track_name&text=love'),
+                             await fetch(reader, writer, '/missing')]
+                writer.close()
+                report = await load_test(['/classify', '/aggregate?by=key'], port=port, concurrency=4, requests=20)
+            return responses, report
+
+        (first, missing), report = asyncio.run(run())
+        self.assertEqual(first[0], 200)
+        self.assertEqual(json.loads(first[1])['rows'], 2)
+        self.assertEqual(missing[0], 404)
+        self.assertEqual(report['requests'], 20)
+        self.assertEqual(report['errors'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ..search_index import SearchIndex
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'artist(s)_name': ['Latto, Jung Kook', 'Myke Towers', 'Olivia Rodrigo', None, 'Jung Kook'],
+            'track_name': ['Seven', 'LALA', 'vampire', 'Unknown', 'Still With You'],
+            'released_year': [2023, 2023, 2021, 2019, 2020],
+        })
+        self.index = SearchIndex(self.data)
+
+    def expected(self, column, text):
+        mask = self.data[column].astype(str).str.contains(text, case=False, regex=False) & self.data[column].notna()
+        return np.flatnonzero(mask.to_numpy())
+
+    def test_search_matches_substring_scan(self):
+        for column, text in [('artist(s)_name', 'jung kook'), ('artist(s)_name', 'o'), ('track_name', 'VAMP'),
+                             ('track_name', 'la'), ('released_year', '202'), ('released_year', '2023')]:
+            np.testing.assert_array_equal(self.index.search(column, text), self.expected(column, text))
+
+    def test_search_without_match_is_empty(self):
+        self.assertEqual(len(self.index.search('track_name', 'xyz')), 0)
+
+    def test_search_empty_text_returns_all_rows(self):
+        self.assertEqual(len(self.index.search('track_name', '')), len(self.data))
+
+    def test_extended_index_matches_rebuilt_index(self):
+        self.index.build(['track_name', 'artist(s)_name', 'released_year'])
+        appended = pd.DataFrame({
+            'artist(s)_name': ['Jung Kook', None, 'New Artist', 'jung kook'],
+            'track_name': ['Seven', 'Vampire Weekend', 'Vamp', 'Seven (Remix)'],
+            'released_year': [2023, 2024, 2023, 2025],
+        })
+        data = pd.concat([self.data, appended], ignore_index=True)
+        extended = self.index.extended(data)
+        rebuilt = SearchIndex(data)
+        for column, text in [('artist(s)_name', 'jung kook'), ('artist(s)_name', 'new'), ('track_name', 'vamp'),
+                             ('track_name', 'seven'), ('track_name', 'remix'), ('released_year', '2024'),
+                             ('released_year', '202')]:
+            np.testing.assert_array_equal(extended.search(column, text), rebuilt.search(column, text))
+        # The original index still answers for the rows it was built on
+        np.testing.assert_array_equal(self.index.search('track_name', 'vamp'), [2])
+        trigram = self.index.index('track_name')
+        self.assertIsNone(trigram.lookup)
+        self.assertIsNotNone(trigram.uniques)
+        # Extending the original again does not see the values the first extension added
+        again = self.index.extended(data)
+        np.testing.assert_array_equal(again.search('track_name', 'remix'), rebuilt.search('track_name', 'remix'))
+
+
+if __name__ == '__main__':
+    unittest.main()
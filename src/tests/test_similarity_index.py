@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from ..similarity_index import FEATURE_COLUMNS, SimilarityIndex, similarity_index
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = pd.DataFrame({col: rng.integers(0, 100, 500) for col in FEATURE_COLUMNS})
+        self.data['bpm'] = self.data['bpm'] + 80
+        self.data['liveness_%'] = self.data['liveness_%'].astype('UInt8')
+        self.data.loc[3, 'liveness_%'] = pd.NA
+        self.index = SimilarityIndex(self.data)
+
+    def brute_force(self, position, k):
+        distances = np.sqrt(((self.index.features.astype(np.float64) - self.index.features[position]) ** 2).sum(1))
+        distances[position] = np.inf
+        return np.sort(distances)[:k]
+
+    def test_query_matches_brute_force_across_blocks(self):
+        positions = [0, 3, 499]
+        neighbours, distances = self.index.query(positions, 5)
+        self.assertEqual(neighbours.shape, (3, 5))
+        for row, position in enumerate(positions):
+            np.testing.assert_allclose(distances[row], self.brute_force(position, 5), atol=1e-4)
+            self.assertNotIn(position, neighbours[row])
+        blocked, _ = self.index.nearest(self.index.features[positions], 5, block_rows=64)
+        unblocked, _ = self.index.nearest(self.index.features[positions], 5)
+        np.testing.assert_array_equal(blocked, unblocked)
+
+    def test_many_queries_match_brute_force(self):
+        # Every track at once, with blocks smaller than the query count
+        features = self.index.features.astype(np.float64)
+        expected = np.sort(((features[:, None, :] - features[None, :, :]) ** 2).sum(2), axis=1)[:, :6]
+        for block_rows in [37, None]:
+            _, distances = self.index.nearest(self.index.features, 6, block_rows=block_rows)
+            # float32 cancellation leaves a track about 1e-3 from itself
+            np.testing.assert_allclose(distances, np.sqrt(expected), atol=5e-3)
+
+    def test_similar_excludes_the_playlist(self):
+        playlist = [10, 20, 30]
+        similar, distances = self.index.similar(playlist, 7)
+        self.assertEqual(len(similar), 7)
+        self.assertFalse(set(similar) & set(playlist))
+        self.assertTrue((np.diff(distances) >= 0).all())
+
+    def test_extended_scales_new_rows_like_the_old_ones(self):
+        base = SimilarityIndex(self.data.iloc[:400])
+        extended = base.extended(self.data.iloc[400:])
+        self.assertEqual(len(extended), 500)
+        np.testing.assert_array_equal(extended.features[:400], base.features)
+        np.testing.assert_allclose(extended.features[450], (self.data.iloc[450].to_numpy(dtype=np.float32)
+                                                            - base.mean) / base.scale, rtol=1e-5)
+        neighbours, _ = extended.query([450], 1)
+        self.assertLess(neighbours[0, 0], 500)
+
+    def test_persisted_index_is_reused_until_the_file_changes(self):
+        fd, file_path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            first = similarity_index(self.data, file_path)
+            second = similarity_index(self.data, file_path)
+            np.testing.assert_array_equal(first.features, second.features)
+            self.assertIsNotNone(SimilarityIndex.load(os.path.splitext(file_path)[0] + '.similarity.npz',
+                                                      np.array([0, os.stat(file_path).st_mtime_ns, 500])))
+            self.assertIsNone(SimilarityIndex.load(os.path.splitext(file_path)[0] + '.similarity.npz',
+                                                   np.array([1, 0, 500])))
+        finally:
+            os.remove(file_path)
+            os.remove(os.path.splitext(file_path)[0] + '.similarity.npz')
+
+
+if __name__ == '__main__':
+    unittest.main()
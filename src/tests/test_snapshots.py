@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+import numpy as np
+import pandas as pd
+from ..data_loader import load_spotify_songs
+from ..snapshots import SnapshotSeries, load_snapshots, snapshot_date, snapshot_files
+from ..synthetic_data import write_spotify_csv
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['track_name', 'artist(s)_name', 'bpm', 'streams', 'in_spotify_playlists',
+                                       'in_apple_playlists', 'in_deezer_playlists'])
+
+
+class TestSnapshotSeries(unittest.TestCase):
+    def setUp(self):
+        first = frame([['A', 'X', 100, 10, 1, 1, 1],
+                       ['B', 'Y', 120, 20, 2, 2, 2]])
+        # B is listed twice and gets a new bpm, A is gone and C is new
+        second = frame([['B', 'Y', 125, 25, 3, 2, 2],
+                        ['B', 'Y', 125, 5, 1, 0, 0],
+                        ['C', 'Z', 90, 7, 1, 1, 1]])
+        self.series = SnapshotSeries([date(2024, 1, 1), date(2024, 1, 8)], [first, second])
+
+    def test_tracks_keep_latest_attributes(self):
+        tracks = self.series.tracks.set_index('track_name')
+        self.assertEqual(list(tracks.index), ['A', 'B', 'C'])
+        self.assertEqual(tracks.loc['B', 'bpm'], 125)
+        self.assertEqual(tracks.loc['A', 'last_snapshot'], np.datetime64('2024-01-01'))
+        self.assertNotIn('streams', tracks.columns)
+
+    def test_duplicates_in_a_snapshot_are_summed(self):
+        # A and B in the first snapshot, B and C in the second
+        self.assertEqual(len(self.series), 4)
+        np.testing.assert_array_equal(self.series.fact_tracks, [0, 1, 1, 2])
+        np.testing.assert_array_equal(self.series.fact_snapshots, [0, 0, 1, 1])
+        np.testing.assert_array_equal(self.series.measures['streams'], [10, 20, 30, 7])
+        self.assertEqual(self.series.measures['streams'].dtype, np.int64)
+
+    def test_totals_and_deltas(self):
+        np.testing.assert_array_equal(self.series.totals('streams').to_numpy(), [30, 37])
+        # Only B is in both snapshots; A leaving and C entering do not move the change
+        np.testing.assert_array_equal(self.series.total_deltas('streams').to_numpy(), [10])
+        deltas = self.series.deltas('in_spotify_playlists')
+        self.assertEqual(deltas.values.tolist(), [[1, 1, 2]])
+        self.assertEqual(list(self.series.movers('streams').index), ['B - Y'])
+
+    def test_deltas_ignore_churn(self):
+        # 99 shared tracks gain 1000 streams each; one large track leaves and another enters
+        shared = [[f"T{i}", 'X', 100, 10_000_000 * (i + 1), 1, 1, 1] for i in range(99)]
+        first = frame(shared + [['Old', 'Y', 100, 900_000_000, 5, 5, 5]])
+        second = frame([[name, artist, bpm, streams + 1000, 2, 1, 1]
+                        for name, artist, bpm, streams, *_ in shared] + [['New', 'Z', 100, 1_500_000_000, 9, 9, 9]])
+        series = SnapshotSeries([date(2024, 1, 1), date(2024, 1, 8)], [first, second])
+        np.testing.assert_array_equal(series.total_deltas('streams').to_numpy(), [99_000])
+        np.testing.assert_array_equal(series.total_deltas('in_spotify_playlists').to_numpy(), [99])
+
+    def test_deltas_skip_missing_values_and_gaps(self):
+        # A is missing from the second snapshot and B has no streams there, so only C changes in both steps
+        first = frame([['A', 'X', 100, 10, 1, 1, 1], ['B', 'Y', 100, 20, 1, 1, 1], ['C', 'Z', 100, 30, 1, 1, 1]])
+        second = frame([['B', 'Y', 100, None, 1, 1, 1], ['C', 'Z', 100, 35, 1, 1, 1]])
+        third = frame([['A', 'X', 100, 50, 1, 1, 1], ['B', 'Y', 100, 26, 1, 1, 1], ['C', 'Z', 100, 45, 1, 1, 1]])
+        series = SnapshotSeries([date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15)], [first, second, third])
+        np.testing.assert_array_equal(series.total_deltas('streams').to_numpy(), [5, 10])
+        self.assertEqual(list(series.movers('streams').index), ['C - Z'])
+
+    def test_latest_has_the_export_layout(self):
+        latest = self.series.latest()
+        self.assertEqual(list(latest.columns), list(frame([]).columns) + ['snapshot'])
+        self.assertEqual(list(latest['track_name']), ['B', 'C'])
+        self.assertEqual(list(latest['streams']), [30, 7])
+        self.assertTrue((latest['snapshot'] == np.datetime64('2024-01-08')).all())
+
+
+class TestLoadSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for seed, name in enumerate(['songs_2024-01-15.csv', 'songs_20240101.csv', 'songs_2024-01-08.csv']):
+            write_spotify_csv(os.path.join(self.dir, name), 300, seed=seed)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_files_are_ordered_by_date(self):
+        files = [os.path.basename(path) for path in snapshot_files(self.dir)]
+        self.assertEqual(files, ['songs_20240101.csv', 'songs_2024-01-08.csv', 'songs_2024-01-15.csv'])
+        self.assertEqual(snapshot_date(os.path.join(self.dir, files[0])), date(2024, 1, 1))
+
+    def test_totals_match_the_parsed_files(self):
+        progress = []
+        series = load_snapshots(self.dir, workers=1, on_progress=progress.append)
+        self.assertEqual(progress[-1], 1.0)
+        expected = [load_spotify_songs(path, cache=False)[0]['streams'].sum() for path in snapshot_files(self.dir)]
+        np.testing.assert_allclose(series.totals('streams').to_numpy(), expected)
+
+    def test_process_pool_matches_serial_load(self):
+        serial = load_snapshots(self.dir, workers=1)
+        pooled = load_snapshots(self.dir, workers=2)
+        pd.testing.assert_frame_equal(pooled.latest(), serial.latest())
+        self.assertEqual(pooled.issues, serial.issues)
+
+    def test_empty_directory(self):
+        empty = os.path.join(self.dir, 'empty')
+        os.mkdir(empty)
+        with self.assertRaises(FileNotFoundError):
+            load_snapshots(empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from ..sort_index import SortIndex
+
+
+class TestSortIndex(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.DataFrame({
+            'track_name': pd.array(['b', 'a', None, 'c', 'a'], dtype='string'),
+            'streams': pd.array([300, 100, 200, None, 100], dtype='Int64'),
+            'key': pd.Categorical(['D', 'C#', 'D', None, 'C#'], categories=['C#', 'D']),
+        })
+        self.index = SortIndex(self.data)
+
+    def test_single_key_is_stable_with_missing_last(self):
+        self.assertEqual(self.index.order([('streams', True)]).tolist(), [1, 4, 2, 0, 3])
+        self.assertEqual(self.index.order([('streams', False)]).tolist(), [0, 2, 1, 4, 3])
+        self.assertEqual(self.index.order([('track_name', False)]).tolist(), [3, 0, 1, 4, 2])
+
+    def test_multiple_keys(self):
+        self.assertEqual(self.index.order([('key', True), ('track_name', False)]).tolist(), [1, 4, 0, 2, 3])
+        self.assertEqual(self.index.order([('key', False), ('streams', False)]).tolist(), [0, 2, 1, 4, 3])
+
+    def test_filtered_view_matches_full_order(self):
+        positions = np.array([3, 0, 4])
+        full = self.index.order([('streams', True)]).tolist()
+        self.assertEqual(self.index.order([('streams', True)], positions).tolist(),
+                         [p for p in full if p in positions])
+        # Sorted directly when the order is not cached and the view is small
+        fresh = SortIndex(self.data)
+        fresh.order([('streams', True)], positions)
+        self.assertEqual(self.index.order([('streams', True)], positions).tolist(),
+                         fresh.order([('streams', True)], positions).tolist())
+
+    def test_orders_are_cached_up_to_cache_size(self):
+        index = SortIndex(self.data, cache_size=1)
+        first = index.order([('streams', True)])
+        self.assertIs(index.order([('streams', True)]), first)
+        index.order([('streams', False)])
+        self.assertEqual(list(index.orders), [(('streams', False),)])
+
+    def test_extended_index_matches_rebuilt_index(self):
+        sort_keys = [('key', True), ('track_name', False)]
+        self.index.order(sort_keys)
+        self.index.order([('streams', False)])
+        appended = pd.DataFrame({
+            'track_name': pd.array(['aa', None, 'b', 'd'], dtype='string'),
+            'streams': pd.array([150, 100, None, 500], dtype='Int64'),
+            'key': pd.Categorical(['D', 'C#', None, 'D'], categories=['C#', 'D']),
+        })
+        data = pd.concat([self.data, appended], ignore_index=True)
+        extended = self.index.extended(data)
+        rebuilt = SortIndex(data)
+        for keys in [sort_keys, [('streams', False)], [('track_name', True)], [('streams', True), ('key', False)]]:
+            self.assertEqual(extended.order(keys).tolist(), rebuilt.order(keys).tolist())
+        for column in ['key', 'track_name', 'streams']:
+            np.testing.assert_array_equal(extended.rank(column), rebuilt.rank(column))
+
+    def test_orders_are_shared_between_threads(self):
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({column: rng.integers(0, 50, 20000) for column in 'abc'})
+        index = SortIndex(data.iloc[:15000], cache_size=2)
+        all_keys = [((column, ascending),) for column in 'abc' for ascending in (True, False)]
+
+        # Orders are computed, cached and evicted while other threads extend the index
+        def work(i):
+            keys = all_keys[i % len(all_keys)]
+            if i % 5 == 0:
+                return keys, True, index.extended(data).order(keys)
+            return keys, False, index.order(keys)
+
+        expected = {False: SortIndex(data.iloc[:15000]), True: SortIndex(data)}
+        with ThreadPoolExecutor(4) as executor:
+            for keys, appended, order in executor.map(work, range(120)):
+                self.assertEqual(order.tolist(), expected[appended].order(keys).tolist())
+        self.assertLessEqual(len(index.orders), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
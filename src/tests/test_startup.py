@@ -0,0 +1,34 @@
+import json
+import os
+import tempfile
+import unittest
+from ..startup import StartupTimer
+
+
+class TestStartupTimer(unittest.TestCase):
+    def test_marks_and_budget(self):
+        timer = StartupTimer(start=0.0)
+        timer.marks = {'window': 0.1, 'data': 9.0}
+        timer.mark('window')
+        self.assertEqual(timer.marks['window'], 0.1)
+        self.assertEqual(timer.over_budget({'window': 0.3, 'data': 2.5}), {'data': (9.0, 2.5)})
+
+    def test_write_appends_json_lines(self):
+        fd, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(fd)
+        try:
+            timer = StartupTimer()
+            timer.mark('window')
+            timer.write(path)
+            timer.write(path)
+            with open(path, encoding='utf-8') as f:
+                reports = [json.loads(line) for line in f]
+        finally:
+            os.remove(path)
+        self.assertEqual(len(reports), 2)
+        self.assertIn('window', reports[0]['marks'])
+        self.assertIn('budget', reports[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from ..aggregate_cube import AggregateCube
+from ..artist_index import ArtistIndex
+from ..column_store import ColumnStore, store_dir
+from ..data_loader import SpotifyDataLoader, SPOTIFY_SCHEMA
+from ..streaming import TopArtistsAccumulator, stream_spotify_songs
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        header = ",".join(SPOTIFY_SCHEMA)
+        rows = []
+        for i in range(40):
+            artists = f'"Artist {i % 7}, Artist {i % 3}"' if i % 4 == 0 else f"Artist {i % 5}"
+            streams = "BPM110KeyA" if i == 13 else str(1000 * (i + 1))
+            key = ['C#', 'B', '', 'A'][i % 4]
+            rows.append(f"Song {i},{artists},{2 if i % 4 == 0 else 1},{2015 + i % 6},{1 + i % 12},1,10,0,{streams},"
+                        f"1,1,\"1,{i:03d}\",1,1,{90 + i},{key},{'Major' if i % 2 else 'Minor'},71,61,74,7,0,10,4")
+        fd, self.file_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write("\n".join([header] + rows) + "\n")
+        self.data = SpotifyDataLoader(self.file_path).load()
+
+    def tearDown(self):
+        os.remove(self.file_path)
+        shutil.rmtree(store_dir(self.file_path), ignore_errors=True)
+
+    def test_chunked_cube_matches_full_load(self):
+        summary, loader = stream_spotify_songs(self.file_path, chunk_size=7)
+        self.assertEqual(summary.rows, 40)
+        self.assertEqual(len(loader.issues), 1)
+        self.assertIn('Row 15', loader.issues[0])
+        expected = AggregateCube(self.data).rollup(['released_year', 'key'])
+        actual = summary.cube.rollup(['released_year', 'key'])
+        self.assertEqual(actual['streams_sum'].to_dict(), expected['streams_sum'].to_dict())
+        self.assertEqual(actual['rows'].to_dict(), expected['rows'].to_dict())
+
+    def test_streaming_writes_column_store(self):
+        self.assertFalse(ColumnStore(self.file_path).current())
+        summary, loader = stream_spotify_songs(self.file_path, chunk_size=7, cache=True)
+        store = ColumnStore(self.file_path)
+        self.assertTrue(store.current())
+        # Only one chunk has the invalid streams value, yet the whole column comes back nullable
+        data, manifest = store.open()
+        text = {'track_name': 'string', 'artist(s)_name': 'string'}
+        pd.testing.assert_frame_equal(data.astype(text), self.data)
+        self.assertEqual(manifest['issues'], loader.issues)
+        reopened = SpotifyDataLoader(self.file_path)
+        pd.testing.assert_frame_equal(reopened.load(cache=True).astype(text), self.data)
+        self.assertEqual(reopened.issues, loader.issues)
+
+    def test_streamed_artist_totals_match_index(self):
+        summary, loader = stream_spotify_songs(self.file_path, chunk_size=7)
+        expected = ArtistIndex(self.data['artist(s)_name'], self.data['artist_count']).top(self.data['streams'], 5)
+        actual = summary.top_artists.top(n=5)
+        self.assertEqual(actual.to_dict(), expected.to_dict())
+
+    def test_sample_is_bounded_and_keeps_hits(self):
+        summary, loader = stream_spotify_songs(self.file_path, chunk_size=7, sample_size=10)
+        rows = summary.sample.rows()
+        self.assertLessEqual(len(rows), 10 + summary.sample.hits)
+        self.assertIn(self.data['streams'].idxmax(), rows.index)
+        self.assertTrue(rows.index.is_monotonic_increasing)
+
+    def test_accumulator_reports_eviction_error(self):
+        accumulator = TopArtistsAccumulator(capacity=2)
+        accumulator.totals = {'a': 5.0, 'b': 3.0, 'c': 1.0, 'd': 2.0}
+        accumulator.trim()
+        self.assertEqual(set(accumulator.totals), {'a', 'b'})
+        self.assertEqual(accumulator.error, 3.0)
+        # c comes back and is dropped again, so it is now undercounted by 2.0, still within the error
+        accumulator.totals.update({'c': 1.0, 'e': 0.5})
+        accumulator.trim()
+        self.assertEqual(accumulator.error, 4.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
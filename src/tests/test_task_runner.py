@@ -0,0 +1,57 @@
+import time
+import unittest
+from ..task_runner import TaskRunner
+
+
+class FakeRoot:
+    # Stands in for Tk's after() scheduling so the runner can be driven without a display
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, func, *args):
+        self.callbacks.append((func, args))
+
+    def run(self, timeout=5):
+        end = time.time() + timeout
+        while self.callbacks and time.time() < end:
+            func, args = self.callbacks.pop(0)
+            func(*args)
+            time.sleep(0.001)
+
+
+class TestTaskRunner(unittest.TestCase):
+    def setUp(self):
+        self.root = FakeRoot()
+        self.runner = TaskRunner(self.root)
+        self.results = []
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_result_is_delivered(self):
+        self.runner.submit('filter', lambda: 42, self.results.append)
+        self.root.run()
+        self.assertEqual(self.results, [42])
+
+    def test_superseded_task_is_dropped(self):
+        self.runner.submit('filter', lambda: time.sleep(0.05) or 'old', self.results.append)
+        self.runner.submit('filter', lambda: 'new', self.results.append)
+        self.root.run()
+        self.assertEqual(self.results, ['new'])
+
+    def test_error_is_reported(self):
+        self.runner.submit('filter', lambda: 1 / 0, self.results.append, self.results.append)
+        self.root.run()
+        self.assertIsInstance(self.results[0], ZeroDivisionError)
+
+    def test_busy_callback(self):
+        busy = []
+        self.runner.on_busy = busy.append
+        self.runner.submit('filter', lambda: 1, self.results.append)
+        self.runner.submit('classify', lambda: 2, self.results.append)
+        self.root.run()
+        self.assertEqual(busy, [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import gc
+import unittest
+import weakref
+import numpy as np
+import pandas as pd
+from ..visualization import Visualization, stratified_sample
+
+
+class TestStratifiedSample(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # A dense cluster plus a few isolated outliers
+        self.x = np.concatenate([rng.normal(50, 1, 100000), [0, 100, 100]])
+        self.y = np.concatenate([rng.normal(50, 1, 100000), [0, 0, 100]])
+
+    def test_sample_is_bounded(self):
+        sample = stratified_sample(self.x, self.y, 2000)
+        self.assertLessEqual(len(sample), 2000)
+        self.assertEqual(len(np.unique(sample)), len(sample))
+
+    def test_sample_keeps_outliers(self):
+        sample = stratified_sample(self.x, self.y, 2000)
+        self.assertTrue(set(range(100000, 100003)) <= set(sample.tolist()))
+
+    def test_small_input_is_kept_whole(self):
+        self.assertEqual(len(stratified_sample(self.x[:10], self.y[:10], 2000)), 10)
+
+
+class TestFigureReuse(unittest.TestCase):
+    def setUp(self):
+        self.visualization = Visualization(None, cache_size=2)
+        self.data = pd.DataFrame({
+            'released_year': [2020, 2021, 2022, 2022],
+            'released_month': [1, 2, 3, 4],
+            'key': pd.Categorical(['C#', 'B', 'C#', 'B']),
+            'mode': pd.Categorical(['Major', 'Minor', 'Major', 'Major']),
+            'artist_count': [1, 2, 1, 1],
+            'streams': [10, 20, 30, 40],
+            'bpm': [100, 120, 140, 160],
+            'danceability_%': [50, 60, 70, 80],
+            'energy_%': [40, 50, 60, 70],
+        })
+
+    def test_reused_figure_is_updated_in_place(self):
+        visualization = self.visualization
+        figure = visualization.prepare(visualization.draw_key_vs_streams, self.data)
+        bars = visualization.artists[figure]['bars']
+        changed = self.data.assign(streams=[100, 200, 300, 400])
+        self.assertIs(visualization.prepare(visualization.draw_key_vs_streams, changed, figure=figure), figure)
+        self.assertIs(visualization.artists[figure]['bars'], bars)
+        self.assertEqual(sorted(bar.get_height() for bar in bars), [400, 600])
+
+    def test_scatter_points_are_updated_in_place(self):
+        visualization = self.visualization
+        figure = visualization.prepare(visualization.draw_danceability_vs_energy, self.data)
+        points = visualization.artists[figure]['points']
+        visualization.prepare(visualization.draw_danceability_vs_energy, self.data.iloc[:2], figure=figure)
+        self.assertIs(visualization.artists[figure]['points'], points)
+        self.assertEqual(len(points.get_offsets()), 2)
+
+    def test_bounded_scatter_of_no_rows_is_empty(self):
+        for mode in ('density', 'sample'):
+            visualization = Visualization(None, scatter_mode=mode)
+            figure = visualization.prepare(visualization.draw_danceability_vs_energy, self.data.iloc[:0])
+            self.assertEqual(len(visualization.artists[figure]['points'].get_offsets()), 0)
+
+    def test_density_cache_does_not_keep_old_data_alive(self):
+        visualization = Visualization(None, scatter_mode='density')
+        figure = visualization.prepare(visualization.draw_danceability_vs_energy, self.data)
+        histogram = visualization.density_cache[('danceability_%', 'energy_%')][1]
+        visualization.prepare(visualization.draw_danceability_vs_energy, self.data, figure=figure)
+        self.assertIs(visualization.density_cache[('danceability_%', 'energy_%')][1], histogram)
+        old = weakref.ref(self.data)
+        self.data = self.data.assign(streams=[1, 2, 3, 4])
+        visualization.prepare(visualization.draw_danceability_vs_bpm, self.data, figure=figure)
+        gc.collect()
+        self.assertIsNone(old())
+        self.assertEqual(list(visualization.density_cache), [('danceability_%', 'bpm')])
+
+    def test_empty_artist_index_is_used_as_given(self):
+        class NoArtists:
+            # Falsy like an ArtistIndex without artists
+            def __len__(self):
+                return 0
+
+            def top(self, streams, n, weighting):
+                return pd.Series([5e6], index=['From the index'])
+
+        figure = self.visualization.prepare(self.visualization.draw_top_artists_by_streams, self.data, NoArtists())
+        self.assertEqual([bar.get_height() for bar in self.visualization.artists[figure]['bars']], [5.0])
+
+    def test_rendered_charts_are_cached_lru(self):
+        visualization = self.visualization
+        first = visualization.prepare(visualization.draw_key_vs_streams, self.data)
+        visualization.show(first, ('Key', 0))
+        visualization.show(visualization.prepare(visualization.draw_mode_vs_streams, self.data), ('Mode', 0))
+        self.assertTrue(visualization.show_cached(('Key', 0)))
+        self.assertIs(visualization.figure, first)
+        visualization.show(visualization.prepare(visualization.draw_streams_by_year, self.data), ('Year', 0))
+        self.assertFalse(visualization.show_cached(('Mode', 0)))
+        # Only an older version of a chart that is not on screen is handed out for reuse
+        self.assertIsNone(visualization.reusable(('Year', 1)))
+        self.assertIs(visualization.reusable(('Key', 1)), first)
+        self.assertFalse(visualization.show_cached(('Key', 0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+import numpy as np
+from tkinter import ttk
+
+
+class VirtualTable:
+    # Keeps only the visible window of rows (plus a small overscan) materialized in a ttk.Treeview.
+    # Rows are filled from the underlying column arrays as the scrollbar or mouse wheel moves.
+    def __init__(self, tree, vsb, overscan=5):
+        self.tree = tree
+        self.vsb = vsb
+        self.overscan = overscan
+        self.columns = list(tree['columns'])
+
+        self.data = None
+        self.arrays = [np.empty(0, dtype=object) for _ in self.columns]
+        self.view = np.arange(0)
+        self.first = 0
+        self.items = []
+        # Selected rows as data positions: items are reused as the view scrolls, so the Treeview's own
+        # selection would stay on an item while the row drawn in it changes
+        self.selected = set()
+
+        # The scrollbar drives our window offset instead of the Treeview's own yview
+        self.vsb.configure(command=self.yview)
+        self.tree.configure(yscrollcommand='')
+        self.tree.bind('<Configure>', lambda event: self.refresh())
+        self.tree.bind('<MouseWheel>', self.on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+        self.tree.bind('<<TreeviewSelect>>', lambda event: self.on_select())
+        # The keys move the focused row through the whole view; left to the Treeview they would stop at the
+        # last materialized item
+        self.tree.bind('<Up>', lambda event: self.move_focus(-1))
+        self.tree.bind('<Down>', lambda event: self.move_focus(1))
+        self.tree.bind('<Prior>', lambda event: self.move_focus(-self.visible_rows()))
+        self.tree.bind('<Next>', lambda event: self.move_focus(self.visible_rows()))
+
+    def set_data(self, data):
+        # Column arrays are the DataFrame's own backing arrays, so this does not copy the rows
+        self.data = data
+        self.arrays = self.column_arrays(data)
+        self.selected = set()
+        self.set_view(None)
+
+    def extend_data(self, data, positions=None):
+        # Swap in data with rows appended after the current ones, keeping the scroll position
+        self.data = data
+        self.arrays = self.column_arrays(data)
+        self.view = np.arange(len(data)) if positions is None else np.asarray(positions)
+        self.keep_selection_in_view()
+        self.refresh()
+
+    def column_arrays(self, data):
+        return [data[col].array if col in data.columns else np.full(len(data), '', dtype=object)
+                for col in self.columns]
+
+    def set_view(self, positions):
+        # positions: row positions into the current data to display, in order; None shows every row
+        if positions is None:
+            positions = np.arange(len(self.arrays[0]) if self.arrays else 0)
+        self.view = np.asarray(positions)
+        self.first = 0
+        self.keep_selection_in_view()
+        self.refresh()
+
+    def __len__(self):
+        return len(self.view)
+
+    def visible_rows(self):
+        height = self.tree.winfo_height()
+        rows = int(self.tree.cget('height'))
+        if height > 1:
+            rows = max(1, height // self.row_height())
+        return rows
+
+    def row_height(self):
+        return int(ttk.Style(self.tree).lookup('Treeview', 'rowheight') or 20)
+
+    def max_first(self):
+        return max(0, len(self.view) - self.visible_rows())
+
+    def refresh(self):
+        visible = self.visible_rows()
+        self.first = min(max(self.first, 0), self.max_first())
+        window = min(len(self.view) - self.first, visible + self.overscan)
+
+        # Grow or shrink the pool of Treeview items to the window size, then reuse them in place
+        while len(self.items) < window:
+            self.items.append(self.tree.insert("", "end", values=()))
+        while len(self.items) > window:
+            self.tree.delete(self.items.pop())
+
+        positions = self.view[self.first:self.first + window]
+        for item, position in zip(self.items, positions):
+            self.tree.item(item, values=[array[position] for array in self.arrays])
+        # Select the items now drawing selected rows
+        selected = [item for item, position in zip(self.items, positions.tolist()) if position in self.selected]
+        if set(selected) != set(self.tree.selection()):
+            self.tree.selection_set(selected)
+
+        total = len(self.view)
+        if total:
+            self.vsb.set(self.first / total, min(1.0, (self.first + visible) / total))
+        else:
+            self.vsb.set(0.0, 1.0)
+
+    def row_position(self, item):
+        # Map a materialized Treeview item back to the row position it currently draws
+        return self.view[self.first + self.items.index(item)]
+
+    def on_select(self):
+        # Selected rows outside the window keep their selection; those in it follow the Treeview
+        drawn = dict(zip(self.items, self.view[self.first:self.first + len(self.items)].tolist()))
+        chosen = {drawn[item] for item in self.tree.selection() if item in drawn}
+        self.selected = (self.selected - set(drawn.values())) | chosen
+
+    def keep_selection_in_view(self):
+        # Rows filtered out of the view are deselected rather than acted on while hidden
+        if self.selected:
+            selected = np.fromiter(self.selected, dtype=np.int64, count=len(self.selected))
+            self.selected = set(selected[np.isin(selected, self.view)].tolist())
+
+    def selected_positions(self):
+        return np.array(sorted(self.selected), dtype=np.int64)
+
+    def focused_index(self):
+        # Index into the view of the row drawn in the focused item, None when no row has the focus
+        focus = self.tree.focus()
+        return self.first + self.items.index(focus) if focus in self.items else None
+
+    def move_focus(self, rows):
+        # Focus and select the row rows away from the focused one, scrolling the window to keep it visible
+        if not len(self.view):
+            return 'break'
+        index = self.focused_index()
+        # The first key press focuses the first row shown
+        index = self.first if index is None else min(max(index + rows, 0), len(self.view) - 1)
+        visible = self.visible_rows()
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + visible:
+            self.first = index - visible + 1
+        self.selected = {int(self.view[index])}
+        self.refresh()
+        self.tree.focus(self.items[index - self.first])
+        return 'break'
+
+    def scroll(self, rows):
+        self.first = min(max(self.first + rows, 0), self.max_first())
+        self.refresh()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.first = min(int(float(args[1]) * len(self.view)), self.max_first())
+            self.refresh()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows()
+            self.scroll(amount)
+
+    def on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
@@ -1,212 +1,485 @@
+import weakref
+from collections import OrderedDict
 from tkinter import messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import numpy as np
 import pandas as pd
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from aggregate_cube import AggregateCube
+from artist_index import ArtistIndex
+from instrumentation import INSTRUMENTATION
+
+
+# Scatter plots above this many points switch from one marker per row to a bounded rendering
+SCATTER_POINT_LIMIT = 50000
+SCATTER_MODES = ['auto', 'points', 'density', 'sample']
+# Number of top-streamed songs always drawn as individual markers in the bounded modes
+SCATTER_HITS = 50
+# Rendered charts kept for instant redisplay; each holds a figure and a canvas-sized RGBA bitmap
+FIGURE_CACHE_SIZE = 8
+
+
+def column_values(data, col):
+    return data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def histogram_edges(values, bins):
+    # Whole-number columns such as the _% features get one bin per value instead of striped bins
+    if len(values) and np.all(values == np.round(values)) and values.max() - values.min() < bins:
+        return np.arange(values.min() - 0.5, values.max() + 1.5)
+    return bins
+
+
+def stratified_sample(x, y, limit, grid=64, seed=0):
+    # Positions of at most limit points, taking an equal share from every occupied cell of a grid x grid
+    # binning so sparse regions and outliers survive while dense regions are thinned.
+    if len(x) <= limit:
+        return np.arange(len(x))
+    x_bins = np.digitize(x, np.linspace(x.min(), x.max(), grid + 1)[1:-1])
+    y_bins = np.digitize(y, np.linspace(y.min(), y.max(), grid + 1)[1:-1])
+    cells = x_bins * grid + y_bins
+
+    # Rank every point within its cell in random order
+    shuffled = np.random.default_rng(seed).permutation(len(x))
+    order = shuffled[np.argsort(cells[shuffled], kind='stable')]
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.concatenate(([True], sorted_cells[1:] != sorted_cells[:-1])))
+    counts = np.diff(np.append(starts, len(order)))
+    ranks = np.arange(len(order)) - np.repeat(starts, counts)
+
+    # Largest per-cell quota that keeps the total within limit
+    low, high = 1, int(counts.max())
+    while low < high:
+        quota = (low + high + 1) // 2
+        if np.minimum(counts, quota).sum() <= limit:
+            low = quota
+        else:
+            high = quota - 1
+    return np.sort(order[ranks < low])
 
 
 class Visualization:
-    def __init__(self, parent):
-        self.figure = plt.Figure(figsize=(12, 7), dpi=100)
-        self.canvas = FigureCanvasTkAgg(self.figure, parent)
-        self.canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+    def __init__(self, parent, scatter_mode='auto', scatter_point_limit=SCATTER_POINT_LIMIT,
+                 cache_size=FIGURE_CACHE_SIZE):
+        self.figure = Figure(figsize=(12, 7), dpi=100)
+        if parent is None:
+            # Headless: charts are rendered with Agg and saved to files
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, parent)
+            self.canvas.get_tk_widget().grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+
+        self.scatter_mode = scatter_mode
+        self.scatter_point_limit = scatter_point_limit
+        # 2D histograms per (x, y) column pair, reused while the same dataset is plotted. The dataset is only
+        # referenced weakly, so a cache entry never keeps a replaced dataset alive.
+        self.density_cache = {}
+        # Per figure: the layout it was drawn with and its data artists, so a redraw can update them in place
+        self.artists = weakref.WeakKeyDictionary()
+        # LRU of rendered charts: key -> [figure, bitmap, canvas size]. Keys are (chart, data version) tuples.
+        self.cache_size = cache_size
+        self.figure_cache = OrderedDict()
 
-    def plot_streams_by_year(self, spotify_songs):
+    def plot(self, draw, label, *args):
+        # Draw a chart into the embedded figure on the calling (Tk) thread
         try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['released_year'] = pd.to_numeric(spotify_songs['released_year'], errors='coerce')
-            spotify_songs['streams'] = pd.to_numeric(spotify_songs['streams'], errors='coerce')
-            spotify_songs.groupby('released_year')['streams'].sum().plot(kind='bar', ax=ax)
-            ax.set_title('Total Streams by Release Year')
-            ax.set_xlabel('Year')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
+            # Artists of the chart already on screen are updated in place when the layout matches,
+            # so any cached bitmap of this figure goes stale
+            for key in [key for key, entry in self.figure_cache.items() if entry[0] is self.figure]:
+                del self.figure_cache[key]
+            # Another chart starts from an empty figure
+            if self.artists.get(self.figure, {}).get('chart') != draw.__name__:
+                self.figure.clear()
+                self.artists.pop(self.figure, None)
+            with INSTRUMENTATION.stage(f"chart: {draw.__name__}"):
+                draw(self.figure, *args)
+            self.artists[self.figure]['chart'] = draw.__name__
+            with INSTRUMENTATION.stage('chart: render'):
+                self.canvas.draw()
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting streams by year: {e}")
+            messagebox.showerror("Error", f"An error occurred while plotting {label}: {e}")
 
-    def plot_top_artists_by_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['streams'] = pd.to_numeric(spotify_songs['streams'], errors='coerce')
-            top_artists = spotify_songs.groupby('artist(s)_name')['streams'].sum().nlargest(10) / 1e6
-            top_artists.plot(kind='bar', ax=ax)
-            ax.set_title('Top 10 Artists by Streams')
-            ax.set_xlabel('Artist')
-            ax.set_ylabel('Streams (in millions)')
-            ax.set_xticklabels(top_artists.index, rotation=30, ha='right', fontsize=10)
+    def prepare(self, draw, *args, figure=None):
+        # Build a chart into a detached figure, or update a figure from reusable() in place.
+        # Touches no Tk state, so it can run on a worker thread.
+        if figure is None:
+            figure = Figure(figsize=self.figure.get_size_inches(), dpi=self.figure.dpi)
+        with INSTRUMENTATION.stage(f"chart: {draw.__name__}"):
+            draw(figure, *args)
+        return figure
+
+    def show(self, figure, key=None):
+        # Swap a figure built by prepare() onto the canvas; must run on the Tk thread.
+        # With a key, the rendered bitmap is cached so show_cached(key) can redisplay it without rendering.
+        self.figure = figure
+        figure.set_canvas(self.canvas)
+        self.canvas.figure = figure
+        with INSTRUMENTATION.stage('chart: render'):
             self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting top artists by streams: {e}")
+        if key is not None:
+            self.figure_cache[key] = [figure, self.canvas.copy_from_bbox(figure.bbox), self.canvas.get_width_height()]
+            self.figure_cache.move_to_end(key)
+            while len(self.figure_cache) > self.cache_size:
+                self.figure_cache.popitem(last=False)
+
+    def show_cached(self, key):
+        # Redisplay a chart rendered earlier under key by copying its bitmap back; False if it is not cached
+        entry = self.figure_cache.get(key)
+        if entry is None:
+            return False
+        self.figure_cache.move_to_end(key)
+        figure, bitmap, size = entry
+        self.figure = figure
+        figure.set_canvas(self.canvas)
+        self.canvas.figure = figure
+        with INSTRUMENTATION.stage('chart: blit'):
+            if size == self.canvas.get_width_height():
+                self.canvas.restore_region(bitmap)
+                self.canvas.blit(figure.bbox)
+            else:
+                # The canvas was resized since the bitmap was taken
+                self.canvas.draw()
+                entry[1:] = [self.canvas.copy_from_bbox(figure.bbox), self.canvas.get_width_height()]
+        return True
+
+    def reusable(self, key):
+        # A cached figure of the same chart (key[0]) for an older data version, handed over for in-place updates.
+        # The figure on screen is never returned, since prepare() may run on a worker thread.
+        for cached_key, (figure, bitmap, size) in reversed(self.figure_cache.items()):
+            if cached_key[0] == key[0] and cached_key != key and figure is not self.figure:
+                del self.figure_cache[cached_key]
+                return figure
+        return None
+
+    def axes(self, figure, layout):
+        # The figure's axes and artists if it was last drawn with the same layout, otherwise fresh ones
+        artists = self.artists.get(figure)
+        if artists is not None and artists['layout'] == layout and figure.axes:
+            return figure.axes[0], artists
+        figure.clear()
+        artists = self.artists[figure] = {'layout': layout}
+        return figure.add_subplot(111), artists
+
+    def bars(self, figure, values, **kwargs):
+        # Bar chart of a Series; with the same number of bars, only heights and labels change
+        ax, artists = self.axes(figure, 'bars')
+        bars = artists.get('bars')
+        if bars is not None and len(bars) == len(values):
+            for bar, height in zip(bars, values.to_numpy(dtype=np.float64, na_value=0)):
+                bar.set_height(height)
+            ax.set_xticks(range(len(values)), [str(label) for label in values.index])
+            ax.relim()
+            ax.autoscale_view()
+            return ax
+        ax.clear()
+        values.plot(kind='bar', ax=ax, **kwargs)
+        artists['bars'] = ax.containers[-1]
+        return ax
+
+    def line(self, figure, values, **kwargs):
+        ax, artists = self.axes(figure, 'line')
+        line = artists.get('line')
+        if line is not None:
+            line.set_data(values.index.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64, na_value=np.nan))
+            ax.relim()
+            ax.autoscale_view()
+            return ax
+        values.plot(kind='line', ax=ax, **kwargs)
+        artists['line'] = ax.lines[-1]
+        return ax
+
+    def scatter(self, figure, spotify_songs, x, y):
+        mode = self.scatter_mode
+        if mode == 'auto':
+            mode = 'points' if len(spotify_songs) <= self.scatter_point_limit else 'density'
+        if mode not in SCATTER_MODES:
+            raise ValueError(f"Unknown scatter mode {mode!r}, expected one of {SCATTER_MODES}")
+
+        x_values = column_values(spotify_songs, x)
+        y_values = column_values(spotify_songs, y)
+        valid = np.isfinite(x_values) & np.isfinite(y_values)
+        if mode == 'density' and not valid.any():
+            # A log-scaled image of no points has no colour range, so an empty sample is drawn instead
+            mode = 'sample'
+        ax, artists = self.axes(figure, f"scatter: {mode}")
+        if mode == 'points':
+            self.update_points(ax, artists, 'points', x_values, y_values, alpha=0.5, s=20)
+            self.rescale(ax, artists)
+            return ax
+
+        if mode == 'density':
+            counts, x_edges, y_edges = self.density(spotify_songs, x, y, x_values[valid], y_values[valid])
+            extent = (x_edges[0], x_edges[-1], y_edges[0], y_edges[-1])
+            image = artists.get('image')
+            if image is None:
+                image = ax.imshow(counts.T, origin='lower', aspect='auto', cmap='Blues', norm=LogNorm(),
+                                  extent=extent, interpolation='nearest')
+                artists['image'] = image
+                artists['colorbar'] = figure.colorbar(image, ax=ax, label='Songs')
+            else:
+                image.set_data(counts.T)
+                image.set_extent(extent)
+                image.norm.vmin = image.norm.vmax = None
+                image.autoscale()
+                artists['colorbar'].update_normal(image)
+        else:
+            positions = np.flatnonzero(valid)
+            sample = positions[stratified_sample(x_values[valid], y_values[valid], self.scatter_point_limit)]
+            self.update_points(ax, artists, 'points', x_values[sample], y_values[sample], alpha=0.5, s=10)
+
+        # The most-streamed songs stay visible as individual markers on top of the bounded rendering
+        if 'streams' in spotify_songs.columns:
+            streams = column_values(spotify_songs, 'streams')
+            streams = np.where(valid & np.isfinite(streams), streams, -np.inf)
+            count = min(SCATTER_HITS, len(streams))
+            # argpartition has no kth to take in an empty array
+            hits = np.argpartition(streams, len(streams) - count)[len(streams) - count:] if count else np.arange(0)
+            hits = hits[np.isfinite(streams[hits])]
+            self.update_points(ax, artists, 'hits', x_values[hits], y_values[hits], color='tab:red', s=14)
+            artists['hits'].set_label(f'Top {len(hits)} by streams')
+            ax.legend(loc='upper right')
+        self.rescale(ax, artists)
+        return ax
+
+    def rescale(self, ax, artists):
+        # relim() only measures lines, patches and images, so scatter offsets are added back explicitly
+        ax.relim()
+        for name in ('points', 'hits'):
+            if name in artists:
+                offsets = np.asarray(artists[name].get_offsets())
+                offsets = offsets[np.isfinite(offsets).all(axis=1)]
+                if len(offsets):
+                    ax.update_datalim(offsets)
+        ax.autoscale_view()
+
+    def update_points(self, ax, artists, name, x_values, y_values, **kwargs):
+        points = artists.get(name)
+        if points is None:
+            artists[name] = ax.scatter(x_values, y_values, **kwargs)
+        else:
+            points.set_offsets(np.column_stack([x_values, y_values]))
+
+    def density(self, spotify_songs, x, y, x_values, y_values, bins=200):
+        cached = self.density_cache.get((x, y))
+        if cached is not None and cached[0]() is spotify_songs:
+            return cached[1]
+        histogram = np.histogram2d(x_values, y_values, bins=[histogram_edges(x_values, bins),
+                                                             histogram_edges(y_values, bins)])
+        # Histograms of any other dataset are stale once a new one is plotted
+        density_cache = {key: entry for key, entry in self.density_cache.items() if entry[0]() is spotify_songs}
+        density_cache[(x, y)] = (weakref.ref(spotify_songs), histogram)
+        self.density_cache = density_cache
+        return histogram
+
+    def plot_streams_by_year(self, spotify_songs, cube=None):
+        self.plot(self.draw_streams_by_year, "streams by year", spotify_songs, cube)
+
+    def draw_streams_by_year(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        ax = self.bars(figure, cube.rollup(['released_year'])['streams_sum'])
+        ax.set_title('Total Streams by Release Year')
+        ax.set_xlabel('Year')
+        ax.set_ylabel('Streams')
+
+    def plot_top_artists_by_streams(self, spotify_songs, artist_index=None, weighting='full'):
+        self.plot(self.draw_top_artists_by_streams, "top artists by streams", spotify_songs, artist_index, weighting)
+
+    def draw_top_artists_by_streams(self, figure, spotify_songs, artist_index=None, weighting='full'):
+        # Collaborations are credited to each individual artist rather than the joined name string
+        if artist_index is None:
+            artist_index = ArtistIndex(spotify_songs['artist(s)_name'], spotify_songs['artist_count'])
+        top_artists = artist_index.top(spotify_songs['streams'], 10, weighting) / 1e6
+        ax = self.bars(figure, top_artists)
+        ax.set_title('Top 10 Artists by Streams')
+        ax.set_xlabel('Artist')
+        ax.set_ylabel('Streams (in millions)')
+        ax.set_xticklabels(top_artists.index, rotation=30, ha='right', fontsize=10)
 
     def plot_danceability_vs_energy(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['danceability_%'] = pd.to_numeric(spotify_songs['danceability_%'], errors='coerce')
-            spotify_songs['energy_%'] = pd.to_numeric(spotify_songs['energy_%'], errors='coerce')
-            spotify_songs.plot.scatter(x='danceability_%', y='energy_%', ax=ax, alpha=0.5)
-            ax.set_title('Danceability vs. Energy')
-            ax.set_xlabel('Danceability')
-            ax.set_ylabel('Energy')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting danceability vs. energy: {e}")
+        self.plot(self.draw_danceability_vs_energy, "danceability vs. energy", spotify_songs)
 
-    def plot_songs_released_by_month(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['released_month'] = pd.to_numeric(spotify_songs['released_month'], errors='coerce')
-            spotify_songs['released_month'].value_counts().sort_index().plot(kind='bar', ax=ax)
-            ax.set_title('Count of Songs Released by Month')
-            ax.set_xlabel('Month')
-            ax.set_ylabel('Count of Songs')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting songs released by month: {e}")
+    def draw_danceability_vs_energy(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'danceability_%', 'energy_%')
+        ax.set_title('Danceability vs. Energy')
+        ax.set_xlabel('Danceability')
+        ax.set_ylabel('Energy')
 
-    def plot_key_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['streams'] = pd.to_numeric(spotify_songs['streams'], errors='coerce')
-            spotify_songs.groupby('key')['streams'].sum().plot(kind='bar', ax=ax)
-            ax.set_title('Total Streams by Key')
-            ax.set_xlabel('Key')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting key vs. streams: {e}")
+    def plot_songs_released_by_month(self, spotify_songs, cube=None):
+        self.plot(self.draw_songs_released_by_month, "songs released by month", spotify_songs, cube)
+
+    def draw_songs_released_by_month(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        ax = self.bars(figure, cube.rollup(['released_month'])['rows'])
+        ax.set_title('Count of Songs Released by Month')
+        ax.set_xlabel('Month')
+        ax.set_ylabel('Count of Songs')
+
+    def plot_key_vs_streams(self, spotify_songs, cube=None):
+        self.plot(self.draw_key_vs_streams, "key vs. streams", spotify_songs, cube)
+
+    def draw_key_vs_streams(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        ax = self.bars(figure, cube.rollup(['key'])['streams_sum'])
+        ax.set_title('Total Streams by Key')
+        ax.set_xlabel('Key')
+        ax.set_ylabel('Streams')
 
     def plot_valence_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['valence'] = pd.to_numeric(spotify_songs['valence_%'], errors='coerce')
-            spotify_songs['streams'] = pd.to_numeric(spotify_songs['streams'], errors='coerce')
-            spotify_songs.plot.scatter(x='valence', y='streams', ax=ax, alpha=0.5)
-            ax.set_title('Valence vs. Streams')
-            ax.set_xlabel('Valence (Musical Positivity)')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting valence vs. streams: {e}")
+        self.plot(self.draw_valence_vs_streams, "valence vs. streams", spotify_songs)
 
-    def plot_mode_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['streams'] = pd.to_numeric(spotify_songs['streams'], errors='coerce')
-            spotify_songs.groupby('mode')['streams'].sum().plot(kind='bar', ax=ax)
-            ax.set_title('Total Streams by Mode')
-            ax.set_xlabel('Mode')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting mode vs. streams: {e}")
+    def draw_valence_vs_streams(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'valence_%', 'streams')
+        ax.set_title('Valence vs. Streams')
+        ax.set_xlabel('Valence (Musical Positivity)')
+        ax.set_ylabel('Streams')
+
+    def plot_mode_vs_streams(self, spotify_songs, cube=None):
+        self.plot(self.draw_mode_vs_streams, "mode vs. streams", spotify_songs, cube)
+
+    def draw_mode_vs_streams(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        ax = self.bars(figure, cube.rollup(['mode'])['streams_sum'])
+        ax.set_title('Total Streams by Mode')
+        ax.set_xlabel('Mode')
+        ax.set_ylabel('Streams')
 
     def plot_danceability_vs_bpm(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['danceability_%'] = pd.to_numeric(spotify_songs['danceability_%'], errors='coerce')
-            spotify_songs['bpm'] = pd.to_numeric(spotify_songs['bpm'], errors='coerce')
-            spotify_songs.plot.scatter(x='danceability_%', y='bpm', ax=ax, alpha=0.5)
-            ax.set_title('Danceability vs. BPM')
-            ax.set_xlabel('Danceability')
-            ax.set_ylabel('BPM')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting danceability vs. BPM: {e}")
+        self.plot(self.draw_danceability_vs_bpm, "danceability vs. BPM", spotify_songs)
 
-    def plot_avg_bpm_vs_release_year(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['released_year'] = pd.to_numeric(spotify_songs['released_year'], errors='coerce')
-            spotify_songs['bpm'] = pd.to_numeric(spotify_songs['bpm'], errors='coerce')
-            spotify_songs.groupby('released_year')['bpm'].mean().plot(kind='line', marker='o', ax=ax)
-            ax.set_title('Average BPM vs. Release Year')
-            ax.set_xlabel('Release Year')
-            ax.set_ylabel('Average BPM')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting average BPM vs. release year: {e}")
+    def draw_danceability_vs_bpm(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'danceability_%', 'bpm')
+        ax.set_title('Danceability vs. BPM')
+        ax.set_xlabel('Danceability')
+        ax.set_ylabel('BPM')
 
-    def plot_pie_chart_of_keys(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            key_counts = spotify_songs['key'].value_counts()
-            key_counts.plot(kind='pie', ax=ax, autopct='%1.1f%%', startangle=90, legend=False)
-            ax.set_title('Distribution of Keys')
-            ax.set_ylabel('')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting pie chart of keys: {e}")
+    def plot_avg_bpm_vs_release_year(self, spotify_songs, cube=None):
+        self.plot(self.draw_avg_bpm_vs_release_year, "average BPM vs. release year", spotify_songs, cube)
 
-    def plot_collaborative_vs_solo(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs['streams'] = pd.to_numeric(spotify_songs['streams'], errors='coerce')
-            spotify_songs['is_collaborative'] = spotify_songs['artist_count'].apply(
-                lambda x: 'Collaborative' if x > 1 else 'Solo')
-            summary = spotify_songs.groupby('is_collaborative')['streams'].sum().reset_index()
-            summary.plot(kind='bar', x='is_collaborative', y='streams', ax=ax, legend=False)
-            ax.set_title('Total Streams: Collaborative Tracks vs. Solo Tracks')
-            ax.set_xlabel('Track Type')
-            ax.set_ylabel('Streams')
-            ax.set_xticklabels(summary['is_collaborative'], rotation=0)
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting collaborative vs. solo streams: {e}")
+    def draw_avg_bpm_vs_release_year(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        ax = self.line(figure, cube.rollup(['released_year'])['bpm_mean'], marker='o')
+        ax.set_title('Average BPM vs. Release Year')
+        ax.set_xlabel('Release Year')
+        ax.set_ylabel('Average BPM')
+
+    def plot_pie_chart_of_keys(self, spotify_songs, cube=None):
+        self.plot(self.draw_pie_chart_of_keys, "pie chart of keys", spotify_songs, cube)
+
+    def draw_pie_chart_of_keys(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        key_counts = cube.rollup(['key'])['rows'].sort_values(ascending=False)
+        key_counts = key_counts[key_counts > 0]
+        # Wedge geometry depends on every count, so the pie is redrawn on the reused axes
+        ax, artists = self.axes(figure, 'pie')
+        ax.clear()
+        key_counts.plot(kind='pie', ax=ax, autopct='%1.1f%%', startangle=90, legend=False)
+        ax.set_title('Distribution of Keys')
+        ax.set_ylabel('')
+
+    def plot_collaborative_vs_solo(self, spotify_songs, cube=None):
+        self.plot(self.draw_collaborative_vs_solo, "collaborative vs. solo streams", spotify_songs, cube)
+
+    def draw_collaborative_vs_solo(self, figure, spotify_songs, cube=None):
+        if cube is None:
+            cube = AggregateCube(spotify_songs)
+        summary = cube.rollup(['is_collaborative'])['streams_sum'].rename('streams').reset_index()
+        ax = self.bars(figure, summary.set_index('is_collaborative')['streams'])
+        ax.set_title('Total Streams: Collaborative Tracks vs. Solo Tracks')
+        ax.set_xlabel('Track Type')
+        ax.set_ylabel('Streams')
+        ax.set_xticklabels(summary['is_collaborative'], rotation=0)
 
     def plot_danceability_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs.plot.scatter(x='danceability_%', y='streams', ax=ax, alpha=0.5)
-            ax.set_title('Danceability vs. Streams')
-            ax.set_xlabel('Danceability')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting danceability vs. streams: {e}")
+        self.plot(self.draw_danceability_vs_streams, "danceability vs. streams", spotify_songs)
+
+    def draw_danceability_vs_streams(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'danceability_%', 'streams')
+        ax.set_title('Danceability vs. Streams')
+        ax.set_xlabel('Danceability')
+        ax.set_ylabel('Streams')
 
     def plot_acousticness_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs.plot.scatter(x='acousticness_%', y='streams', ax=ax, alpha=0.5)
-            ax.set_title('Acousticness vs. Streams')
-            ax.set_xlabel('Acousticness')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting acousticness vs. streams: {e}")
+        self.plot(self.draw_acousticness_vs_streams, "acousticness vs. streams", spotify_songs)
+
+    def draw_acousticness_vs_streams(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'acousticness_%', 'streams')
+        ax.set_title('Acousticness vs. Streams')
+        ax.set_xlabel('Acousticness')
+        ax.set_ylabel('Streams')
 
     def plot_instrumentalness_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs.plot.scatter(x='instrumentalness_%', y='streams', ax=ax, alpha=0.5)
-            ax.set_title('Instrumentalness vs. Streams')
-            ax.set_xlabel('Instrumentalness')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting instrumentalness vs. streams: {e}")
+        self.plot(self.draw_instrumentalness_vs_streams, "instrumentalness vs. streams", spotify_songs)
+
+    def draw_instrumentalness_vs_streams(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'instrumentalness_%', 'streams')
+        ax.set_title('Instrumentalness vs. Streams')
+        ax.set_xlabel('Instrumentalness')
+        ax.set_ylabel('Streams')
 
     def plot_liveness_vs_streams(self, spotify_songs):
-        try:
-            self.figure.clear()
-            ax = self.figure.add_subplot(111)
-            spotify_songs.plot.scatter(x='liveness_%', y='streams', ax=ax, alpha=0.5)
-            ax.set_title('Liveness vs. Streams')
-            ax.set_xlabel('Liveness')
-            ax.set_ylabel('Streams')
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while plotting liveness vs. streams: {e}")
+        self.plot(self.draw_liveness_vs_streams, "liveness vs. streams", spotify_songs)
+
+    def draw_liveness_vs_streams(self, figure, spotify_songs):
+        ax = self.scatter(figure, spotify_songs, 'liveness_%', 'streams')
+        ax.set_title('Liveness vs. Streams')
+        ax.set_xlabel('Liveness')
+        ax.set_ylabel('Streams')
+
+    def plot_streams_by_snapshot(self, spotify_songs, snapshots):
+        self.plot(self.draw_streams_by_snapshot, "streams by snapshot", spotify_songs, snapshots)
+
+    def draw_streams_by_snapshot(self, figure, spotify_songs, snapshots):
+        totals = snapshots.totals('streams') / 1e9
+        ax = self.line(figure, totals.reset_index(drop=True), marker='o')
+        ax.set_xticks(range(len(totals)), totals.index.strftime('%Y-%m-%d'), rotation=30)
+        ax.set_title('Total Streams by Snapshot')
+        ax.set_xlabel('Snapshot')
+        ax.set_ylabel('Streams (in billions)')
+
+    def plot_streams_change_by_snapshot(self, spotify_songs, snapshots):
+        self.plot(self.draw_streams_change_by_snapshot, "week-over-week change in streams", spotify_songs, snapshots)
+
+    def draw_streams_change_by_snapshot(self, figure, spotify_songs, snapshots):
+        change = snapshots.total_deltas('streams') / 1e6
+        ax = self.bars(figure, change.set_axis(change.index.strftime('%Y-%m-%d')))
+        ax.set_title('Week-over-Week Change in Streams')
+        ax.set_xlabel('Snapshot')
+        ax.set_ylabel('Change in streams (in millions)')
+        ax.tick_params(axis='x', labelrotation=30)
+
+    def plot_playlist_change_by_snapshot(self, spotify_songs, snapshots):
+        self.plot(self.draw_playlist_change_by_snapshot, "week-over-week change in playlists", spotify_songs,
+                  snapshots)
+
+    def draw_playlist_change_by_snapshot(self, figure, spotify_songs, snapshots):
+        change = pd.DataFrame({label: snapshots.total_deltas(measure) for label, measure in
+                               [('Spotify', 'in_spotify_playlists'), ('Apple Music', 'in_apple_playlists'),
+                                ('Deezer', 'in_deezer_playlists')]})
+        change.index = change.index.strftime('%Y-%m-%d')
+        # Grouped bars have one container per platform, so they are redrawn on the reused axes
+        ax, artists = self.axes(figure, 'grouped bars')
+        ax.clear()
+        change.plot(kind='bar', ax=ax)
+        ax.set_title('Week-over-Week Change in Playlists')
+        ax.set_xlabel('Snapshot')
+        ax.set_ylabel('Change in playlist count')
+        ax.tick_params(axis='x', labelrotation=30)
+
+    def plot_top_movers_by_streams(self, spotify_songs, snapshots):
+        self.plot(self.draw_top_movers_by_streams, "top movers by streams", spotify_songs, snapshots)
+
+    def draw_top_movers_by_streams(self, figure, spotify_songs, snapshots):
+        movers = snapshots.movers('streams', 10) / 1e6
+        ax = self.bars(figure, movers)
+        ax.set_title('Top Movers by Streams since the Previous Snapshot')
+        ax.set_xlabel('Track')
+        ax.set_ylabel('Streams gained (in millions)')
+        ax.set_xticklabels(movers.index, rotation=30, ha='right', fontsize=9)